@@ -0,0 +1,89 @@
+"""
+正则预筛选基准 - 对比逐行运行正则与先整块查找必需字面量再校验候选行
+
+用法：
+    python benchmarks/regex_prefilter.py [--lines 400000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from logconsole.core.literal_search import search_block  # noqa: E402
+from logconsole.core.match_list import MatchList  # noqa: E402
+from logconsole.core.regex_literals import regex_prefilter  # noqa: E402
+from logconsole.core.search_engine import CANCEL_CHECK_LINES  # noqa: E402
+
+# (正则, 是否忽略大小写)：常见的带必需字面量的查询，以及几乎每行都命中的对照组
+PATTERNS = [
+    (r"robot=\S+ task=\d+ cost=\d+", False),
+    (r"cost=(\d{3,})ms", False),
+    (r"ERROR.*timeout", True),
+    (r"container-D-0[0-9] state=FAIL", False),
+    (r"robot=\d+", False),  # 每行都有，预筛选不起作用
+]
+
+
+def make_lines(count: int, seed: int = 3) -> list:
+    """生成模拟日志行：每 50 行有一条带耗时，每 500 行有一条失败"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        line = (f"2024-01-01 12:00:{i % 60:02d} INFO robot={rng.randint(0, 999)} "
+                f"task={rng.randint(0, 99)} container-D-{rng.randint(0, 20):02d}")
+        if i % 500 == 0:
+            line += " state=FAIL"
+        elif i % 50 == 0:
+            line += f" cost={rng.randint(1, 500)}ms"
+        lines.append(line)
+    return lines
+
+
+def scan_per_line(lines: list, regex: "re.Pattern") -> MatchList:
+    """对照组：逐行运行正则"""
+    matches = MatchList()
+    for line_num, line in enumerate(lines):
+        for match in regex.finditer(line):
+            matches.append(line_num, match.start(), match.end())
+    return matches
+
+
+def scan_blocks(lines: list, regex: "re.Pattern") -> MatchList:
+    """按 SearchEngine 的块大小调用 search_block（带预筛选）"""
+    matches = MatchList()
+    for start in range(0, len(lines), CANCEL_CHECK_LINES):
+        matches.extend(search_block(lines[start:start + CANCEL_CHECK_LINES], start, regex))
+    return matches
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=400_000, help="模拟日志行数")
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines)
+    print(f"{len(lines):,} lines, {sum(map(len, lines)) / 1e6:.1f}M chars")
+    print(f"{'pattern':<34}{'prefilter':<24}{'matches':>9}{'per-line':>10}{'prefilter':>11}{'speed-up':>10}")
+    for pattern, ignore_case in PATTERNS:
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        expected, baseline = timed(scan_per_line, lines, regex)
+        found, elapsed = timed(scan_blocks, lines, regex)
+        assert found == expected, pattern
+        needles = regex_prefilter(regex.pattern, regex.flags)
+        label = ", ".join(needles[0]) if needles else "-"
+        print(f"{pattern:<34}{label[:22]:<24}{len(found):>9,}{baseline:>9.3f}s{elapsed:>10.3f}s"
+              f"{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
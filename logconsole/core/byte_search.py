@@ -0,0 +1,148 @@
+"""
+字节级搜索 - 在 mmap 的原始字节上查找编码后的必需字面量，只解码可能匹配的行
+"""
+import codecs
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from .compressed_store import CompressedLineStore
+from .line_store import LineStore
+from .match_list import MatchList
+from .regex_literals import required_literals
+from .trigram_index import encode_needles
+
+# 可以直接在原始字节上筛选的编码：无状态，\n 是单字节且不会出现在多字节字符内部，
+# 每个字符只有一种编码（GBK 的尾字节可能落在 ASCII 范围，由解码后的正则复核）
+BYTE_SEARCH_ENCODINGS = frozenset({"utf-8", "ascii", "gbk", "gb2312", "gb18030"})
+
+
+def byte_search_encoding(encoding: str) -> bool:
+    """该编码能否在原始字节上筛选"""
+    try:
+        return codecs.lookup(encoding).name in BYTE_SEARCH_ENCODINGS
+    except LookupError:
+        return False
+
+
+def byte_search_supported(lines) -> bool:
+    """行存储能否直接读取原始字节搜索（需要未压缩、编码可按字节筛选的文件行存储）"""
+    return (isinstance(lines, LineStore) and not isinstance(lines, CompressedLineStore)
+            and byte_search_encoding(lines.encoding))
+
+
+@lru_cache(maxsize=128)
+def byte_prefilter(pattern: str, flags: int, encoding: str) -> Optional[Tuple[Tuple[bytes, ...], bool]]:
+    """
+    正则的字节预筛选串：每个都是编码后的必需字面量片段，原始字节中不包含其中
+    任何一个的行不可能匹配
+
+    忽略大小写时只使用大小写变体全在 ASCII 内的片段，预筛选串和原始字节都按
+    bytes.lower()（只转换 ASCII）比较。
+
+    Returns:
+        (预筛选串, 是否忽略大小写)；没有可用字面量时返回 None
+    """
+    literals, ignore_case = required_literals(pattern, flags)
+    needles = {
+        n.lower() if ignore_case else n
+        for n in encode_needles(literals, encoding, ignore_case)
+        if b"\n" not in n
+    }
+    if not needles:
+        return None
+    return tuple(sorted(needles)), ignore_case
+
+
+def candidate_spans(data: bytes, needle: bytes, limit: Optional[int] = None) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    包含 needle 的行
+
+    Args:
+        data: 以 \\n 分行的原始字节
+        needle: 预筛选串（不含 \\n）
+        limit: 最多找多少行（None 不限）
+
+    Returns:
+        [(相对第一行的下标, 行起始位置, 行结束位置)]，行号升序不重复；超过 limit 行时返回 None
+    """
+    found = []
+    find, rfind, count = data.find, data.rfind, data.count
+    line = 0
+    scanned = 0
+    pos = find(needle)
+    while pos >= 0:
+        line += count(b"\n", scanned, pos)
+        end = find(b"\n", pos + len(needle))
+        found.append((line, rfind(b"\n", scanned, pos) + 1, len(data) if end < 0 else end))
+        if limit is not None and len(found) > limit:
+            return None
+        if end < 0:
+            break
+        # 同一行的其余命中不需要再找，直接跳到下一行
+        scanned = end
+        pos = find(needle, end + 1)
+    return found
+
+
+def search_raw_block(
+    raw: bytes,
+    first_line: int,
+    regex: "re.Pattern",
+    encoding: str,
+    line_count: Optional[int] = None
+) -> Optional[MatchList]:
+    """
+    在原始字节上搜索一块连续的行：先用字节预筛选串找出候选行，只解码候选行并
+    运行原正则，列号是解码后的字符位置
+
+    字节命中可能跨越 GBK 字符边界（尾字节与 ASCII 重叠），也可能不满足正则的
+    其余部分，都由解码后的正则排除。
+
+    Args:
+        raw: [起始行, 结束行) 的原始字节（\\n 分行）
+        first_line: 第一行的行号
+        regex: 编译好的正则
+        encoding: 文件编码（byte_search_encoding 为 True）
+        line_count: 本块的行数（None 时统计换行符）
+
+    Returns:
+        匹配结果；正则没有可用的字节预筛选串或候选行过半（逐行解码不如整块
+        解码）时返回 None
+    """
+    prefilter = byte_prefilter(regex.pattern, regex.flags, encoding)
+    if prefilter is None:
+        return None
+    needles, ignore_case = prefilter
+    haystack = raw.lower() if ignore_case else raw
+    # 有多个必需片段时用本块中最少见的筛选
+    needle = needles[0] if len(needles) == 1 else min((haystack.count(n), n) for n in needles)[1]
+    if line_count is None:
+        line_count = raw.count(b"\n") + (not raw.endswith(b"\n"))
+    # 先在前 1/8 抽样，明显过半的块不必逐行找到上限再放弃
+    if haystack.count(needle, 0, len(haystack) // 8) > line_count // 16:
+        return None
+    spans = candidate_spans(haystack, needle, line_count // 2)
+    if spans is None:
+        return None
+
+    matches = MatchList()
+    finditer = regex.finditer
+    for index, start, end in spans:
+        line = raw[start:end].decode(encoding, errors="replace")
+        if line.endswith("\r"):
+            line = line[:-1]
+        for match in finditer(line):
+            matches.append(first_line + index, match.start(), match.end())
+    return matches
+
+
+def search_store_block(store: LineStore, start: int, end: int, regex: "re.Pattern") -> Optional[MatchList]:
+    """
+    在行存储的 [start, end) 行的原始字节上搜索（参见 search_raw_block）
+
+    Returns:
+        匹配结果；无法按字节筛选时返回 None，由调用方解码整块搜索
+    """
+    raw = store.read_bytes(store.line_offset(start), store.line_offset(end))
+    return search_raw_block(raw, start, regex, store.encoding, end - start)
@@ -0,0 +1,41 @@
+"""
+取消令牌 - 加载、搜索、Grep、导出等长操作在循环中检查，支持从界面中止
+"""
+import threading
+from typing import Optional
+
+
+class OperationCancelled(Exception):
+    """操作已被取消"""
+
+
+class CancellationToken:
+    """
+    线程安全的取消令牌
+
+    由界面线程调用 cancel()，工作线程在每个块 / 每批行之后调用 check()，
+    已取消时抛出 OperationCancelled，由调用方负责释放资源。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """请求取消"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._event.is_set()
+
+    def check(self):
+        """已请求取消时抛出 OperationCancelled"""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+def check_cancelled(token: Optional[CancellationToken]):
+    """token 可为 None（不可取消）的便捷检查"""
+    if token is not None:
+        token.check()
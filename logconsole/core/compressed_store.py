@@ -0,0 +1,262 @@
+"""
+压缩日志行存储 - 一次流式解压建立行索引和解压检查点，按需从最近的检查点解压
+"""
+import bz2
+import gzip
+import lzma
+import tempfile
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Tuple
+
+from .line_store import LineStore
+
+# 文件头魔数 -> 压缩格式
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x5d\x00\x00", "xz"),  # 旧式 .lzma，LZMADecompressor 自动识别
+]
+
+# 解压器状态不能复制的格式：建立索引时把解压数据写入临时文件，随机读取直接读临时文件
+SPILL_COMPRESSIONS = frozenset({"bz2", "xz"})
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    根据文件头识别压缩格式
+
+    Returns:
+        "gzip" / "bz2" / "xz"，非压缩文件返回 None
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for magic, kind in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def open_decompressed(fileobj, compression: str):
+    """在原始文件对象上打开解压后的二进制流"""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj)
+    if compression == "bz2":
+        return bz2.BZ2File(fileobj)
+    return lzma.LZMAFile(fileobj)
+
+
+def _new_decompressor(compression: str):
+    """创建一个新的流解压器"""
+    if compression == "gzip":
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if compression == "bz2":
+        return bz2.BZ2Decompressor()
+    return lzma.LZMADecompressor()
+
+
+@dataclass
+class Checkpoint:
+    """解压检查点：从 comp_offset 开始、用 state 继续解压，输出从 uncomp_offset 开始"""
+    comp_offset: int
+    uncomp_offset: int
+    state: Any = None  # 解压器状态快照；None 表示该位置是一个新压缩流的开头
+
+
+class CompressedLineStore(LineStore):
+    """
+    gzip / bz2 / xz 压缩日志的行存储
+
+    offsets 为解压后数据中的字节偏移。gzip 借助 zlib 解压器的 copy() 每隔
+    checkpoint_interval 保存一次状态快照；bz2 / xz 的标准库解压器不能复制状态，
+    只能在压缩流边界（多流文件，如 pbzip2 输出）设置检查点，单流文件的任何随机
+    读取都要从头解压，因此建立索引时把解压数据顺带写入临时文件，已写入的范围
+    直接从临时文件读取（临时文件占用与解压后大小相同的磁盘空间）。
+    """
+
+    follow_supported = False
+
+    def __init__(
+        self,
+        file_path: str,
+        compression: str,
+        encoding: str = "utf-8",
+        data_start: int = 0,
+        checkpoint_interval: int = 4 * 1024 * 1024,
+        read_block: int = 256 * 1024,
+        cache_windows: int = 4
+    ):
+        """
+        初始化压缩行存储
+
+        Args:
+            file_path: 文件路径
+            compression: 压缩格式（gzip / bz2 / xz）
+            encoding: 行解码使用的编码
+            data_start: 解压数据中的起始偏移（跳过 BOM）
+            checkpoint_interval: 检查点间隔（解压后字节数）
+            read_block: 每次读取的压缩数据大小
+            cache_windows: 缓存的已解压窗口数量（LRU）
+        """
+        super().__init__(file_path, encoding, data_start)
+        self.compression = compression
+        self.checkpoint_interval = checkpoint_interval
+        self.read_block = read_block
+        self.checkpoints: List[Checkpoint] = [Checkpoint(0, 0)]
+        self.compressed_size = 0
+        self._cache_windows = cache_windows
+        self._windows: "OrderedDict[int, bytes]" = OrderedDict()
+        self._read_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._spill = None  # bz2 / xz：已解压数据的临时文件
+        self._spilled = 0  # 临时文件中已写入的解压字节数
+        self._spill_lock = threading.Lock()
+
+    def open(self):
+        """打开压缩文件（解压后大小在 stream() 完成后才知道）"""
+        self._file = open(self.file_path, "rb")
+        self.compressed_size = self._file.seek(0, 2)
+
+    def close(self):
+        """关闭压缩文件并删除解压数据的临时文件"""
+        super().close()
+        with self._spill_lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+                self._spilled = 0
+
+    def _read_compressed(self, offset: int, size: int) -> bytes:
+        with self._read_lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def _decompress_from(
+        self,
+        checkpoint: Checkpoint,
+        record: bool = False
+    ) -> Iterator[Tuple[int, int, bytes]]:
+        """
+        从检查点开始解压
+
+        Args:
+            checkpoint: 起始检查点
+            record: 是否沿途记录检查点（仅建立索引时）
+
+        Yields:
+            (已读取的压缩字节位置, 本段数据的解压后偏移, 解压数据)
+        """
+        dobj = checkpoint.state.copy() if checkpoint.state is not None else _new_decompressor(self.compression)
+        comp_pos = checkpoint.comp_offset
+        uncomp_pos = checkpoint.uncomp_offset
+        last_checkpoint = uncomp_pos
+
+        while True:
+            block = self._read_compressed(comp_pos, self.read_block)
+            if not block:
+                break
+            comp_pos += len(block)
+            data = dobj.decompress(block)
+
+            # 多成员 gzip / 多流 bz2、xz：上一个流结束后从剩余数据开始新流
+            trailing_garbage = False
+            while dobj.eof:
+                rest = dobj.unused_data
+                if self.compression != "bz2":
+                    rest = rest.lstrip(b"\0")  # gzip 尾部补零 / xz 流填充
+                dobj = _new_decompressor(self.compression)
+                if record:
+                    self.checkpoints.append(Checkpoint(comp_pos - len(rest), uncomp_pos + len(data)))
+                    last_checkpoint = uncomp_pos + len(data)
+                if not rest:
+                    break
+                try:
+                    data += dobj.decompress(rest)
+                except (OSError, EOFError, zlib.error, lzma.LZMAError):
+                    # 流之后的非压缩数据，与 gzip / bz2 / lzma 模块一样忽略
+                    trailing_garbage = True
+                    break
+
+            yield comp_pos, uncomp_pos, data
+            if trailing_garbage:
+                return
+            uncomp_pos += len(data)
+
+            if (record and self.compression == "gzip"
+                    and uncomp_pos - last_checkpoint >= self.checkpoint_interval):
+                self.checkpoints.append(Checkpoint(comp_pos, uncomp_pos, dobj.copy()))
+                last_checkpoint = uncomp_pos
+
+    def stream(self) -> Iterator[Tuple[int, int, bytes]]:
+        """
+        建立索引用的单次流式解压，沿途记录检查点
+
+        Yields:
+            (已读取的压缩字节位置, 本段数据的解压后偏移, 解压数据)
+        """
+        self.checkpoints = [Checkpoint(0, 0)]
+        with self._spill_lock:
+            if self._spill is not None:
+                self._spill.close()
+            self._spill = tempfile.TemporaryFile(prefix="logconsole-") \
+                if self.compression in SPILL_COMPRESSIONS else None
+            self._spilled = 0
+        for comp_pos, base, data in self._decompress_from(self.checkpoints[0], record=True):
+            if self._spill is not None:
+                with self._spill_lock:
+                    self._spill.seek(base)
+                    self._spill.write(data)
+                    self._spilled = base + len(data)
+            self.size = base + len(data)
+            yield comp_pos, base, data
+
+    def read_bytes(self, start: int, end: int) -> bytes:
+        """读取解压后 [start, end) 范围的字节，从最近的检查点开始解压"""
+        if start >= end:
+            return b""
+
+        # 建立索引时已写入临时文件的范围
+        with self._spill_lock:
+            if self._spill is not None and end <= self._spilled:
+                self._spill.seek(start)
+                return self._spill.read(end - start)
+
+        # 命中已解压窗口
+        with self._cache_lock:
+            for window_start, window in self._windows.items():
+                if window_start <= start and end <= window_start + len(window):
+                    self._windows.move_to_end(window_start)
+                    return window[start - window_start:end - window_start]
+
+        index = bisect_right([cp.uncomp_offset for cp in self.checkpoints], start) - 1
+        window_end = max(end, start + self.checkpoint_interval)
+        out = bytearray()
+        for _, base, data in self._decompress_from(self.checkpoints[index]):
+            data_end = base + len(data)
+            if data_end > start:
+                out += data[max(0, start - base):window_end - base]
+            if data_end >= window_end:
+                break
+
+        window = bytes(out)
+        with self._cache_lock:
+            self._windows[start] = window
+            while len(self._windows) > self._cache_windows:
+                self._windows.popitem(last=False)
+        return window[:end - start]
+
+    def find(self, sub: bytes, start: int, end: int) -> int:
+        """在解压后的 [start, end) 范围内查找字节串"""
+        index = self.read_bytes(start, end).find(sub)
+        return -1 if index < 0 else start + index
+
+    def extend(self, max_bytes: Optional[int] = None) -> Optional[int]:
+        """压缩文件不支持跟随模式"""
+        return None
@@ -0,0 +1,68 @@
+"""
+文件跟随 - tail -f 模式，增量索引追加内容，检测截断和日志轮转
+"""
+import os
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+from .line_store import LineStore
+
+
+class FollowEvent(Enum):
+    """跟随检查结果"""
+    NONE = "none"            # 没有变化
+    APPENDED = "appended"    # 有新内容追加
+    RESET = "reset"          # 文件被截断或轮转（inode 变化），需要重新打开
+
+
+@dataclass
+class FollowUpdate:
+    """一次检查的结果"""
+    event: FollowEvent
+    first_changed_line: int = 0  # 第一条有变化的行（APPENDED 时有效）
+    line_count: int = 0
+
+
+class FileFollower:
+    """跟随 LineStore 对应的文件，每次 poll 把新增字节批量追加到索引"""
+
+    def __init__(self, store: LineStore, max_bytes_per_poll: int = 16 * 1024 * 1024):
+        """
+        初始化跟随器
+
+        Args:
+            store: 已完成索引的行存储
+            max_bytes_per_poll: 单次 poll 最多索引的字节数，写入突发时分多次处理，避免卡住 UI
+        """
+        self.store = store
+        self.max_bytes_per_poll = max_bytes_per_poll
+        self._inode = self._stat_inode(store.file_path)
+
+    @staticmethod
+    def _stat_inode(file_path: str) -> Optional[int]:
+        try:
+            return os.stat(file_path).st_ino
+        except OSError:
+            return None
+
+    def poll(self) -> FollowUpdate:
+        """
+        检查文件变化并索引新增内容
+
+        Returns:
+            FollowUpdate
+        """
+        try:
+            st = os.stat(self.store.file_path)
+        except OSError:
+            # 轮转过程中文件可能短暂不存在，等新文件出现
+            return FollowUpdate(FollowEvent.NONE, line_count=len(self.store))
+
+        if st.st_ino != self._inode or st.st_size < self.store.indexed_end:
+            return FollowUpdate(FollowEvent.RESET, line_count=len(self.store))
+
+        first_changed = self.store.extend(self.max_bytes_per_poll)
+        if first_changed is None:
+            return FollowUpdate(FollowEvent.NONE, line_count=len(self.store))
+        return FollowUpdate(FollowEvent.APPENDED, first_changed, len(self.store))
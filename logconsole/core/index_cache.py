@@ -0,0 +1,335 @@
+"""
+行索引缓存 - 将 LineStore 的行偏移持久化到 ~/.logconsole/index_cache
+"""
+import hashlib
+import json
+import os
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .sparse_line_store import SparseLineStore
+from .trigram_index import TrigramIndex
+
+# 头尾指纹的采样长度
+FINGERPRINT_SIZE = 4096
+
+# 缓存格式版本，格式变化时递增以丢弃旧缓存
+CACHE_VERSION = 1
+
+# 三元组索引文件首行 JSON 头的长度上限
+TRIGRAM_HEADER_LIMIT = 64 * 1024
+
+
+@dataclass
+class CachedIndex:
+    """命中的缓存索引"""
+    offsets: array          # 行起始偏移（不含末行哨兵）
+    encoding: str
+    data_start: int
+    indexed_size: int       # 已建立索引的字节数
+    complete: bool          # 文件未变化；False 表示文件只增长，需要续建索引
+
+
+class IndexCache:
+    """行索引磁盘缓存，按路径 + inode 定位，按大小 / mtime / 头尾指纹校验"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_age_days: float = 30,
+        min_file_size: int = 1024 * 1024,
+        persist_trigram_index: bool = False
+    ):
+        """
+        初始化索引缓存
+
+        Args:
+            cache_dir: 缓存目录（默认 ~/.logconsole/index_cache）
+            max_bytes: 缓存总大小上限，超出后按最近访问时间淘汰
+            max_age_days: 超过该天数未访问的缓存会被删除
+            min_file_size: 小于该大小的文件不缓存（重新扫描已足够快）
+            persist_trigram_index: 是否同时保存三元组索引（默认关闭，每次打开文件后台重建）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".logconsole" / "index_cache"
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 3600
+        self.min_file_size = min_file_size
+        self.persist_trigram_index = persist_trigram_index
+
+    def _key(self, file_path: str, inode: int) -> str:
+        """缓存键：真实路径 + inode"""
+        raw = f"{os.path.realpath(file_path)}\0{inode}".encode("utf-8", errors="surrogateescape")
+        return hashlib.sha1(raw).hexdigest()
+
+    @staticmethod
+    def _fingerprint(f, start: int, end: int) -> str:
+        """计算 [start, end) 区间的指纹"""
+        f.seek(max(0, start))
+        return hashlib.sha1(f.read(end - max(0, start))).hexdigest()
+
+    def _paths(self, key: str):
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.idx"
+
+    def lookup(self, file_path: str) -> Optional[CachedIndex]:
+        """
+        查找文件的缓存索引
+
+        Args:
+            file_path: 日志文件路径
+
+        Returns:
+            文件未变化或只增长时返回缓存索引，否则返回 None
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if st.st_size < self.min_file_size:
+            return None
+
+        meta_path, idx_path = self._paths(self._key(file_path, st.st_ino))
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get("version") != CACHE_VERSION or meta.get("inode") != st.st_ino:
+            return None
+
+        old_size = meta["size"]
+        if st.st_size < old_size:
+            return None  # 文件被截断
+        if st.st_size == old_size and meta["mtime_ns"] != st.st_mtime_ns:
+            return None  # 原地改写
+
+        try:
+            with open(file_path, "rb") as f:
+                if self._fingerprint(f, 0, FINGERPRINT_SIZE) != meta["head"]:
+                    return None
+                if self._fingerprint(f, old_size - FINGERPRINT_SIZE, old_size) != meta["tail"]:
+                    return None
+            offsets = array("Q")
+            with open(idx_path, "rb") as f:
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+
+        if len(offsets) != meta["offset_count"]:
+            return None
+
+        # 记录访问时间，供淘汰使用
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return CachedIndex(
+            offsets=offsets,
+            encoding=meta["encoding"],
+            data_start=meta["data_start"],
+            indexed_size=old_size,
+            complete=st.st_size == old_size
+        )
+
+    def save(self, store) -> bool:
+        """
+        保存 LineStore 的索引
+
+        Args:
+            store: 已完成索引的 LineStore
+
+        Returns:
+            是否写入了缓存（稀疏索引不缓存）
+        """
+        if isinstance(store, SparseLineStore) or store.size < self.min_file_size:
+            return False
+        try:
+            st = os.stat(store.file_path)
+        except OSError:
+            return False
+        if st.st_size != store.size:
+            return False  # 索引期间文件又变化了，下次再缓存
+
+        offsets = store.newline_offsets()
+        try:
+            with open(store.file_path, "rb") as f:
+                head = self._fingerprint(f, 0, FINGERPRINT_SIZE)
+                tail = self._fingerprint(f, store.size - FINGERPRINT_SIZE, store.size)
+        except OSError:
+            return False
+
+        meta = {
+            "version": CACHE_VERSION,
+            "path": os.path.realpath(store.file_path),
+            "inode": st.st_ino,
+            "size": store.size,
+            "mtime_ns": st.st_mtime_ns,
+            "head": head,
+            "tail": tail,
+            "encoding": store.encoding,
+            "data_start": store.data_start,
+            "offset_count": len(offsets),
+            "line_count": len(store),
+            "created_at": time.time(),
+        }
+
+        meta_path, idx_path = self._paths(self._key(store.file_path, st.st_ino))
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免留下半截缓存
+            tmp_idx = idx_path.with_suffix(".idx.tmp")
+            with open(tmp_idx, "wb") as f:
+                offsets.tofile(f)
+            os.replace(tmp_idx, idx_path)
+            tmp_meta = meta_path.with_suffix(".json.tmp")
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_meta, meta_path)
+        except OSError:
+            return False
+
+        self.evict()
+        return True
+
+    def save_trigram_index(self, store, index: TrigramIndex) -> bool:
+        """
+        把三元组索引保存在行索引缓存旁边（只保存完整的索引，须已有行索引缓存，随它一起淘汰）
+
+        .tri 文件首行是 JSON 头（文件校验信息和索引计数），之后依次是三元组编码、
+        各三元组最后记录的块号、各倒排表的结束位置和拼接的倒排表，与 .idx 一样
+        直接保存数组的原始字节。
+
+        Args:
+            store: 建立索引所用的 LineStore
+            index: 完整的 TrigramIndex
+
+        Returns:
+            是否写入了缓存（未开启 persist_trigram_index 时不写入）
+        """
+        if not self.persist_trigram_index or not index.complete or store.size < self.min_file_size:
+            return False
+        try:
+            st = os.stat(store.file_path)
+        except OSError:
+            return False
+        if st.st_size != store.size:
+            return False
+
+        meta_path, _ = self._paths(self._key(store.file_path, st.st_ino))
+        if not meta_path.exists():
+            return False
+
+        counts, grams, last_blocks, ends, data = index.export()
+        header = {
+            "version": CACHE_VERSION,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "line_count": len(store),
+            "index": counts,
+            "gram_count": len(grams),
+            "data_bytes": len(data),
+        }
+        tri_path = meta_path.with_suffix(".tri")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = tri_path.with_suffix(".tri.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                grams.tofile(f)
+                last_blocks.tofile(f)
+                ends.tofile(f)
+                f.write(data)
+            os.replace(tmp_path, tri_path)
+        except OSError:
+            return False
+
+        self.evict()
+        return True
+
+    def lookup_trigram_index(self, store) -> Optional[TrigramIndex]:
+        """
+        查找行存储对应的三元组索引（文件自保存后没有任何变化时才命中）
+
+        Args:
+            store: 已完成行索引的 LineStore
+
+        Returns:
+            TrigramIndex，未开启 persist_trigram_index 或未命中时返回 None
+        """
+        if not self.persist_trigram_index:
+            return None
+        try:
+            st = os.stat(store.file_path)
+            meta_path, _ = self._paths(self._key(store.file_path, st.st_ino))
+            tri_path = meta_path.with_suffix(".tri")
+            f = open(tri_path, "rb")
+        except OSError:
+            return None
+        try:
+            with f:
+                header = json.loads(f.readline(TRIGRAM_HEADER_LIMIT))
+                if not isinstance(header, dict) or header.get("version") != CACHE_VERSION:
+                    raise ValueError("三元组索引缓存版本不符")
+                if (header.get("size") != st.st_size or header.get("mtime_ns") != st.st_mtime_ns
+                        or header.get("line_count") != len(store)):
+                    return None  # 文件已变化，保留到行索引缓存更新时覆盖
+                arrays = []
+                for typecode, count in (("I", header["gram_count"]), ("I", header["gram_count"]),
+                                        ("Q", header["gram_count"])):
+                    values = array(typecode)
+                    values.fromfile(f, count)
+                    arrays.append(values)
+                data = f.read(header["data_bytes"] + 1)
+                if len(data) != header["data_bytes"]:
+                    raise ValueError("三元组索引缓存长度不符")
+                return TrigramIndex.restore(header["index"], *arrays, data)
+        except Exception:
+            # 截断或损坏的缓存：删除后按未命中处理，由调用方重建
+            self._remove(tri_path)
+            return None
+
+    def evict(self):
+        """淘汰过期缓存，并按最近访问时间把总大小控制在 max_bytes 以内"""
+        if not self.cache_dir.exists():
+            return
+
+        now = time.time()
+        entries = []
+        for meta_path in self.cache_dir.glob("*.json"):
+            paths = (meta_path, meta_path.with_suffix(".idx"), meta_path.with_suffix(".tri"))
+            try:
+                accessed = meta_path.stat().st_mtime
+                size = sum(path.stat().st_size for path in paths if path.exists())
+            except OSError:
+                continue
+            if now - accessed > self.max_age:
+                self._remove(*paths)
+            else:
+                entries.append((accessed, size, paths))
+
+        total = sum(e[1] for e in entries)
+        for accessed, size, paths in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            self._remove(*paths)
+            total -= size
+
+    @staticmethod
+    def _remove(*paths: Path):
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """清空缓存目录"""
+        if not self.cache_dir.exists():
+            return
+        for meta_path in self.cache_dir.glob("*.json"):
+            self._remove(meta_path, meta_path.with_suffix(".idx"), meta_path.with_suffix(".tri"))
@@ -0,0 +1,173 @@
+"""
+多关键词匹配 - 把关键词建成前缀树（Aho–Corasick 的 goto 结构），编译成一个正则一次扫描
+"""
+import re
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_END = ""  # 前缀树中标记关键词结束的键，值为关键词下标
+
+
+@lru_cache(maxsize=4096)
+def _fold(char: str) -> str:
+    """
+    忽略大小写时字符在前缀树中的键：与 re.IGNORECASE 等价的单个字符
+    （"ſ" 与 "s"、"ς" 与 "σ"、开尔文符号与 "k" 折叠成同一个键）
+    """
+    if char.isascii():
+        return char.lower()
+    for folded in (char.casefold(), char.lower()):
+        if len(folded) == 1 and (folded == char or re.fullmatch(re.escape(folded), char, re.IGNORECASE)):
+            return folded
+    return char
+
+
+def keyword_key(keyword: str, ignore_case: bool) -> str:
+    """关键词在前缀树中的键（忽略大小写时逐字符折叠，长度不变）；键相同的关键词视为重复"""
+    return "".join(map(_fold, keyword)) if ignore_case else keyword
+
+
+def _trie_pattern(node: dict) -> str:
+    """把前缀树节点转换为正则（公共前缀只匹配一次，分支按字符排列）"""
+    parts = []
+    # 单一子节点的链直接拼接，避免深层递归
+    while len(node) == 1 and _END not in node:
+        (char, node), = node.items()
+        parts.append(re.escape(char))
+
+    alts = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char != _END]
+    if alts:
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if _END in node:
+            # 贪婪的可选分支：同一位置优先匹配更长的关键词
+            body = f"(?:{body})?" if len(alts) > 1 or len(alts[0]) > 1 else body + "?"
+        parts.append(body)
+    return "".join(parts)
+
+
+class KeywordMatcher:
+    """
+    多关键词匹配器
+
+    关键词共享前缀树，编译成一个正则后由 re 模块在 C 层一次扫描完整行，
+    代价与关键词数量基本无关。finditer 在同一位置有多个关键词时取最长的一个
+    （最左最长，不重叠）；高亮需要每个关键词各自的全部命中（可以重叠、嵌套）
+    时用 finditer_each。
+
+    用法：
+        matcher = KeywordMatcher(["robot-01", "robot-02"], ignore_case=True)
+        matcher.search(line)                      # 是否包含任一关键词
+        for start, end, index in matcher.finditer(line): ...
+    """
+
+    def __init__(self, keywords: Iterable[str], ignore_case: bool = False):
+        """
+        初始化匹配器
+
+        Args:
+            keywords: 关键词（空串和重复项忽略，重复项保留第一个）
+            ignore_case: 是否忽略大小写
+        """
+        self.ignore_case = ignore_case
+        self.keywords: List[str] = []
+        self._index: Dict[str, int] = {}
+        root: dict = {}
+        for keyword in keywords:
+            key = keyword_key(keyword, ignore_case)
+            if not keyword or key in self._index:
+                continue
+            self._index[key] = len(self.keywords)
+            node = root
+            for char in key:
+                node = node.setdefault(char, {})
+            node[_END] = len(self.keywords)
+            self.keywords.append(keyword)
+
+        # 输出链接：以某个关键词为最长命中的位置上，同一路径上更短的关键词也命中
+        self._outputs: List[List[int]] = []
+        for keyword in self.keywords:
+            node, outputs = root, []
+            for char in keyword_key(keyword, ignore_case):
+                node = node[char]
+                if _END in node:
+                    outputs.append(node[_END])
+            self._outputs.append(outputs)
+        # 含非 ASCII 大小写字母的关键词：折叠与 re.IGNORECASE 不完全一致时逐个确认
+        self._verify = [
+            ignore_case and any(not c.isascii() and c.lower() != c.upper() for c in keyword)
+            for keyword in self.keywords
+        ]
+        self._keyword_regexes: Dict[int, "re.Pattern"] = {}
+
+        self.pattern = _trie_pattern(root) if self.keywords else None
+        flags = re.IGNORECASE if ignore_case else 0
+        self.regex: Optional["re.Pattern"] = re.compile(self.pattern, flags) if self.pattern else None
+        # 前瞻中的前缀树：在每个位置报告以它开头的最长关键词，不消耗字符
+        self._scan: Optional["re.Pattern"] = re.compile(f"(?=({self.pattern}))", flags) if self.pattern else None
+
+    def keyword_index(self, matched: str) -> int:
+        """匹配到的文本对应的关键词下标"""
+        index = self._index.get(keyword_key(matched, self.ignore_case))
+        if index is not None:
+            return index
+        # 折叠不一致的特殊大小写等价：逐个确认
+        return next(i for i in range(len(self.keywords)) if self._keyword_regex(i).fullmatch(matched))
+
+    def _keyword_regex(self, index: int) -> "re.Pattern":
+        """单个关键词的正则（按需编译）"""
+        regex = self._keyword_regexes.get(index)
+        if regex is None:
+            flags = re.IGNORECASE if self.ignore_case else 0
+            regex = self._keyword_regexes[index] = re.compile(re.escape(self.keywords[index]), flags)
+        return regex
+
+    def search(self, text: str) -> bool:
+        """文本是否包含任一关键词"""
+        return self.regex is not None and self.regex.search(text) is not None
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        查找全部关键词
+
+        Yields:
+            (起始位置, 结束位置, 关键词下标)
+        """
+        if self.regex is None:
+            return
+        for m in self.regex.finditer(text):
+            yield m.start(), m.end(), self.keyword_index(m.group())
+
+    def finditer_each(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        查找每个关键词各自的全部命中，与依次对每个关键词单独 re.finditer 的结果相同
+        （不同关键词的命中可以重叠或嵌套，同一关键词的命中互不重叠）
+
+        一次扫描：前瞻中的前缀树在每个位置给出以它开头的最长关键词，再沿输出链接
+        报告同一路径上更短的关键词，代价与关键词数量无关。
+
+        Returns:
+            [(起始位置, 结束位置, 关键词下标)]，按关键词下标排列，同一关键词按位置
+            排列（高亮时后面关键词的命中覆盖前面的）
+        """
+        if self._scan is None:
+            return []
+        hits = []
+        next_start: Dict[int, int] = {}  # 各关键词下一个命中允许的最小起始位置
+        outputs, verify, keywords = self._outputs, self._verify, self.keywords
+        for m in self._scan.finditer(text):
+            start = m.start()
+            longest = self.keyword_index(m.group(1))
+            for index in outputs[longest]:
+                if start < next_start.get(index, 0):
+                    continue
+                if index != longest and verify[index] and not self._keyword_regex(index).match(text, start):
+                    continue
+                end = start + len(keywords[index])
+                next_start[index] = end
+                hits.append((start, end, index))
+        hits.sort(key=itemgetter(2))
+        return hits
+
+    def __len__(self) -> int:
+        return len(self.keywords)
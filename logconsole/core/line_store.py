@@ -0,0 +1,421 @@
+"""
+行存储 - 基于 mmap 的行偏移索引，按需解码
+"""
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Iterator, Optional, Union
+
+
+def scan_newlines(buf: bytes, base: int, newline: bytes = b"\n") -> array:
+    """
+    扫描缓冲区中的换行符，返回每个换行符之后（即下一行起始）的绝对偏移
+
+    只按 \n 分行（\r\n 的 \r 在解码时去掉），与 wc -l 的计数方式一致；
+    \x0b、\x1c、\u2028 等不视为换行。
+
+    Args:
+        buf: 原始字节
+        base: buf 在文件中的起始偏移
+        newline: 编码后的换行符（UTF-16 为 2 字节，UTF-32 为 4 字节）
+
+    Returns:
+        64 位偏移数组
+    """
+    parts = buf.split(newline)
+    parts.pop()  # 最后一段之后没有换行符
+    width = len(newline)
+    offsets = array("Q", accumulate((len(p) + width for p in parts), initial=base))[1:]
+    if width > 1:
+        # 多字节换行符不会自身重叠，split 能找到所有出现位置；
+        # 只保留按码元对齐的（如 UTF-16 中 U+0A41 U+0100 会在奇数偏移处拼出 0A 00）
+        offsets = array("Q", (o for o in offsets if o % width == 0))
+    return offsets
+
+
+def encoded_newline(encoding: str) -> Optional[bytes]:
+    """
+    编码后的换行符；编码不支持按字节分行时返回 None
+
+    要求换行符为 1 / 2 / 4 字节、且与前后字符的编码互不影响
+    （排除带 BOM 的 utf-16 / utf-32 和 utf-7 等有状态编码）。
+    """
+    try:
+        newline = "\n".encode(encoding)
+        if len(newline) in (1, 2, 4) and "a\n".encode(encoding) == "a".encode(encoding) + newline:
+            return newline
+    except (LookupError, UnicodeError):
+        pass
+    return None
+
+
+class LineStore:
+    """
+    基于 mmap 的只读行存储
+
+    offsets 保存每行的起始字节偏移（每行一个 64 位整数），并在末尾附加一个
+    哨兵偏移：第 i 行的字节范围为 [offsets[i], offsets[i+1])。
+    行内容只在访问时解码，支持 len()、下标、切片和迭代，可直接替代 List[str]。
+    """
+
+    follow_supported = True  # 是否支持 extend()（跟随模式）
+
+    def __init__(self, file_path: str, encoding: str = "utf-8", data_start: int = 0):
+        """
+        初始化行存储
+
+        Args:
+            file_path: 文件路径
+            encoding: 行解码使用的编码
+            data_start: 数据起始偏移（跳过 BOM）
+        """
+        self.file_path = file_path
+        self.encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+        self.newline = encoded_newline(self.encoding) or b"\n"
+        self.unit = len(self.newline)  # 码元宽度，多字节编码的换行符必须按它对齐
+        self._cr = "\r".encode(self.encoding) if self.unit > 1 else b"\r"
+        self.data_start = data_start
+        self.offsets = array("Q", [data_start])
+        self.size = 0  # 当前映射的文件大小
+        self.indexed_end = data_start  # 已建立索引的字节位置
+        self.partial_tail = False  # 末行没有换行符，offsets 末尾是补上的哨兵
+        self.complete = False  # 索引是否已建立完成（加载期间可边建边读）
+        self.line_density = 0.0  # 采样得到的每字节行数，用于估算总行数
+        self.trigram_index = None  # 后台建立的 TrigramIndex，搜索时用来跳过不可能匹配的块
+        self._file = None
+        self._mm = None
+        self._cond = threading.Condition()
+
+    def open(self):
+        """打开文件并建立内存映射"""
+        self._file = open(self.file_path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size > 0:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """关闭内存映射和文件"""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_bytes(self, start: int, end: int) -> bytes:
+        """读取 [start, end) 范围的原始字节"""
+        if self._mm is None:
+            return b""
+        return self._mm[start:end]
+
+    def find(self, sub: bytes, start: int, end: int) -> int:
+        """在 [start, end) 范围内查找字节串，未找到返回 -1"""
+        if self._mm is None:
+            return -1
+        return self._mm.find(sub, start, end)
+
+    def find_newline(self, start: int, end: int) -> int:
+        """
+        查找 [start, end) 内第一个按码元对齐的换行符
+
+        Returns:
+            换行符之后的偏移（下一行起始），未找到返回 -1
+        """
+        start += -start % self.unit
+        while True:
+            pos = self.find(self.newline, start, end)
+            if pos < 0 or pos % self.unit == 0:
+                return pos if pos < 0 else pos + self.unit
+            start = pos + 1
+
+    def align(self, pos: int) -> int:
+        """把偏移向下对齐到码元边界"""
+        return pos - pos % self.unit
+
+    def add_newlines(self, offsets: array):
+        """追加索引：每个元素为某个换行符之后的下一行起始偏移"""
+        with self._cond:
+            self.offsets.extend(offsets)
+            self._cond.notify_all()
+
+    def finish(self, end: Optional[int] = None):
+        """
+        索引结束：为末尾没有换行符的最后一行补上哨兵
+
+        Args:
+            end: 已索引到的字节位置（默认文件末尾）
+        """
+        end = self.size if end is None else end
+        with self._cond:
+            self.partial_tail = self.offsets[-1] < end
+            if self.partial_tail:
+                self.offsets.append(end)
+            self.indexed_end = end
+            self.complete = True
+            self._cond.notify_all()
+
+    def extend(self, max_bytes: Optional[int] = None) -> Optional[int]:
+        """
+        文件增长后重新映射并索引新增字节（跟随模式）
+
+        旧的映射不主动关闭，仍在读取它的线程用完后随引用释放。
+
+        Args:
+            max_bytes: 本次最多索引的字节数（None 表示全部）
+
+        Returns:
+            第一条内容有变化的行号（末行原先不完整时为末行），没有新数据返回 None
+        """
+        new_size = os.fstat(self._file.fileno()).st_size
+        start = self.indexed_end
+        if new_size <= start:
+            return None
+        end = self.align(new_size if max_bytes is None else min(new_size, start + max_bytes))
+        if end <= start:
+            return None  # 只写入了半个码元
+
+        if new_size != self.size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = new_size
+
+        first_changed = len(self) - 1 if self.partial_tail else len(self)
+        new_offsets = scan_newlines(self.read_bytes(start, end), start, self.newline)
+        with self._cond:
+            if self.partial_tail:
+                self._reopen_tail()
+            self.add_newlines(new_offsets)
+        self.finish(end)
+        return first_changed
+
+    def _reopen_tail(self):
+        """去掉末行哨兵，末行可以继续增长"""
+        self.offsets.pop()
+        self.partial_tail = False
+
+    def wait_for_lines(self, count: int, timeout: Optional[float] = None) -> bool:
+        """
+        等待索引覆盖前 count 行（或索引完成）
+
+        Args:
+            count: 需要的行数
+            timeout: 超时秒数（None 表示一直等待）
+
+        Returns:
+            前 count 行是否已可读
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self) >= count or self.complete, timeout)
+            return len(self) >= count
+
+    def newline_offsets(self) -> array:
+        """不含末行哨兵的偏移，可从文件末尾继续追加索引"""
+        return self.offsets[:-1] if self.partial_tail else self.offsets
+
+    def indexed_offset(self) -> int:
+        """已建立索引的字节位置（最后一个换行符之后）"""
+        return self.offsets[-1]
+
+    def sample_line_density(self, samples: int = 8, sample_size: int = 64 * 1024) -> float:
+        """
+        在文件中均匀取若干段采样平均行长，不需要扫描全文
+
+        Args:
+            samples: 采样段数
+            sample_size: 每段字节数
+
+        Returns:
+            每字节行数（同时保存到 line_density）
+        """
+        span = self.size - self.data_start
+        if span <= 0:
+            return 0.0
+        if span <= samples * sample_size:
+            positions = [self.data_start]
+            sample_size = span
+        else:
+            step = (span - sample_size) // (samples - 1)
+            positions = [self.data_start + i * step for i in range(samples)]
+
+        newlines = sampled = 0
+        for pos in positions:
+            data = self.read_bytes(pos, pos + sample_size)
+            newlines += data.count(self.newline)
+            sampled += len(data)
+        # 没有换行符的采样至少算一行，避免估算为 0
+        self.line_density = max(newlines, 1) / max(sampled, 1)
+        return self.line_density
+
+    def estimated_total_lines(self) -> int:
+        """总行数：索引完成时为精确值，否则为已索引行数 + 未索引字节按采样密度估算"""
+        count = len(self)
+        if self.complete:
+            return count
+        remaining = max(0, self.size - self.indexed_offset())
+        return count + int(remaining * self.line_density)
+
+    def next_line_start(self, offset: int) -> int:
+        """不依赖索引，offset 处或之后的第一个行首；没有时返回 -1"""
+        offset = max(self.data_start, offset)
+        if offset == self.data_start:
+            return offset
+        return self.find_newline(offset - self.unit, self.size)
+
+    def offset_for_fraction(self, fraction: float) -> int:
+        """文件中按比例（0.0 ~ 1.0）定位的字节位置对齐到行首；没有后续行时返回 -1"""
+        fraction = min(max(fraction, 0.0), 1.0)
+        return self.next_line_start(self.data_start + int((self.size - self.data_start) * fraction))
+
+    def tail_offset(self, count: int) -> int:
+        """
+        不依赖索引，从文件末尾向前扫描换行符，返回倒数第 count 行的行首
+
+        从 64KB 的窗口开始，不够 count 行时窗口扩大 4 倍，
+        只读取文件末尾需要的部分。
+
+        Args:
+            count: 行数
+
+        Returns:
+            行首偏移（文件不足 count 行时为数据起始位置）
+        """
+        end = self.size
+        # 末尾的换行符只结束最后一行，不开始新的一行
+        if end - self.unit >= self.data_start and self.read_bytes(end - self.unit, end) == self.newline:
+            end -= self.unit
+        window = 64 * 1024
+        while True:
+            start = self.align(max(self.data_start, end - window))
+            offsets = scan_newlines(self.read_bytes(start, end), start, self.newline)
+            if len(offsets) >= count:
+                return offsets[-count]
+            if start <= self.data_start:
+                return self.data_start
+            window *= 4
+
+    def read_lines_at(self, offset: int, count: int) -> List[str]:
+        """
+        不依赖索引，从 offset 之后的第一个行首开始读取 count 行
+        （offset 本身是行首时从 offset 开始）
+
+        Args:
+            offset: 字节偏移
+            count: 行数
+
+        Returns:
+            行内容列表（到文件末尾时可能不足 count 行）
+        """
+        start = self.next_line_start(offset)
+        if start < 0:
+            return []
+
+        window = 64 * 1024
+        while True:
+            end = min(start + window, self.size)
+            raw = self.read_bytes(start, end)
+            offsets = scan_newlines(raw, 0, self.newline)
+            if len(offsets) >= count or end >= self.size:
+                break
+            window *= 4
+
+        if len(offsets) >= count:
+            raw = raw[:offsets[count - 1]]
+        if not raw:
+            return []
+        if raw.endswith(self.newline):
+            raw = raw[:-self.unit]
+        text = raw.decode(self.encoding, errors="replace")
+        return [line[:-1] if line.endswith("\r") else line for line in text.split("\n")]
+
+    def line_offset(self, line_number: int) -> int:
+        """第 line_number 行的起始字节偏移（line_number == len(self) 时为结束位置）"""
+        return self.offsets[line_number]
+
+    def line_at_offset(self, pos: int) -> int:
+        """包含字节偏移 pos 的行号（超出范围时取最近的行）"""
+        return min(max(0, bisect_right(self.offsets, pos) - 1), max(0, len(self) - 1))
+
+    def _decode(self, raw: bytes) -> str:
+        """解码单行（去掉行尾的 \\n 和 \\r）"""
+        if raw.endswith(self.newline):
+            raw = raw[:-self.unit]
+        if raw.endswith(self._cr):
+            raw = raw[:-self.unit]
+        return raw.decode(self.encoding, errors="replace")
+
+    def get_line(self, line_number: int) -> str:
+        """获取单行内容（0-based，调用方负责范围检查）"""
+        return self._decode(self.read_bytes(self.offsets[line_number], self.offsets[line_number + 1]))
+
+    def get_lines(self, start: int, end: int) -> List[str]:
+        """获取 [start, end) 范围的行，一次读取整个区间后再切分"""
+        start = max(0, start)
+        end = min(len(self), end)
+        if start >= end:
+            return []
+        raw = self.read_bytes(self.offsets[start], self.offsets[end])
+        if raw.endswith(self.newline):
+            raw = raw[:-self.unit]
+        text = raw.decode(self.encoding, errors="replace")
+        return [line[:-1] if line.endswith("\r") else line for line in text.split("\n")]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self.get_line(i) for i in range(start, stop, step)]
+            return self.get_lines(start, stop)
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("line index out of range")
+        return self.get_line(index)
+
+    def __iter__(self) -> Iterator[str]:
+        batch = 4096
+        for start in range(0, len(self), batch):
+            yield from self.get_lines(start, start + batch)
+
+
+class LineSubset:
+    """
+    行存储中选中的若干行（如 Grep 结果），只保存原行号，行内容按需从原行存储读取
+
+    支持 len()、下标、切片和迭代，可直接替代 List[str]；第 i 行对应原行存储的
+    第 line_numbers[i] 行。
+    """
+
+    def __init__(self, source, line_numbers):
+        """
+        初始化行子集
+
+        Args:
+            source: 原行存储（LineStore 或 List[str]）
+            line_numbers: 选中的行号（0-based，递增）
+        """
+        self.source = source
+        self.line_numbers = array("Q", line_numbers)
+
+    def source_line(self, index: int) -> int:
+        """第 index 行在原行存储中的行号"""
+        return self.line_numbers[index]
+
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            source = self.source
+            return [source[i] for i in self.line_numbers[index]]
+        return self.source[self.line_numbers[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        source = self.source
+        for i in self.line_numbers:
+            yield source[i]
@@ -0,0 +1,173 @@
+"""
+字面量搜索 - 在整块文本上用 str.find 查找，再按换行符把命中位置换算成 (行号, 列)
+"""
+import re
+from typing import List, Optional, Sequence
+
+from .match_list import MatchList
+from .regex_literals import case_safe_segments, regex_prefilter
+
+
+def literal_supported(needle: str) -> bool:
+    """字面量快速路径要求查找串不含换行符（行内容本身不含换行符）"""
+    return "\n" not in needle and "\r" not in needle
+
+
+def casefold_safe(needle: str) -> bool:
+    """
+    忽略大小写时能否在 lower() 副本上查找 needle（结果与 re.IGNORECASE 相同）
+
+    needle 的每个字符都须满足 case_safe_segments 的条件：大小写变体全在 ASCII 内
+    （不含 i/k/s，它们另有 "İ"、"K"、"ſ" 等变体），或没有大小写；σ/ς/Σ 等有多个
+    小写形式的字符只能交给正则。
+    """
+    return case_safe_segments([needle], True) == [needle]
+
+
+def find_literal(
+    text: str,
+    needle: str,
+    first_line: int = 0,
+    ignore_case: bool = False
+) -> Optional[MatchList]:
+    """
+    在以 \\n 连接的多行文本中查找字面量（不重叠，与 re.finditer 相同）
+
+    忽略大小写时在小写副本上查找；needle 不满足 casefold_safe 或小写后长度变化
+    （如 "İ"）的文本列号无法对应，返回 None 由调用方改用正则；平均每行不止一个命中时逐命中换算
+    行号反而比逐行正则慢，同样返回 None。
+
+    Args:
+        text: 以 \\n 连接的多行文本
+        needle: 查找串（不含换行符）
+        first_line: text 第一行的行号
+        ignore_case: 是否忽略大小写
+
+    Returns:
+        匹配结果，无法处理时返回 None
+    """
+    if ignore_case:
+        if not casefold_safe(needle):
+            return None
+        folded, folded_needle = text.lower(), needle.lower()
+        if len(folded) != len(text) or len(folded_needle) != len(needle):
+            return None
+        text, needle = folded, folded_needle
+
+    matches = MatchList()
+    hits = text.count(needle)
+    if hits == 0:
+        return matches
+    if hits > text.count("\n") + 1:
+        return None
+
+    # 直接写入各列，不为每个命中创建元组
+    add_line, add_start, add_end = matches.lines.append, matches.starts.append, matches.ends.append
+    find, rfind, count = text.find, text.rfind, text.count
+    width = len(needle)
+    line = first_line
+    line_start = 0
+    scanned = 0  # 上一个命中的结束位置，之前的换行符都已统计
+    pos = find(needle)
+    while pos >= 0:
+        # 与上一个命中不在同一行时才统计中间的换行符
+        last_newline = rfind("\n", scanned, pos)
+        if last_newline >= 0:
+            line += count("\n", scanned, last_newline + 1)
+            line_start = last_newline + 1
+        column = pos - line_start
+        add_line(line)
+        add_start(column)
+        add_end(column + width)
+        scanned = pos + width
+        pos = find(needle, scanned)
+    return matches
+
+
+def candidate_lines(text: str, needle: str) -> List[int]:
+    """
+    包含 needle 的行（相对 text 第一行的下标，升序不重复）
+
+    Args:
+        text: 以 \\n 连接的多行文本
+        needle: 预筛选串（不含换行符）
+    """
+    found = []
+    find, count = text.find, text.count
+    line = 0
+    scanned = 0
+    pos = find(needle)
+    while pos >= 0:
+        line += count("\n", scanned, pos)
+        found.append(line)
+        # 同一行的其余命中不需要再找，直接跳到下一行
+        scanned = find("\n", pos + len(needle))
+        if scanned < 0:
+            break
+        pos = find(needle, scanned + 1)
+    return found
+
+
+def prefilter_lines(lines: Sequence[str], regex: "re.Pattern") -> Optional[List[int]]:
+    """
+    用正则的必需字面量整块查找，筛出可能匹配的行
+
+    Returns:
+        候选行下标（升序）；正则没有必需字面量、行内含换行符或候选行过半
+        （筛选不划算）时返回 None，表示逐行检查全部行
+    """
+    prefilter = regex_prefilter(regex.pattern, regex.flags)
+    if prefilter is None or not lines:
+        return None
+    text = "\n".join(lines)
+    # 行内含换行符时行号无法对应
+    if text.count("\n") != len(lines) - 1:
+        return None
+    needles, ignore_case = prefilter
+    # lower() 可能改变长度，但不会增减换行符，行号换算不受影响
+    haystack = text.lower() if ignore_case else text
+    # 用本块中最少见的必需片段筛选
+    hits, needle = min((haystack.count(n), n) for n in needles)
+    if hits == 0:
+        return []
+    if hits > len(lines) // 2:
+        return None
+    return candidate_lines(haystack, needle)
+
+
+def search_block(
+    lines: Sequence[str],
+    first_line: int,
+    regex: "re.Pattern",
+    literal: Optional[str] = None
+) -> MatchList:
+    """
+    搜索一块连续的行：给出 literal 时整块查找；正则有必需字面量时先整块查找它，
+    只对包含它的行运行正则；否则（或无法整块处理时）逐行正则
+
+    Args:
+        lines: 行列表
+        first_line: 第一行的行号
+        regex: 编译好的正则（literal 的转义形式）
+        literal: 字面量查找串（None 表示正则搜索）
+    """
+    if literal is not None and lines:
+        text = "\n".join(lines)
+        # 行内含换行符时行号无法对应
+        if text.count("\n") == len(lines) - 1:
+            found = find_literal(text, literal, first_line, bool(regex.flags & re.IGNORECASE))
+            if found is not None:
+                return found
+
+    candidates = prefilter_lines(lines, regex) if literal is None else None
+    matches = MatchList()
+    if candidates is not None:
+        for index in candidates:
+            for match in regex.finditer(lines[index]):
+                matches.append(first_line + index, match.start(), match.end())
+        return matches
+
+    for line_num, line in enumerate(lines, first_line):
+        for match in regex.finditer(line):
+            matches.append(line_num, match.start(), match.end())
+    return matches
@@ -1,25 +1,79 @@
 """
 日志解析器 - 支持大文件分块读取和编码检测
 """
+import io
 import os
-from typing import List, Optional, Callable, Dict
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Callable, Dict, Sequence, Tuple
 import chardet
 
+from .cancellation import CancellationToken, OperationCancelled, check_cancelled
+from .line_store import LineStore, scan_newlines, encoded_newline
+from .sparse_line_store import SparseLineStore
+from .compressed_store import CompressedLineStore, detect_compression, open_decompressed
+from .index_cache import IndexCache, CachedIndex
+from .parallel_index import iter_parallel_index
+from .read_pipeline import BandwidthLimiter, BlockReader
+from .worker_pool import default_workers, reset_process_pool
+
+# 各编码的 BOM 长度（mmap 模式下跳过）
+BOM_LENGTHS = {"utf-8-sig": 3, "utf-16-le": 2, "utf-16-be": 2, "utf-32-le": 4, "utf-32-be": 4}
+
+# 首屏先扫描的字节数，扫描完即可开始显示
+FIRST_SCREEN_BYTES = 256 * 1024
+
+# 估算行数时从文件开头采样的字节数
+LINE_SAMPLE_BYTES = 64 * 1024
+
 
 class LogParser:
     """日志文件解析器，支持 GB 级文件"""
 
-    def __init__(self, chunk_size: int = 8 * 1024 * 1024):
+    def __init__(
+        self,
+        chunk_size: int = 8 * 1024 * 1024,
+        use_mmap: bool = True,
+        index_cache: Optional[IndexCache] = None,
+        workers: Optional[int] = None,
+        parallel_threshold: int = 64 * 1024 * 1024,
+        sparse: Optional[bool] = None,
+        index_memory_budget: int = 256 * 1024 * 1024,
+        sparse_block_lines: int = 1024,
+        read_bandwidth: Optional[int] = None,
+        drop_behind: bool = True,
+        prefetch_blocks: int = 2
+    ):
         """
         初始化日志解析器
 
         Args:
             chunk_size: 块大小（默认 8MB）
+            use_mmap: 是否使用 mmap 行索引（内存中只保留每行 8 字节偏移）
+            index_cache: 行索引磁盘缓存（None 表示不缓存）
+            workers: 并行建索引的进程数（默认 CPU 核数，1 表示单线程）
+            parallel_threshold: 待扫描字节数超过该值时才启用多进程
+            sparse: 是否使用稀疏索引（None 表示按估算的稠密索引大小和 index_memory_budget 自动选择）
+            index_memory_budget: 稠密索引（每行 8 字节）允许占用的内存上限
+            sparse_block_lines: 稀疏索引每隔多少行记录一个检查点
+            read_bandwidth: 建索引时的读取带宽上限（字节/秒，None 表示不限；限速时不启用多进程）
+            drop_behind: 建索引时扫描过的块是否提示内核丢弃页缓存
+            prefetch_blocks: 读线程预取的块数
         """
         self.chunk_size = chunk_size
-        self.lines: List[str] = []
+        self.use_mmap = use_mmap
+        self.index_cache = index_cache
+        self.workers = workers or default_workers()
+        self.parallel_threshold = parallel_threshold
+        self.sparse = sparse
+        self.index_memory_budget = index_memory_budget
+        self.sparse_block_lines = sparse_block_lines
+        self.read_bandwidth = read_bandwidth
+        self.drop_behind = drop_behind
+        self.prefetch_blocks = prefetch_blocks
+        self.lines: Sequence[str] = []
         self.encoding: str = "utf-8"
         self.file_path: Optional[str] = None
+        self.compression: Optional[str] = None  # gzip / bz2 / xz，未压缩为 None
 
     def detect_encoding(self, file_path: str) -> str:
         """
@@ -32,16 +86,37 @@ class LogParser:
             编码名称（utf-8, gbk 等）
         """
         with open(file_path, "rb") as f:
-            raw_data = f.read(32768)  # 读取 32KB 用于检测
+            compression = detect_compression(file_path)
+            if compression:
+                # 压缩文件：检测解压后的内容
+                with open_decompressed(f, compression) as df:
+                    raw_data = df.read(32768)
+            else:
+                raw_data = f.read(32768)  # 读取 32KB 用于检测
 
-        # 1. 检查 BOM
+        # 1. 检查 BOM（UTF-32 LE 的 BOM 以 UTF-16 LE 的 BOM 开头，需先判断）
         if raw_data.startswith(b'\xef\xbb\xbf'):
             return "utf-8-sig"
+        elif raw_data.startswith(b'\xff\xfe\x00\x00'):
+            return "utf-32-le"
+        elif raw_data.startswith(b'\x00\x00\xfe\xff'):
+            return "utf-32-be"
         elif raw_data.startswith(b'\xff\xfe'):
             return "utf-16-le"
         elif raw_data.startswith(b'\xfe\xff'):
             return "utf-16-be"
 
+        # 无 BOM 的 UTF-16：ASCII 字符的高位字节为 0，且都落在同一奇偶位置
+        # （这类内容同时也是合法的 UTF-8，必须在 UTF-8 之前判断）
+        half = len(raw_data) // 2
+        if half:
+            even_zeros = raw_data[0::2].count(0)
+            odd_zeros = raw_data[1::2].count(0)
+            if odd_zeros > half * 0.3 and even_zeros < half * 0.05:
+                return "utf-16-le"
+            if even_zeros > half * 0.3 and odd_zeros < half * 0.05:
+                return "utf-16-be"
+
         # 2. 优先尝试 UTF-8（最常见）
         try:
             raw_data.decode("utf-8")
@@ -69,7 +144,10 @@ class LogParser:
     def load(
         self,
         file_path: str,
-        on_progress: Optional[Callable[[int, int], None]] = None
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        on_ready: Optional[Callable[[LineStore], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        open_at_tail: bool = False
     ) -> Dict[str, any]:
         """
         加载日志文件
@@ -77,49 +155,276 @@ class LogParser:
         Args:
             file_path: 文件路径
             on_progress: 进度回调函数 (bytes_read, total_bytes)
+            on_ready: 首屏行索引建立后立即回调 (line_store)，之后索引继续在当前线程中增长
+                      （仅 mmap 模式）
+            cancel_token: 取消令牌，每个块之后检查一次
+            open_at_tail: 打开文件后立即回调 on_ready，不等首屏扫描；调用方用
+                          LineStore.tail_offset() 直接显示文件末尾，完整索引继续建立
 
         Returns:
-            包含 lines, encoding, line_count 的字典
+            包含 lines, encoding, line_count, file_size（压缩文件为解压后的大小）的字典
+
+        Raises:
+            OperationCancelled: 加载被取消（已打开的文件和映射已释放）
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
 
         self.file_path = file_path
-        self.encoding = self.detect_encoding(file_path)
-        self.lines = []
+        self.close()
+        self.compression = detect_compression(file_path)
 
-        file_size = os.path.getsize(file_path)
-        bytes_read = 0
-
-        with open(file_path, "r", encoding=self.encoding, errors="replace") as f:
-            while True:
-                chunk = f.read(self.chunk_size)
-                if not chunk:
-                    break
+        # 命中缓存时直接复用缓存的编码和行索引（稀疏索引不缓存）
+        use_sparse = self.use_mmap and not self.compression and self._use_sparse_index(file_path)
+        use_cache = self.index_cache and self.use_mmap and not self.compression and not use_sparse
+        cached = self.index_cache.lookup(file_path) if use_cache else None
+        self.encoding = cached.encoding if cached else self.detect_encoding(file_path)
 
-                # 按行分割
-                chunk_lines = chunk.splitlines()
-                self.lines.extend(chunk_lines)
+        file_size = os.path.getsize(file_path)
+        data_size = file_size
 
-                # 更新进度
-                bytes_read = f.tell()
-                if on_progress:
-                    on_progress(bytes_read, file_size)
+        byte_lines = self.use_mmap and encoded_newline(self.encoding) is not None
+        if self.compression and byte_lines:
+            self.lines = self._build_compressed_store(file_path, file_size, on_progress, on_ready, cancel_token)
+            data_size = self.lines.size
+        elif byte_lines:
+            self.lines = self._build_line_store(
+                file_path, file_size, on_progress, cached, on_ready, cancel_token, use_sparse, open_at_tail
+            )
+            if use_cache and not (cached and cached.complete):
+                self.index_cache.save(self.lines)
+        else:
+            self.lines, data_size = self._read_lines(file_path, file_size, on_progress, cancel_token)
 
         return {
             "lines": self.lines,
             "encoding": self.encoding,
             "line_count": len(self.lines),
-            "file_size": file_size
+            "file_size": data_size
         }
 
+    def estimate_line_count(self, file_path: str) -> int:
+        """
+        在文件中均匀采样估算总行数（毫秒级，不扫描全文）
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            估算的行数（压缩文件返回 0）
+        """
+        if detect_compression(file_path):
+            return 0
+        encoding = self.detect_encoding(file_path)
+        store = LineStore(file_path, encoding, BOM_LENGTHS.get(encoding, 0))
+        store.open()
+        try:
+            return store.estimated_total_lines() if store.sample_line_density() else 0
+        finally:
+            store.close()
+
+    def _use_sparse_index(self, file_path: str) -> bool:
+        """
+        是否使用稀疏索引：按文件开头的平均行长估算行数，
+        稠密索引（每行 8 字节）超出内存预算时使用稀疏索引
+        """
+        if self.sparse is not None:
+            return self.sparse
+        file_size = os.path.getsize(file_path)
+        if file_size * 8 <= self.index_memory_budget:
+            return False  # 每行至少 1 字节，稠密索引不会超过文件大小的 8 倍
+        with open(file_path, "rb") as f:
+            sample = f.read(LINE_SAMPLE_BYTES)
+        estimated_lines = file_size * (sample.count(b"\n") + 1) / max(1, len(sample))
+        return estimated_lines * 8 > self.index_memory_budget
+
+    def _build_line_store(
+        self,
+        file_path: str,
+        file_size: int,
+        on_progress: Optional[Callable[[int, int], None]],
+        cached: Optional[CachedIndex] = None,
+        on_ready: Optional[Callable[[LineStore], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        sparse: bool = False,
+        open_at_tail: bool = False
+    ) -> LineStore:
+        """
+        扫描换行符建立 mmap 行索引（有缓存时只扫描缓存之后新增的字节）
+
+        只处理原始字节，不解码；多字节编码（UTF-16/32）的分块边界按码元对齐。
+        """
+        if cached:
+            store = LineStore(file_path, self.encoding, cached.data_start)
+            store.offsets = cached.offsets
+            pos = cached.indexed_size
+        elif sparse:
+            store = SparseLineStore(
+                file_path, self.encoding, BOM_LENGTHS.get(self.encoding, 0), self.sparse_block_lines
+            )
+            pos = store.data_start
+        else:
+            store = LineStore(file_path, self.encoding, BOM_LENGTHS.get(self.encoding, 0))
+            pos = store.data_start
+        store.open()
+        if pos < store.size:
+            # 先采样估算总行数，滚动条在索引完成前就有合理的范围
+            store.sample_line_density()
+        if open_at_tail and on_ready:
+            # 末尾内容不依赖索引，立即可以显示
+            on_ready(store)
+            on_ready = None
+        try:
+            self._index_line_store(store, pos, file_size, on_progress, on_ready, cancel_token)
+        except OperationCancelled:
+            store.close()
+            raise
+        return store
+
+    def _index_line_store(
+        self,
+        store: LineStore,
+        pos: int,
+        file_size: int,
+        on_progress: Optional[Callable[[int, int], None]],
+        on_ready: Optional[Callable[[LineStore], None]],
+        cancel_token: Optional[CancellationToken]
+    ):
+        """从 pos 开始扫描到文件末尾（首屏 → 多进程 → 单线程读取流水线）"""
+        if on_progress and pos >= store.size:
+            on_progress(store.size, file_size)
+
+        newline = store.newline
+        step = store.align(self.chunk_size) or store.unit
+
+        # 先扫描开头一小段，首屏内容可以立即显示
+        if pos < store.size:
+            end = min(pos + (store.align(FIRST_SCREEN_BYTES) or store.unit), store.size)
+            store.add_newlines(scan_newlines(store.read_bytes(pos, end), pos, newline))
+            pos = end
+            if on_progress:
+                on_progress(pos, file_size)
+        if on_ready:
+            on_ready(store)
+        check_cancelled(cancel_token)
+
+        if (self.workers > 1 and not self.read_bandwidth
+                and store.size - pos > self.parallel_threshold):
+            # 多进程：各段结果按文件顺序合并；进程池异常时从已完成位置继续单线程扫描
+            try:
+                for range_end, offsets in iter_parallel_index(
+                    store, pos, store.size, step, self.workers, self.drop_behind
+                ):
+                    store.add_newlines(offsets)
+                    pos = range_end
+                    if on_progress:
+                        on_progress(range_end, file_size)
+                    check_cancelled(cancel_token)
+            except BrokenProcessPool:
+                reset_process_pool()
+
+        # 读线程预取下一块，与本线程扫描换行符重叠
+        limiter = BandwidthLimiter(self.read_bandwidth) if self.read_bandwidth else None
+        reader = BlockReader(
+            store.file_path, pos, store.size, step, self.prefetch_blocks, limiter, self.drop_behind
+        )
+        for block_start, data in reader:
+            store.add_newlines(scan_newlines(data, block_start, newline))
+            pos = block_start + len(data)
+            if on_progress:
+                on_progress(pos, file_size)
+            check_cancelled(cancel_token)
+
+        store.finish()
+
+    def _build_compressed_store(
+        self,
+        file_path: str,
+        file_size: int,
+        on_progress: Optional[Callable[[int, int], None]],
+        on_ready: Optional[Callable[[LineStore], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> CompressedLineStore:
+        """流式解压一遍，建立行索引和解压检查点（进度按压缩字节计算）"""
+        store = CompressedLineStore(
+            file_path, self.compression, self.encoding, BOM_LENGTHS.get(self.encoding, 0)
+        )
+        store.open()
+
+        # 多字节换行符可能跨两段解压数据，带上上一段末尾不足一个换行符的字节一起扫描
+        carry = b""
+        try:
+            for comp_pos, base, data in store.stream():
+                store.add_newlines(scan_newlines(carry + data, base - len(carry), store.newline))
+                carry = (carry + data)[1 - store.unit:] if store.unit > 1 else b""
+                if on_progress:
+                    on_progress(comp_pos, file_size)
+                if on_ready and base + len(data) >= FIRST_SCREEN_BYTES:
+                    on_ready(store)
+                    on_ready = None
+                check_cancelled(cancel_token)
+        except OperationCancelled:
+            store.close()
+            raise
+
+        if on_ready:
+            on_ready(store)
+        store.finish()
+        return store
+
+    def _read_lines(
+        self,
+        file_path: str,
+        file_size: int,
+        on_progress: Optional[Callable[[int, int], None]],
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Tuple[List[str], int]:
+        """
+        内存模式：解码全部内容为 List[str]（与 mmap 模式一样只按 \\n / \\r\\n 分行）
+
+        Returns:
+            (行列表, 解压后的字节数)
+        """
+        lines: List[str] = []
+        pending = ""  # 块末尾尚未结束的行
+        with open(file_path, "rb") as raw:
+            binary = open_decompressed(raw, self.compression) if self.compression else raw
+            with io.TextIOWrapper(binary, encoding=self.encoding, errors="replace", newline="") as f:
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+
+                    # 按行分割
+                    parts = (pending + chunk).split("\n")
+                    pending = parts.pop()
+                    lines.extend(line[:-1] if line.endswith("\r") else line for line in parts)
+
+                    # 更新进度（按原始文件字节）
+                    if on_progress:
+                        on_progress(raw.tell(), file_size)
+                    check_cancelled(cancel_token)
+                data_size = binary.tell()
+
+        if pending:
+            lines.append(pending[:-1] if pending.endswith("\r") else pending)
+        if lines and lines[0].startswith("\ufeff"):
+            lines[0] = lines[0][1:]
+        return lines, data_size
+
+    def close(self):
+        """释放当前文件的行存储"""
+        if isinstance(self.lines, LineStore):
+            self.lines.close()
+        self.lines = []
+
     def get_line_count(self) -> int:
         """获取总行数"""
         return len(self.lines)
 
     def get_lines(self, start: int, end: int) -> List[str]:
         """
-        获取指定范围的行
+        获取指定范围的行（mmap 模式下按需解码）
 
         Args:
             start: 起始行号（从 0 开始）
@@ -130,7 +435,7 @@ class LogParser:
         """
         start = max(0, start)
         end = min(len(self.lines), end)
-        return self.lines[start:end]
+        return list(self.lines[start:end])
 
     def get_line(self, line_number: int) -> Optional[str]:
         """
@@ -0,0 +1,92 @@
+"""
+匹配结果列存储 - 行号 / 起始 / 结束三列分别存入类型化数组，每个匹配 16 字节
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Tuple, Union
+
+Match = Tuple[int, int, int]
+
+
+class MatchList:
+    """
+    按行号递增排列的匹配结果
+
+    行号存入 array('Q')，起止列存入 array('I')，不为每个匹配创建 Python 对象；
+    下标访问时才组装 (行号, 起始位置, 结束位置) 元组，可直接替代 List[Tuple[int, int, int]]。
+    """
+
+    def __init__(self, matches: Iterable[Match] = ()):
+        self.lines = array("Q")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.extend(matches)
+
+    def append(self, line: int, start: int, end: int):
+        """追加一个匹配"""
+        self.lines.append(line)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def extend(self, matches: Union["MatchList", Iterable[Match]]):
+        """追加一批匹配（MatchList 按列整段复制）"""
+        if isinstance(matches, MatchList):
+            self.lines.extend(matches.lines)
+            self.starts.extend(matches.starts)
+            self.ends.extend(matches.ends)
+            return
+        for line, start, end in matches:
+            self.append(line, start, end)
+
+    def memory_usage(self) -> int:
+        """三列占用的字节数"""
+        return sum(col.itemsize * len(col) for col in (self.lines, self.starts, self.ends))
+
+    def index_at_line(self, line: int) -> int:
+        """第一个行号 >= line 的匹配下标（没有时为 len(self)）"""
+        return bisect_left(self.lines, line)
+
+    def line_range(self, line: int) -> Tuple[int, int]:
+        """第 line 行的匹配下标范围 [first, last)"""
+        return bisect_left(self.lines, line), bisect_right(self.lines, line)
+
+    def line_groups(self) -> Iterator[Tuple[int, int, int]]:
+        """
+        按行分组
+
+        Yields:
+            (行号, 该行第一个匹配的下标, 该行最后一个匹配之后的下标)
+        """
+        lines = self.lines
+        total = len(lines)
+        first = 0
+        while first < total:
+            line = lines[first]
+            last = first + 1
+            while last < total and lines[last] == line:
+                last += 1
+            yield line, first, last
+            first = last
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Match, List[Match]]:
+        if isinstance(index, slice):
+            return list(zip(self.lines[index], self.starts[index], self.ends[index]))
+        return self.lines[index], self.starts[index], self.ends[index]
+
+    def __iter__(self) -> Iterator[Match]:
+        return zip(self.lines, self.starts, self.ends)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, MatchList):
+            return (self.lines == other.lines and self.starts == other.starts
+                    and self.ends == other.ends)
+        try:
+            return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MatchList({len(self)} matches)"
@@ -0,0 +1,90 @@
+"""
+并行行索引 - 按换行符对齐的字节区间分给进程池扫描，按顺序合并结果
+"""
+from array import array
+from typing import Iterator, List, Tuple
+
+from .line_store import scan_newlines
+from .read_pipeline import BlockReader
+from .worker_pool import get_process_pool
+
+# 每个任务扫描的最小字节数，避免任务过碎导致进程间通信开销占主导
+MIN_RANGE_SIZE = 16 * 1024 * 1024
+
+
+def index_range(
+    file_path: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    newline: bytes = b"\n",
+    drop_behind: bool = True
+) -> bytes:
+    """
+    工作进程：扫描 [start, end) 范围内的换行符（chunk_size 需按码元对齐）
+
+    Returns:
+        下一行起始偏移数组的原始字节（array('Q').tobytes()）
+    """
+    offsets = array("Q")
+    for pos, data in BlockReader(file_path, start, end, chunk_size, drop_behind=drop_behind):
+        offsets.extend(scan_newlines(data, pos, newline))
+    return offsets.tobytes()
+
+
+def split_ranges(store, start: int, end: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    把 [start, end) 切成约 parts 段，每段边界对齐到换行符之后
+
+    Args:
+        store: 已打开的 LineStore
+        start: 起始偏移
+        end: 结束偏移
+        parts: 期望段数
+    """
+    step = max(MIN_RANGE_SIZE, (end - start) // max(1, parts))
+    ranges = []
+    pos = start
+    while pos < end:
+        nominal = pos + step
+        if nominal >= end:
+            boundary = end
+        else:
+            next_line = store.find_newline(nominal, end)
+            boundary = end if next_line < 0 else next_line
+        ranges.append((pos, boundary))
+        pos = boundary
+    return ranges
+
+
+def iter_parallel_index(
+    store,
+    start: int,
+    end: int,
+    chunk_size: int,
+    workers: int,
+    drop_behind: bool = True
+) -> Iterator[Tuple[int, array]]:
+    """
+    并行扫描 [start, end)，按文件顺序逐段产出结果
+
+    Yields:
+        (已完成的字节位置, 该段的下一行起始偏移)
+    """
+    # 段数取工作进程数的 4 倍，慢段不会拖住整体
+    ranges = split_ranges(store, start, end, workers * 4)
+    pool = get_process_pool(workers)
+    futures = [
+        pool.submit(
+            index_range, store.file_path, range_start, range_end, chunk_size, store.newline, drop_behind
+        )
+        for range_start, range_end in ranges
+    ]
+    try:
+        for (range_start, range_end), future in zip(ranges, futures):
+            offsets = array("Q")
+            offsets.frombytes(future.result())
+            yield range_end, offsets
+    finally:
+        for future in futures:
+            future.cancel()
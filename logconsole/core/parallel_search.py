@@ -0,0 +1,157 @@
+"""
+并行搜索 - 按行号区间把 mmap 行存储切段，交给进程池扫描（或计数），按行号顺序合并结果
+"""
+import mmap
+import re
+from typing import Iterator, List, Optional, Tuple
+
+from .byte_search import byte_search_encoding, search_raw_block
+from .compressed_store import CompressedLineStore
+from .line_store import LineStore
+from .literal_search import search_block
+from .match_list import MatchList
+from .search_count import SearchCount, count_block
+from .worker_pool import get_process_pool
+
+# 每个任务扫描的最小字节数，避免任务过碎导致进程间通信开销占主导
+MIN_RANGE_SIZE = 4 * 1024 * 1024
+
+
+def supports_parallel_search(lines) -> bool:
+    """工作进程能否自行打开并切分该行存储（需要未压缩的文件行存储）"""
+    return isinstance(lines, LineStore) and not isinstance(lines, CompressedLineStore)
+
+
+def read_range(file_path: str, start: int, end: int) -> bytes:
+    """工作进程：读取 [start, end) 字节范围的原始字节"""
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[start:end]
+
+
+def read_range_lines(file_path: str, encoding: str, newline: bytes, start: int, end: int) -> List[str]:
+    """
+    工作进程：读取 [start, end) 字节范围内的各行（范围按行边界切分）
+
+    与 LineStore.get_lines 一样整段解码后按 \\n 分行、去掉行尾 \\r。
+    """
+    return decode_lines(read_range(file_path, start, end), encoding, newline)
+
+
+def decode_lines(raw: bytes, encoding: str, newline: bytes) -> List[str]:
+    """整段解码后按 \\n 分行、去掉行尾 \\r"""
+    if raw.endswith(newline):
+        raw = raw[:-len(newline)]
+    return [
+        line[:-1] if line.endswith("\r") else line
+        for line in raw.decode(encoding, errors="replace").split("\n")
+    ]
+
+
+def search_range(
+    file_path: str,
+    encoding: str,
+    newline: bytes,
+    start: int,
+    end: int,
+    first_line: int,
+    pattern: str,
+    flags: int,
+    literal: Optional[str] = None
+) -> MatchList:
+    """
+    工作进程：在 [start, end) 字节范围内的各行中搜索，结果的三列以数组形式传回主进程
+
+    编码可按字节筛选时先在原始字节上筛选，只解码候选行。
+    """
+    raw = read_range(file_path, start, end)
+    regex = re.compile(pattern, flags)
+    if byte_search_encoding(encoding):
+        found = search_raw_block(raw, first_line, regex, encoding)
+        if found is not None:
+            return found
+    return search_block(decode_lines(raw, encoding, newline), first_line, regex, literal)
+
+
+def count_range(
+    file_path: str,
+    encoding: str,
+    newline: bytes,
+    start: int,
+    end: int,
+    first_line: int,
+    pattern: str,
+    flags: int,
+    bucket_length: Optional[int] = None,
+    literal: Optional[str] = None
+) -> SearchCount:
+    """工作进程：统计 [start, end) 字节范围内各行的匹配，只传回计数"""
+    lines = read_range_lines(file_path, encoding, newline, start, end)
+    return count_block(lines, re.compile(pattern, flags), bucket_length, literal)
+
+
+def split_line_ranges(store: LineStore, parts: int) -> List[Tuple[int, int]]:
+    """
+    按行号把行存储切成约 parts 段，每段不小于 MIN_RANGE_SIZE 字节
+
+    Returns:
+        [(起始行, 结束行)]
+    """
+    total = len(store)
+    if total == 0:
+        return []
+    size = store.line_offset(total) - store.line_offset(0)
+    parts = max(1, min(parts, size // MIN_RANGE_SIZE))
+    bounds = [total * i // parts for i in range(parts + 1)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def iter_parallel_search(
+    store: LineStore,
+    regex: "re.Pattern",
+    workers: int,
+    literal: Optional[str] = None
+) -> Iterator[Tuple[int, MatchList]]:
+    """
+    并行搜索整个行存储，按行号顺序逐段产出结果（literal 不为 None 时走字面量快速路径）
+
+    Yields:
+        (该段的结束行号, 该段的匹配结果)
+    """
+    yield from _map_ranges(store, workers, search_range, regex.pattern, regex.flags, literal)
+
+
+def iter_parallel_count(
+    store: LineStore,
+    regex: "re.Pattern",
+    workers: int,
+    bucket_length: Optional[int] = None,
+    literal: Optional[str] = None
+) -> Iterator[Tuple[int, SearchCount]]:
+    """
+    并行统计整个行存储中的匹配，按行号顺序逐段产出计数（literal 不为 None 时整块 str.count）
+
+    Yields:
+        (该段的结束行号, 该段的计数)
+    """
+    yield from _map_ranges(store, workers, count_range, regex.pattern, regex.flags, bucket_length, literal)
+
+
+def _map_ranges(store: LineStore, workers: int, fn, *args) -> Iterator[Tuple[int, object]]:
+    """把行存储切段交给进程池执行 fn(文件, 编码, 换行符, 起始字节, 结束字节, 起始行, *args)"""
+    # 段数取工作进程数的 4 倍，慢段不会拖住整体
+    ranges = split_line_ranges(store, workers * 4)
+    pool = get_process_pool(workers)
+    futures = [
+        pool.submit(
+            fn, store.file_path, store.encoding, store.newline,
+            store.line_offset(first), store.line_offset(last), first, *args
+        )
+        for first, last in ranges
+    ]
+    try:
+        for (_, last), future in zip(ranges, futures):
+            yield last, future.result()
+    finally:
+        for future in futures:
+            future.cancel()
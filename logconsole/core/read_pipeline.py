@@ -0,0 +1,158 @@
+"""
+读取流水线 - 读线程预取下一块与解析重叠，posix_fadvise 顺序读 / 读后丢弃提示，可选带宽限制
+"""
+import os
+import queue
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+# 读线程结束标记
+_DONE = object()
+
+
+def fadvise(fd: int, offset: int, length: int, advice: str):
+    """
+    向内核发送 posix_fadvise 提示（不支持的平台上忽略）
+
+    Args:
+        fd: 文件描述符
+        offset: 起始偏移
+        length: 长度
+        advice: os 模块中的常量名，如 "POSIX_FADV_SEQUENTIAL"
+    """
+    value = getattr(os, advice, None)
+    if value is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, value)
+    except OSError:
+        pass
+
+
+class BandwidthLimiter:
+    """令牌桶限速：平均速率不超过 bytes_per_second，允许 burst 字节的突发"""
+
+    def __init__(self, bytes_per_second: int, burst: Optional[int] = None):
+        """
+        初始化限速器
+
+        Args:
+            bytes_per_second: 平均速率（字节/秒）
+            burst: 桶容量（默认 1 秒的量）
+        """
+        self.rate = bytes_per_second
+        self.capacity = burst if burst is not None else bytes_per_second
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size: int):
+        """取走 size 字节的令牌，不够时休眠到补足为止"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= size
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BlockReader:
+    """
+    双缓冲块读取器
+
+    读线程按顺序 pread 各块放入长度为 prefetch 的队列，调用方解析当前块时
+    下一块已在读取。打开时提示内核顺序读取（加大预读），调用方处理完一块后
+    提示内核丢弃该块的页缓存，扫描大文件时不挤占同机服务的工作集。
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        start: int,
+        end: int,
+        block_size: int,
+        prefetch: int = 2,
+        limiter: Optional[BandwidthLimiter] = None,
+        drop_behind: bool = True
+    ):
+        """
+        初始化块读取器
+
+        Args:
+            file_path: 文件路径
+            start: 起始偏移
+            end: 结束偏移（不含）
+            block_size: 块大小
+            prefetch: 预取的块数
+            limiter: 带宽限制（None 表示不限速）
+            drop_behind: 处理完的块是否提示内核丢弃页缓存
+        """
+        self.file_path = file_path
+        self.start = start
+        self.end = end
+        self.block_size = block_size
+        self.limiter = limiter
+        self.drop_behind = drop_behind
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, prefetch))
+        self._stop = threading.Event()
+
+    def _put(self, item) -> bool:
+        """放入队列；调用方已停止读取时放弃"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_loop(self, f):
+        """读线程：按顺序读取各块"""
+        try:
+            fd = f.fileno()
+            pos = self.start
+            while pos < self.end and not self._stop.is_set():
+                size = min(self.block_size, self.end - pos)
+                if self.limiter:
+                    self.limiter.consume(size)
+                if hasattr(os, "pread"):
+                    data = os.pread(fd, size, pos)
+                else:
+                    f.seek(pos)
+                    data = f.read(size)
+                if not data or not self._put((pos, data)):
+                    break
+                pos += len(data)
+        except Exception as e:
+            self._put(e)
+        finally:
+            self._put(_DONE)
+
+    def __iter__(self) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yields:
+            (块起始偏移, 块数据)
+        """
+        with open(self.file_path, "rb", buffering=0) as f:
+            fd = f.fileno()
+            fadvise(fd, self.start, self.end - self.start, "POSIX_FADV_SEQUENTIAL")
+            reader = threading.Thread(target=self._read_loop, args=(f,), daemon=True)
+            reader.start()
+            try:
+                while True:
+                    item = self._queue.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    pos, data = item
+                    yield pos, data
+                    if self.drop_behind:
+                        fadvise(fd, pos, len(data), "POSIX_FADV_DONTNEED")
+            finally:
+                # 调用方提前结束（取消 / 异常）时停止读线程，关闭文件前等它退出
+                self._stop.set()
+                reader.join()
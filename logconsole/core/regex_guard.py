@@ -0,0 +1,299 @@
+"""
+正则执行预算 - 识别可能灾难性回溯的正则（ReDoS），搜索时放到可强制终止的进程中
+按时间预算执行，高亮时限制每行长度并禁用超出预算的规则
+"""
+import re
+import time
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from .cancellation import CancellationToken, OperationCancelled
+from .literal_search import search_block
+from .match_list import MatchList
+from .worker_pool import get_guard_pool, terminate_guard_pool
+
+# 有回溯风险的正则每搜索一块（CANCEL_CHECK_LINES 行）允许的秒数
+SEARCH_BLOCK_BUDGET = 5.0
+
+# 高亮时每行只匹配前多少个字符
+HIGHLIGHT_MAX_LINE = 4096
+
+# 单条高亮规则在一行上允许的秒数
+HIGHLIGHT_RULE_BUDGET = 0.05
+
+_BACKTRACKING_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+_CATEGORY_PATTERNS = {
+    sre_constants.CATEGORY_DIGIT: r"\d",
+    sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+    sre_constants.CATEGORY_SPACE: r"\s",
+    sre_constants.CATEGORY_NOT_SPACE: r"\S",
+    sre_constants.CATEGORY_WORD: r"\w",
+    sre_constants.CATEGORY_NOT_WORD: r"\W",
+}
+
+
+class RegexBudgetExceeded(Exception):
+    """正则执行超出时间预算"""
+
+    def __init__(self, pattern: str, budget: float):
+        super().__init__(f"正则表达式执行超过 {budget:g} 秒，可能存在灾难性回溯，已停止：{pattern}")
+        self.pattern = pattern
+        self.budget = budget
+
+
+@lru_cache(maxsize=128)
+def backtracking_risk(pattern: str, flags: int = 0) -> bool:
+    """
+    正则是否可能灾难性回溯
+
+    检查嵌套的无界重复（如 (a+)+、(\\w+\\s?)*、(.*,)*）：外层重复的子模式中
+    还有可多次匹配的重复时，同一段文本有指数种切分方式。内层重复后紧跟它匹配
+    不了的字面量（如 (?:\\d+\\.)+）时切分唯一，不算风险。无界重复的子模式含
+    分支（如 (a|aa)*、(a|a)*，分支可能重叠）或捕获分组（如 (\\w|\\d)+，每轮
+    都走通用重复逻辑）时也算风险。这只是启发式检查，搜索时正则一律受限执行。
+    无法解析时返回 False（由 re 报告错误）。
+
+    Args:
+        pattern: 正则表达式
+        flags: 编译标志
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except (re.error, RecursionError, OverflowError):
+        return False
+    state = getattr(parsed, "state", None) or parsed.pattern  # Python < 3.11 为 pattern
+    return _nested_repeat(list(parsed), state.flags)
+
+
+def _children(op, av) -> List[list]:
+    """节点的子序列（分组、分支、断言）"""
+    if op is sre_constants.SUBPATTERN:
+        return [list(av[-1])]
+    if op is sre_constants.BRANCH:
+        return [list(alt) for alt in av[1]]
+    if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return [list(av[1])]
+    return []
+
+
+def _nested_repeat(items: list, flags: int) -> bool:
+    """序列中是否有无界重复套着未被隔开的重复"""
+    for op, av in items:
+        if op in _BACKTRACKING_REPEATS:
+            _, high, body = av
+            body = list(body)
+            # 重复到子模式末尾时，后面紧跟的是下一轮的开头
+            if high == sre_constants.MAXREPEAT and (
+                _branch_or_group(body) or _unseparated_repeat(body, flags, body[0] if body else None)
+            ):
+                return True
+            if _nested_repeat(body, flags):
+                return True
+        elif any(_nested_repeat(child, flags) for child in _children(op, av)):
+            return True
+    return False
+
+
+def _branch_or_group(items: list) -> bool:
+    """序列中是否有分支或捕获分组"""
+    for op, av in items:
+        if op is sre_constants.BRANCH or (op is sre_constants.SUBPATTERN and av[0] is not None):
+            return True
+        if any(_branch_or_group(child) for child in _children(op, av)):
+            return True
+    return False
+
+
+def _unseparated_repeat(items: list, flags: int, after=None) -> bool:
+    """
+    序列中是否有可多次匹配、且后面没有被它匹配不了的字面量隔开的重复
+
+    Args:
+        items: 节点序列
+        flags: 编译标志
+        after: 序列之后紧跟的节点
+    """
+    for i, (op, av) in enumerate(items):
+        following = items[i + 1] if i + 1 < len(items) else after
+        if op in _BACKTRACKING_REPEATS and av[1] > 1:
+            body = list(av[2])
+            separated = (
+                len(body) == 1 and following is not None and following[0] is sre_constants.LITERAL
+                and not _may_match_char(body[0], chr(following[1]), flags)
+            )
+            if not separated or _unseparated_repeat(body, flags):
+                return True
+        elif any(_unseparated_repeat(child, flags, following) for child in _children(op, av)):
+            return True
+    return False
+
+
+def _may_match_char(item, char: str, flags: int) -> bool:
+    """单字符节点能否匹配 char（无法判断时返回 True）"""
+    if flags & re.IGNORECASE:
+        variants = {char, char.lower(), char.upper()}
+        return any(_may_match_exact(item, c) for c in variants)
+    return _may_match_exact(item, char)
+
+
+def _may_match_exact(item, char: str) -> bool:
+    op, av = item
+    if op is sre_constants.LITERAL:
+        return chr(av) == char
+    if op is sre_constants.NOT_LITERAL:
+        return chr(av) != char
+    if op is sre_constants.IN:
+        negate = bool(av) and av[0][0] is sre_constants.NEGATE
+        hit = False
+        for set_op, set_av in av[1:] if negate else av:
+            if set_op is sre_constants.LITERAL:
+                hit = chr(set_av) == char
+            elif set_op is sre_constants.RANGE:
+                hit = set_av[0] <= ord(char) <= set_av[1]
+            elif set_op is sre_constants.CATEGORY and set_av in _CATEGORY_PATTERNS:
+                hit = re.match(_CATEGORY_PATTERNS[set_av], char) is not None
+            else:
+                return True
+            if hit:
+                break
+        return hit != negate
+    return True
+
+
+def _search_worker(lines: List[str], first_line: int, pattern: str, flags: int) -> MatchList:
+    """工作进程：搜索一块行"""
+    return search_block(lines, first_line, re.compile(pattern, flags))
+
+
+def bounded_search_block(
+    lines: Sequence[str],
+    first_line: int,
+    regex: "re.Pattern",
+    literal: Optional[str] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    budget: float = SEARCH_BLOCK_BUDGET
+) -> MatchList:
+    """
+    search_block 的受限版本：正则在可强制终止的工作进程中执行
+
+    re 在 C 层匹配时不释放 GIL、也不检查取消，失控的正则会卡住整个进程；
+    静态检查无法识别所有会失控的正则，所以正则一律放到单独进程中执行，
+    超时或取消时直接终止该进程。
+
+    Args:
+        lines: 行列表
+        first_line: 第一行的行号
+        regex: 编译好的正则
+        literal: 字面量查找串（字面量查找不会回溯，直接执行）
+        cancel_token: 取消令牌
+        budget: 本块允许的秒数
+
+    Raises:
+        RegexBudgetExceeded: 超出时间预算
+        OperationCancelled: 操作被取消
+    """
+    if literal is not None:
+        return search_block(lines, first_line, regex, literal)
+    return run_bounded(
+        _search_worker, (list(lines), first_line, regex.pattern, regex.flags), regex.pattern, cancel_token, budget
+    )
+
+
+def run_bounded(
+    worker: Callable,
+    args: tuple,
+    pattern: str,
+    cancel_token: Optional[CancellationToken] = None,
+    budget: float = SEARCH_BLOCK_BUDGET
+):
+    """
+    在可强制终止的工作进程中执行 worker(*args)，超时或取消时终止该进程
+
+    Args:
+        worker: 模块级函数（需要能被 pickle）
+        args: 参数
+        pattern: 正在执行的正则（用于错误信息）
+        cancel_token: 取消令牌
+        budget: 允许的秒数
+
+    Raises:
+        RegexBudgetExceeded: 超出时间预算
+        OperationCancelled: 操作被取消
+    """
+    deadline = time.monotonic() + budget
+    while True:
+        pool = get_guard_pool()
+        result = pool.apply_async(worker, args)
+        while not result.ready():
+            result.wait(0.05)
+            if cancel_token is not None and cancel_token.cancelled:
+                terminate_guard_pool(pool)
+                raise OperationCancelled()
+            if time.monotonic() > deadline:
+                terminate_guard_pool(pool)
+                raise RegexBudgetExceeded(pattern, budget)
+            if get_guard_pool() is not pool:
+                break  # 进程池被其他操作终止，任务已丢失，重新提交
+        else:
+            return result.get()
+
+
+class HighlightBudget:
+    """
+    高亮正则的执行预算
+
+    高亮在界面线程中执行，无法中途终止：每行只匹配前 max_line 个字符；规则首次
+    使用时做回溯风险检查（嵌套重复、重复的分支或捕获分组），有风险的规则在匹配
+    之前就被禁用；检查不出、但在一行上耗时超过预算的规则随后也被禁用。禁用时
+    通知 on_disabled(规则名, 原因)。
+    """
+
+    def __init__(
+        self,
+        on_disabled: Optional[Callable[[str, str], None]] = None,
+        budget: float = HIGHLIGHT_RULE_BUDGET,
+        max_line: int = HIGHLIGHT_MAX_LINE
+    ):
+        self.on_disabled = on_disabled
+        self.budget = budget
+        self.max_line = max_line
+        self.disabled: Set[str] = set()
+        self._checked: Set[str] = set()
+
+    def finditer(self, name: str, regex: "re.Pattern", text: str) -> List[Tuple[int, int]]:
+        """
+        在一行中匹配规则
+
+        Returns:
+            [(起始位置, 结束位置)]，规则已禁用时为空
+        """
+        if name in self.disabled:
+            return []
+        if name not in self._checked:
+            self._checked.add(name)
+            if backtracking_risk(regex.pattern, regex.flags):
+                self._disable(name, "嵌套或含分支的重复可能导致灾难性回溯")
+                return []
+
+        start = time.perf_counter()
+        spans = [m.span() for m in regex.finditer(text[:self.max_line])]
+        if time.perf_counter() - start > self.budget:
+            self._disable(name, f"单行匹配超过 {self.budget * 1000:.0f} ms")
+        return spans
+
+    def reset(self):
+        """规则变化后重新启用全部规则"""
+        self.disabled.clear()
+        self._checked.clear()
+
+    def _disable(self, name: str, reason: str):
+        self.disabled.add(name)
+        if self.on_disabled is not None:
+            self.on_disabled(name, reason)
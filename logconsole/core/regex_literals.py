@@ -0,0 +1,141 @@
+"""
+正则必需字面量 - 解析正则语法树，提取每个匹配都必然包含的字面量片段，用于预筛选
+"""
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# 预筛选串的最短长度
+MIN_PREFILTER_LENGTH = 2
+
+_REPEATS = tuple(
+    getattr(sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+)
+
+
+def required_literals(pattern: str, flags: int = 0) -> Tuple[List[str], bool]:
+    """
+    提取正则中每个匹配都必然包含的字面量片段
+
+    只沿顶层序列、无标志修改的分组和至少重复一次的子模式提取；分支、字符集、
+    可选部分都会截断片段。无法解析时返回空列表（不做预筛选）。
+
+    Args:
+        pattern: 正则表达式
+        flags: 编译标志
+
+    Returns:
+        (字面量片段列表, 是否忽略大小写（含 (?i) 内联标志）)
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except (re.error, RecursionError, OverflowError):
+        return [], bool(flags & re.IGNORECASE)
+
+    state = getattr(parsed, "state", None) or parsed.pattern  # Python < 3.11 为 pattern
+    literals: List[str] = []
+    _collect(list(parsed), literals)
+    return [s for s in literals if s], bool(state.flags & re.IGNORECASE)
+
+
+def case_safe_segments(literals: List[str], ignore_case: bool) -> List[str]:
+    """
+    切出可以按 lower() 比较的片段
+
+    忽略大小写时只保留大小写变体全在 ASCII 内的字符（i/k/s 另有非 ASCII 变体）和
+    没有大小写的字符，其余字符切断片段；区分大小写时原样返回。
+    """
+    if not ignore_case:
+        return [s for s in literals if s]
+
+    def usable(c: str) -> bool:
+        if c.isascii():
+            return c not in "iIkKsS"
+        return c.lower() == c == c.upper()
+
+    segments = []
+    for literal in literals:
+        run = []
+        for c in literal:
+            if usable(c):
+                run.append(c)
+            elif run:
+                segments.append("".join(run))
+                run = []
+        if run:
+            segments.append("".join(run))
+    return segments
+
+
+@lru_cache(maxsize=128)
+def regex_prefilter(pattern: str, flags: int = 0) -> Optional[Tuple[Tuple[str, ...], bool]]:
+    """
+    正则的预筛选串：每个都是必需字面量片段，不包含其中任何一个的行不可能匹配
+
+    不足 MIN_PREFILTER_LENGTH 个字符的片段筛不掉多少行，不使用。
+
+    Returns:
+        (预筛选串（忽略大小写时已转小写）, 是否忽略大小写)；没有可用字面量时返回 None
+    """
+    literals, ignore_case = required_literals(pattern, flags)
+    needles = {
+        s.lower() if ignore_case else s
+        for s in case_safe_segments(literals, ignore_case)
+        if len(s) >= MIN_PREFILTER_LENGTH and "\n" not in s
+    }
+    if not needles:
+        return None
+    return tuple(sorted(needles, key=lambda s: (-len(s), s))), ignore_case
+
+
+def _collect(items, literals: List[str]):
+    """沿序列收集连续的 LITERAL，遇到其他节点时结束当前片段"""
+    run: List[str] = []
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        literals.append("".join(run))
+        run = []
+        if op == sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            if not add_flags and not del_flags:
+                _collect(list(sub), literals)
+        elif op in _REPEATS:
+            low, _, sub = av
+            if low >= 1:
+                _collect(list(sub), literals)
+        elif op == getattr(sre_constants, "ATOMIC_GROUP", None):
+            _collect(list(av), literals)
+    literals.append("".join(run))
+
+
+def literal_alternatives(pattern: str, flags: int = 0) -> Optional[List[str]]:
+    """
+    正则是否只是若干纯文本的顶层分支（如 "robot-01|robot-02"）
+
+    Returns:
+        各分支的文本；含其他语法（分组、字符集、量词、内联标志等）时返回 None
+    """
+    if "(?" in pattern or flags & re.VERBOSE:
+        return None
+    alternatives = []
+    # 按 | 直接切分：分组、字符集或转义中的 | 会让某一段无法解析或含非字面量节点
+    for piece in pattern.split("|"):
+        try:
+            parsed = sre_parse.parse(piece, flags)
+        except (re.error, RecursionError, OverflowError):
+            return None
+        items = list(parsed)
+        if not items or any(op != sre_constants.LITERAL for op, _ in items):
+            return None
+        alternatives.append("".join(chr(av) for _, av in items))
+    return alternatives
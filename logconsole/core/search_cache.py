@@ -0,0 +1,144 @@
+"""
+搜索结果缓存 - 按行存储 + 查询缓存完整的匹配结果，按内存占用 LRU 淘汰
+"""
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .match_list import MatchList
+
+
+def literal_contains(pattern: str, cached: str, case_sensitive: bool) -> bool:
+    """
+    普通文本查询 pattern 的每个匹配行是否必然也匹配 cached
+
+    忽略大小写时按 lower() 比较，lower() 改变长度的（如 "İ"）不参与，避免位置错位。
+    """
+    if case_sensitive:
+        return cached in pattern
+    lower_pattern, lower_cached = pattern.lower(), cached.lower()
+    return (len(lower_pattern) == len(pattern) and len(lower_cached) == len(cached)
+            and lower_cached in lower_pattern)
+
+
+class SearchCache:
+    """
+    搜索结果 LRU 缓存（线程安全）
+
+    键为 (行存储身份, 行数, 已索引字节位置, 查询, 是否正则, 是否区分大小写)。行存储
+    以弱引用确认身份：重新加载文件得到新的行存储，旧结果自然失效；跟随模式下行数
+    变化、或不完整的末行变长（行数不变）同样不会命中。普通 list 无法弱引用，不缓存
+    （小文件重新扫描已足够快）。
+    缓存中的 MatchList 只读，调用方需复制后再修改。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存的匹配结果总大小上限（字节），超出后淘汰最久未用的
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, Tuple[weakref.ref, MatchList]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _source(lines) -> Optional[Tuple[int, int, Optional[int]]]:
+        """
+        行存储身份 (id, 行数, 已索引字节位置)；不能弱引用的返回 None
+
+        LineSubset 的内容随原行存储变化，取原行存储的已索引字节位置。
+        """
+        try:
+            weakref.ref(lines)
+        except TypeError:
+            return None
+        indexed_offset = getattr(getattr(lines, "source", lines), "indexed_offset", None)
+        return id(lines), len(lines), indexed_offset() if indexed_offset else None
+
+    def _live(self, key: tuple, lines) -> Optional[MatchList]:
+        """取出键对应的结果（行存储已被回收、id 被复用时丢弃）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        ref, matches = entry
+        if ref() is not lines:
+            self._discard(key)
+            return None
+        return matches
+
+    def _discard(self, key: tuple):
+        _, matches = self._entries.pop(key)
+        self._bytes -= matches.memory_usage()
+
+    def get(self, lines, pattern: str, is_regex: bool, case_sensitive: bool) -> Optional[MatchList]:
+        """
+        查找完全相同的查询
+
+        Returns:
+            缓存的匹配结果，未命中时返回 None
+        """
+        source = self._source(lines)
+        if source is None:
+            return None
+        key = source + (pattern, is_regex, case_sensitive)
+        with self._lock:
+            matches = self._live(key, lines)
+            if matches is not None:
+                self._entries.move_to_end(key)
+            return matches
+
+    def narrowing(self, lines, pattern: str, case_sensitive: bool) -> Optional[MatchList]:
+        """
+        查找被新的普通文本查询包含的已缓存查询（新查询只可能匹配它的命中行）
+
+        Returns:
+            匹配数最少的可用结果，没有时返回 None
+        """
+        source = self._source(lines)
+        if source is None:
+            return None
+        best_key = best = None
+        with self._lock:
+            for key in list(self._entries):
+                if key[:3] != source or key[4] or key[5] != case_sensitive:
+                    continue
+                if not literal_contains(pattern, key[3], case_sensitive):
+                    continue
+                matches = self._live(key, lines)
+                if matches is not None and (best is None or len(matches) < len(best)):
+                    best_key, best = key, matches
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+        return best
+
+    def put(self, lines, pattern: str, is_regex: bool, case_sensitive: bool, matches: MatchList):
+        """保存一次完整搜索的结果（单个结果超过上限时不缓存）"""
+        source = self._source(lines)
+        size = matches.memory_usage()
+        if source is None or size > self.max_bytes:
+            return
+        key = source + (pattern, is_regex, case_sensitive)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (weakref.ref(lines), matches)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def memory_usage(self) -> int:
+        """缓存的匹配结果总大小（字节）"""
+        return self._bytes
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,164 @@
+"""
+只计数的搜索 - 统计匹配数、匹配行数和各时间段的匹配数，不保存任何匹配位置
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .cancellation import CancellationToken
+from .literal_search import candidate_lines, casefold_safe, prefilter_lines
+from .match_list import MatchList
+from .regex_guard import SEARCH_BLOCK_BUDGET, run_bounded
+
+# 时间段粒度 -> 时间戳前缀长度（"YYYY-MM-DD HH:MM"）
+TIME_BUCKETS = {"day": 10, "hour": 13, "minute": 16}
+
+# 行首时间戳（允许 "[" 等前缀），如 "2024-01-01 12:00:00"、"[2024-01-01T12:00:00.123]"
+_TIMESTAMP_RE = re.compile(r"\W{0,2}(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2})")
+
+
+@dataclass
+class SearchCount:
+    """计数结果"""
+    matches: int = 0  # 匹配数
+    lines: int = 0  # 含匹配的行数
+    buckets: Dict[str, int] = field(default_factory=dict)  # 时间段 -> 匹配数（没有时间戳的行记在 "" 下）
+
+    def add(self, other: "SearchCount"):
+        """合并另一部分的计数"""
+        self.matches += other.matches
+        self.lines += other.lines
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+
+def time_bucket(line: str, length: int) -> str:
+    """
+    行首时间戳所在的时间段
+
+    Args:
+        line: 日志行
+        length: 时间段粒度对应的前缀长度（TIME_BUCKETS 中的值）
+
+    Returns:
+        如 "2024-01-01 12"（按小时），没有时间戳时为 ""
+    """
+    match = _TIMESTAMP_RE.match(line)
+    if match is None:
+        return ""
+    return f"{match.group(1)} {match.group(2)}"[:length]
+
+
+def count_block(
+    lines: Sequence[str],
+    regex: "re.Pattern",
+    bucket_length: Optional[int] = None,
+    literal: Optional[str] = None
+) -> SearchCount:
+    """
+    统计一块行中的匹配：给出 literal 时整块 str.count；否则先用必需字面量整块筛选
+    候选行，再逐行正则计数
+
+    Args:
+        lines: 行列表
+        regex: 编译好的正则（literal 的转义形式）
+        bucket_length: 按时间段统计时的前缀长度（None 不统计）
+        literal: 字面量查找串（None 表示正则）
+    """
+    if literal is not None:
+        result = _count_literal(lines, literal, bool(regex.flags & re.IGNORECASE), bucket_length)
+        if result is not None:
+            return result
+
+    result = SearchCount()
+    candidates = prefilter_lines(lines, regex)
+    finditer = regex.finditer
+    buckets = result.buckets
+    for index in range(len(lines)) if candidates is None else candidates:
+        line = lines[index]
+        found = sum(1 for _ in finditer(line))
+        if found:
+            result.matches += found
+            result.lines += 1
+            if bucket_length is not None:
+                key = time_bucket(line, bucket_length)
+                buckets[key] = buckets.get(key, 0) + found
+    return result
+
+
+def _count_literal(
+    lines: Sequence[str],
+    literal: str,
+    ignore_case: bool,
+    bucket_length: Optional[int]
+) -> Optional[SearchCount]:
+    """
+    整块统计字面量（不重叠，与 re.finditer 相同）；行内含换行符、忽略大小写时
+    literal 不满足 casefold_safe 或小写后长度变化时返回 None
+    """
+    result = SearchCount()
+    if not lines:
+        return result
+    text = "\n".join(lines)
+    if text.count("\n") != len(lines) - 1:
+        return None
+    if ignore_case:
+        if not casefold_safe(literal):
+            return None
+        haystack, needle = text.lower(), literal.lower()
+        if len(haystack) != len(text) or len(needle) != len(literal):
+            return None
+    else:
+        haystack, needle = text, literal
+
+    result.matches = haystack.count(needle)
+    if not result.matches:
+        return result
+    rows = candidate_lines(haystack, needle)
+    result.lines = len(rows)
+    if bucket_length is not None:
+        buckets = result.buckets
+        for index in rows:
+            line = lines[index]
+            key = time_bucket(line, bucket_length)
+            found = (line.lower() if ignore_case else line).count(needle)
+            buckets[key] = buckets.get(key, 0) + found
+    return result
+
+
+def count_matches(lines: Sequence[str], matches: MatchList, bucket_length: Optional[int] = None) -> SearchCount:
+    """由已有的完整搜索结果得到计数（按时间段统计时读取匹配行）"""
+    result = SearchCount(matches=len(matches))
+    for line, first, last in matches.line_groups():
+        result.lines += 1
+        if bucket_length is not None:
+            key = time_bucket(lines[line], bucket_length)
+            result.buckets[key] = result.buckets.get(key, 0) + last - first
+    return result
+
+
+def _count_worker(lines: List[str], pattern: str, flags: int, bucket_length: Optional[int]) -> SearchCount:
+    """工作进程：统计一块行"""
+    return count_block(lines, re.compile(pattern, flags), bucket_length)
+
+
+def bounded_count_block(
+    lines: Sequence[str],
+    regex: "re.Pattern",
+    bucket_length: Optional[int] = None,
+    literal: Optional[str] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    budget: float = SEARCH_BLOCK_BUDGET
+) -> SearchCount:
+    """
+    count_block 的受限版本：正则在可强制终止的工作进程中执行（参见 bounded_search_block）
+
+    Raises:
+        RegexBudgetExceeded: 超出时间预算
+        OperationCancelled: 操作被取消
+    """
+    if literal is not None:
+        return count_block(lines, regex, bucket_length, literal)
+    return run_bounded(
+        _count_worker, (list(lines), regex.pattern, regex.flags, bucket_length), regex.pattern, cancel_token, budget
+    )
@@ -1,10 +1,38 @@
 """
 搜索引擎 - 支持正则表达式、忽略大小写、全文搜索
 """
+import queue
 import re
-from typing import List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Optional
 from enum import Enum
 
+from .byte_search import byte_search_supported, search_store_block
+from .cancellation import CancellationToken, OperationCancelled, check_cancelled
+from .literal_search import literal_supported
+from .match_list import MatchList
+from .parallel_search import (
+    count_range, iter_parallel_count, iter_parallel_search, search_range, supports_parallel_search
+)
+from .keyword_matcher import KeywordMatcher
+from .regex_guard import RegexBudgetExceeded, bounded_search_block, run_bounded
+from .regex_literals import literal_alternatives, required_literals
+from .search_cache import SearchCache
+from .search_count import TIME_BUCKETS, SearchCount, bounded_count_block, count_matches
+from .trigram_index import encode_needles
+from .worker_pool import default_workers, reset_process_pool
+
+# 每搜索多少行检查一次取消
+CANCEL_CHECK_LINES = 4096
+
+# 三元组索引筛出的候选行超过该比例时不如直接全量扫描
+INDEX_MAX_COVERAGE = 0.5
+
+# 同时搜索多个文件时最多几个文件并发
+MAX_CONCURRENT_FILES = 8
+
 
 class SearchMode(Enum):
     """搜索模式"""
@@ -13,20 +41,46 @@ class SearchMode(Enum):
     CASE_INSENSITIVE = "case_insensitive"  # 忽略大小写
 
 
+@dataclass
+class SearchBatch:
+    """流式搜索产出的一批结果"""
+    matches: MatchList  # 本批新增的匹配（行号递增）
+    scanned: int  # 已扫描的行数
+    total: int  # 总行数
+
+
 class SearchEngine:
     """日志搜索引擎"""
 
-    def __init__(self):
-        self.matches: List[Tuple[int, int, int]] = []  # (line_number, start_pos, end_pos)
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        parallel_threshold: int = 32 * 1024 * 1024,
+        cache: Optional[SearchCache] = None
+    ):
+        """
+        初始化搜索引擎
+
+        Args:
+            workers: 并行搜索的进程数（默认 CPU 核数，1 表示单线程）
+            parallel_threshold: mmap 行存储的文件大小超过该值时才启用多进程
+            cache: 搜索结果缓存（可在多个引擎间共享，None 表示不缓存）
+        """
+        self.workers = workers or default_workers()
+        self.parallel_threshold = parallel_threshold
+        self.cache = cache
+        self.matches = MatchList()  # (line_number, start_pos, end_pos)
         self.current_match_index: int = -1
+        self.searching = False  # 流式搜索进行中，结果还会继续增加
 
     def search(
         self,
         lines: List[str],
         pattern: str,
         mode: SearchMode = SearchMode.PLAIN,
-        case_sensitive: bool = True
-    ) -> List[Tuple[int, int, int]]:
+        case_sensitive: bool = True,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> MatchList:
         """
         搜索日志内容
 
@@ -35,43 +89,640 @@ class SearchEngine:
             pattern: 搜索模式
             mode: 搜索模式（普通/正则/忽略大小写）
             case_sensitive: 是否区分大小写
+            cancel_token: 取消令牌，每 CANCEL_CHECK_LINES 行检查一次
 
         Returns:
-            匹配结果列表 [(行号, 起始位置, 结束位置)]
+            匹配结果（按列存储，元素为 (行号, 起始位置, 结束位置)）
+
+        Raises:
+            OperationCancelled: 搜索被取消（已有结果被清空）
+            RegexBudgetExceeded: 有回溯风险的正则超出时间预算（已有结果被清空）
+        """
+        for _ in self.iter_search(lines, pattern, mode, case_sensitive, cancel_token):
+            pass
+        self.current_match_index = 0 if self.matches else -1
+        return self.matches
+
+    def iter_search(
+        self,
+        lines: List[str],
+        pattern: str,
+        mode: SearchMode = SearchMode.PLAIN,
+        case_sensitive: bool = True,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Iterator[SearchBatch]:
+        """
+        流式搜索：边扫描边产出结果，self.matches 随之增长
+
+        参数与 search() 相同；正则表达式错误时不产出任何结果。当前位置停在
+        第一个匹配之前，next_match() 得到第一个匹配。
+
+        Yields:
+            SearchBatch（每扫描一块产出一次，本块没有匹配时 matches 为空，可用于显示进度）
+
+        Raises:
+            OperationCancelled: 搜索被取消（已有结果被清空）
+            RegexBudgetExceeded: 有回溯风险的正则超出时间预算（已有结果被清空）
         """
+        self.start_results()
         if not pattern:
-            self.matches = []
-            return self.matches
+            self.finish_results()
+            return
 
-        self.matches = []
+        compiled = self._compile(pattern, mode, case_sensitive)
+        if compiled is None:
+            # 正则表达式错误，返回空结果
+            self.finish_results()
+            return
+        regex, literal = compiled
 
+        total = len(lines)
+        is_regex = mode == SearchMode.REGEX
+        cached = narrowed = ranges = None
+        if self.cache is not None:
+            cached = self.cache.get(lines, pattern, is_regex, case_sensitive)
+            if cached is None and literal is not None:
+                narrowed = self.cache.narrowing(lines, pattern, case_sensitive)
+        if cached is None and narrowed is None:
+            ranges = self._index_ranges(lines, pattern, mode, regex)
         try:
-            # 构建正则表达式
-            if mode == SearchMode.REGEX:
-                flags = 0 if case_sensitive else re.IGNORECASE
-                regex = re.compile(pattern, flags)
+            if cached is not None:
+                batches = iter([(total, cached)])
+            elif narrowed is not None:
+                # 新查询包含已缓存的查询：只需重新检查它的命中行
+                batches = self._search_line_numbers(lines, regex, cancel_token, narrowed)
+            elif ranges is not None:
+                batches = self._search_ranges(lines, regex, cancel_token, literal, ranges)
+            elif self._use_parallel(lines) and literal is not None:
+                # 正则不进共享进程池（无法终止），逐块在受限进程中执行
+                batches = self._search_parallel(lines, regex, cancel_token, literal)
             else:
-                # 普通文本，转义特殊字符
-                escaped = re.escape(pattern)
-                flags = 0 if case_sensitive else re.IGNORECASE
-                regex = re.compile(escaped, flags)
+                batches = self._search_lines(lines, regex, cancel_token, literal)
+            for scanned, found in batches:
+                self.add_matches(found)
+                yield SearchBatch(found, scanned, total)
+        except (OperationCancelled, RegexBudgetExceeded):
+            self.clear()
+            raise
+        self.finish_results()
+        if self.cache is not None and cached is None:
+            self.cache.put(lines, pattern, is_regex, case_sensitive, self.matches)
 
-            # 搜索所有行
-            for line_num, line in enumerate(lines):
-                for match in regex.finditer(line):
-                    self.matches.append((line_num, match.start(), match.end()))
+    def iter_search_files(
+        self,
+        sources: Sequence[List[str]],
+        pattern: str,
+        mode: SearchMode = SearchMode.PLAIN,
+        case_sensitive: bool = True,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Iterator[Tuple[int, SearchBatch]]:
+        """
+        并发搜索多个行存储，各文件的结果边扫描边产出（不修改 self.matches）
 
+        每个文件在线程池中用独立的引擎流式搜索（共享缓存和进程池设置），小文件
+        不必排在大文件之后；同一文件的各批按行号顺序产出，不同文件的批次交错。
+
+        Args:
+            sources: 各文件的行列表
+            其余参数同 search()
+
+        Yields:
+            (文件在 sources 中的下标, SearchBatch)
+
+        Raises:
+            OperationCancelled: 搜索被取消（其余文件的搜索随之停止）
+            RegexBudgetExceeded: 某个文件中有回溯风险的正则超出时间预算（同上）
+        """
+        if not sources:
+            return
+        stop = CancellationToken()  # 任一文件出错或调用方停止迭代时通知其余文件
+        results = queue.Queue()
+        done = object()
+
+        def search_one(index: int, lines):
+            try:
+                engine = SearchEngine(self.workers, self.parallel_threshold, self.cache)
+                for batch in engine.iter_search(lines, pattern, mode, case_sensitive, stop):
+                    results.put((index, batch))
+            except Exception as e:
+                results.put((index, e))
+            finally:
+                results.put((index, done))
+
+        executor = ThreadPoolExecutor(max_workers=min(len(sources), MAX_CONCURRENT_FILES))
+        try:
+            for index, lines in enumerate(sources):
+                executor.submit(search_one, index, lines)
+            remaining = len(sources)
+            while remaining:
+                check_cancelled(cancel_token)
+                try:
+                    index, item = results.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield index, item
+        finally:
+            stop.cancel()
+            executor.shutdown(wait=True)
+
+    def count(
+        self,
+        lines: List[str],
+        pattern: str,
+        mode: SearchMode = SearchMode.PLAIN,
+        case_sensitive: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+        time_bucket: Optional[str] = None,
+        on_progress=None
+    ) -> SearchCount:
+        """
+        只统计匹配数和匹配行数，不保存匹配位置（不修改 self.matches）
+
+        大文件的 mmap 行存储交给进程池并行统计，各段只传回计数；缓存中有完整结果时
+        直接由它得到计数，有三元组索引时只统计候选区间。
+
+        Args:
+            lines: 日志行列表
+            pattern: 搜索模式
+            mode: 搜索模式（普通/正则）
+            case_sensitive: 是否区分大小写
+            cancel_token: 取消令牌，每 CANCEL_CHECK_LINES 行检查一次
+            time_bucket: 按行首时间戳分段统计的粒度（"day" / "hour" / "minute"，None 不统计）
+            on_progress: 进度回调 on_progress(已扫描行数, 总行数, 目前的计数)
+
+        Returns:
+            SearchCount（正则表达式错误时为空计数）
+
+        Raises:
+            OperationCancelled: 计数被取消
+            RegexBudgetExceeded: 有回溯风险的正则超出时间预算
+        """
+        result = SearchCount()
+        compiled = self._compile(pattern, mode, case_sensitive) if pattern else None
+        if compiled is None:
+            return result
+        regex, literal = compiled
+        bucket_length = TIME_BUCKETS[time_bucket] if time_bucket else None
+        total = len(lines)
+
+        if self.cache is not None:
+            cached = self.cache.get(lines, pattern, mode == SearchMode.REGEX, case_sensitive)
+            if cached is not None:
+                result = count_matches(lines, cached, bucket_length)
+                if on_progress is not None:
+                    on_progress(total, total, result)
+                return result
+
+        ranges = self._index_ranges(lines, pattern, mode, regex)
+        if ranges is None and self._use_parallel(lines) and literal is not None:
+            parts = self._count_parallel(lines, regex, cancel_token, bucket_length, literal)
+        else:
+            parts = self._count_ranges(
+                lines, regex, cancel_token, bucket_length, literal, [(0, total)] if ranges is None else ranges
+            )
+        for scanned, part in parts:
+            result.add(part)
+            if on_progress is not None:
+                on_progress(scanned, total, result)
+        return result
+
+    def count_files(
+        self,
+        files: Dict[str, List[str]],
+        pattern: str,
+        mode: SearchMode = SearchMode.PLAIN,
+        case_sensitive: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+        time_bucket: Optional[str] = None
+    ) -> Dict[str, SearchCount]:
+        """
+        分别统计多个文件（参数同 count()）
+
+        Args:
+            files: {文件名: 行列表}
+
+        Returns:
+            {文件名: SearchCount}
+        """
+        return {
+            name: self.count(lines, pattern, mode, case_sensitive, cancel_token, time_bucket)
+            for name, lines in files.items()
+        }
+
+    @staticmethod
+    def _count_ranges(
+        lines,
+        regex: "re.Pattern",
+        cancel_token: Optional[CancellationToken],
+        bucket_length: Optional[int],
+        literal: Optional[str],
+        ranges: List[Tuple[int, int]]
+    ) -> Iterator[Tuple[int, SearchCount]]:
+        """
+        单线程统计给定的行区间，每 CANCEL_CHECK_LINES 行为一块
+
+        Yields:
+            (已扫描到的行号, 本块的计数)
+        """
+        for first, last in ranges:
+            for start in range(first, last, CANCEL_CHECK_LINES):
+                check_cancelled(cancel_token)
+                end = min(start + CANCEL_CHECK_LINES, last)
+                yield end, SearchEngine._count_block(lines, start, end, regex, bucket_length, literal, cancel_token)
+        total = len(lines)
+        if not ranges or ranges[-1][1] < total:
+            yield total, SearchCount()
+
+    @staticmethod
+    def _count_block(
+        lines,
+        start: int,
+        end: int,
+        regex: "re.Pattern",
+        bucket_length: Optional[int],
+        literal: Optional[str],
+        cancel_token: Optional[CancellationToken]
+    ) -> SearchCount:
+        """统计 [start, end) 行：正则在受限进程中执行，mmap 行存储由该进程自行读取文件"""
+        if literal is None and supports_parallel_search(lines):
+            args = (
+                lines.file_path, lines.encoding, lines.newline,
+                lines.line_offset(start), lines.line_offset(end), start, regex.pattern, regex.flags, bucket_length
+            )
+            return run_bounded(count_range, args, regex.pattern, cancel_token)
+        return bounded_count_block(lines[start:end], regex, bucket_length, literal, cancel_token)
+
+    def _count_parallel(
+        self,
+        lines,
+        regex: "re.Pattern",
+        cancel_token: Optional[CancellationToken],
+        bucket_length: Optional[int],
+        literal: Optional[str]
+    ) -> Iterator[Tuple[int, SearchCount]]:
+        """
+        多进程统计；进程池异常时从已完成的行继续单线程统计
+
+        Yields:
+            (已扫描到的行号, 本段的计数)
+        """
+        scanned = 0
+        try:
+            for scanned, part in iter_parallel_count(lines, regex, self.workers, bucket_length, literal):
+                yield scanned, part
+                check_cancelled(cancel_token)
+        except BrokenProcessPool:
+            reset_process_pool()
+            yield from self._count_ranges(
+                lines, regex, cancel_token, bucket_length, literal, [(scanned, len(lines))]
+            )
+
+    @classmethod
+    def _compile(
+        cls,
+        pattern: str,
+        mode: SearchMode,
+        case_sensitive: bool
+    ) -> Optional[Tuple["re.Pattern", Optional[str]]]:
+        """
+        构建正则表达式
+
+        Returns:
+            (正则, 字面量查找串)：普通文本整块 str.find 查找，正则只作后备（字面量为 None
+            表示只能用正则）；正则表达式错误时返回 None
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            if mode == SearchMode.REGEX:
+                return cls._keyword_regex(pattern, flags) or re.compile(pattern, flags), None
+            # 普通文本，转义特殊字符
+            regex = re.compile(re.escape(pattern), flags)
         except re.error:
-            # 正则表达式错误，返回空结果
-            self.matches = []
+            return None
+        return regex, pattern if literal_supported(pattern) else None
 
-        self.current_match_index = 0 if self.matches else -1
-        return self.matches
+    def find_next(
+        self,
+        lines: List[str],
+        pattern: str,
+        mode: SearchMode = SearchMode.PLAIN,
+        case_sensitive: bool = True,
+        line: int = 0,
+        column: int = 0,
+        backward: bool = False,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Optional[Tuple[int, int, int]]:
+        """
+        从 (line, column) 开始向后（或向前）查找最近的一个匹配，到文件末尾（开头）后回绕
+
+        只扫描到第一个匹配为止，代价与匹配总数无关；缓存中有完整结果时直接二分查找，
+        行存储有三元组索引时跳过不可能匹配的块。不修改 self.matches。
+
+        Args:
+            lines: 日志行列表
+            pattern: 搜索模式
+            mode: 搜索模式（普通/正则）
+            case_sensitive: 是否区分大小写
+            line: 起点行号
+            column: 起点列；向后查找从该列开始（含），向前查找只取起始于该列之前的匹配
+            backward: 是否向前查找
+            cancel_token: 取消令牌，每 CANCEL_CHECK_LINES 行检查一次
+
+        Returns:
+            (行号, 起始位置, 结束位置)，没有匹配（或正则表达式错误）时返回 None
+
+        Raises:
+            OperationCancelled: 查找被取消
+            RegexBudgetExceeded: 有回溯风险的正则超出时间预算
+        """
+        total = len(lines)
+        compiled = self._compile(pattern, mode, case_sensitive) if pattern else None
+        if compiled is None or not total:
+            return None
+        regex, literal = compiled
+        line = min(max(line, 0), total - 1)
+
+        if self.cache is not None:
+            cached = self.cache.get(lines, pattern, mode == SearchMode.REGEX, case_sensitive)
+            if cached is not None:
+                if not cached:
+                    return None
+                index = self._nearest(cached, line, column, backward)
+                if index is None:
+                    # 回绕
+                    index = len(cached) - 1 if backward else 0
+                return cached[index]
+
+        ranges = self._index_ranges(lines, pattern, mode, regex)
+        if ranges is None:
+            ranges = [(0, total)]
+        if backward:
+            # 先找起点行及之前的行，再回绕到末尾往回找
+            passes = [(0, line + 1, True), (line, total, False)]
+        else:
+            passes = [(line, total, True), (0, line + 1, False)]
+        raw_search = self._raw_search(lines, regex, literal)
+        for first, last, bounded in passes:
+            for start, end in self._find_blocks(ranges, first, last, backward):
+                check_cancelled(cancel_token)
+                found = self._search_block(lines, start, end, regex, literal, cancel_token, raw_search)
+                if not found:
+                    continue
+                if not bounded:
+                    return found[-1] if backward else found[0]
+                index = self._nearest(found, line, column, backward)
+                if index is not None:
+                    return found[index]
+        return None
+
+    @staticmethod
+    def _nearest(matches: MatchList, line: int, column: int, backward: bool) -> Optional[int]:
+        """
+        matches 中 (line, column) 之后第一个（向前查找时之前最后一个）匹配的下标
+
+        向后查找包含起始于 column 的匹配，但不包含正好位于 column 的空匹配（避免原地不动）。
+        """
+        first, last = matches.line_range(line)
+        starts, ends = matches.starts, matches.ends
+        if backward:
+            for index in range(last - 1, first - 1, -1):
+                if starts[index] < column:
+                    return index
+            return first - 1 if first > 0 else None
+        for index in range(first, last):
+            if starts[index] > column or (starts[index] == column and ends[index] > column):
+                return index
+        return last if last < len(matches) else None
+
+    @staticmethod
+    def _find_blocks(
+        ranges: List[Tuple[int, int]],
+        first: int,
+        last: int,
+        backward: bool
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        把 ranges 与 [first, last) 的交集切成 CANCEL_CHECK_LINES 行的块，按查找方向排列
+
+        Yields:
+            (起始行, 结束行)
+        """
+        spans = [(max(a, first), min(b, last)) for a, b in ranges if a < last and b > first]
+        if backward:
+            for a, b in reversed(spans):
+                for end in range(b, a, -CANCEL_CHECK_LINES):
+                    yield max(a, end - CANCEL_CHECK_LINES), end
+        else:
+            for a, b in spans:
+                for start in range(a, b, CANCEL_CHECK_LINES):
+                    yield start, min(b, start + CANCEL_CHECK_LINES)
+
+    @staticmethod
+    def _keyword_regex(pattern: str, flags: int) -> Optional["re.Pattern"]:
+        """
+        纯文本分支（如 "id1|id2|...|id200"）改用前缀树正则，一次扫描匹配所有分支
+
+        前缀树取同一位置最长的分支，re 取第一个匹配的分支：只有没有分支是另一分支的
+        前缀时两者结果才一致，否则返回 None（使用原正则）。
+        """
+        alternatives = literal_alternatives(pattern, flags)
+        if not alternatives or len(alternatives) < 2:
+            return None
+        ignore_case = bool(flags & re.IGNORECASE)
+        if ignore_case:
+            if any(len(a.lower()) != len(a) for a in alternatives):
+                return None
+            alternatives = [a.lower() for a in alternatives]
+        ordered = sorted(set(alternatives))
+        if any(b.startswith(a) for a, b in zip(ordered, ordered[1:])):
+            return None
+        return KeywordMatcher(ordered, ignore_case).regex
+
+    @staticmethod
+    def _index_ranges(
+        lines,
+        pattern: str,
+        mode: SearchMode,
+        regex: "re.Pattern"
+    ) -> Optional[List[Tuple[int, int]]]:
+        """
+        用行存储上的三元组索引筛出需要扫描的行区间
+
+        Returns:
+            [(起始行, 结束行)]；没有索引、查询没有可用三元组或候选太多时返回 None（全量扫描）
+        """
+        index = getattr(lines, "trigram_index", None)
+        if index is None:
+            return None
+        if mode == SearchMode.REGEX:
+            literals, ignore_case = required_literals(pattern, regex.flags)
+        else:
+            literals, ignore_case = [pattern], bool(regex.flags & re.IGNORECASE)
+        needles = encode_needles(literals, lines.encoding, ignore_case)
+        total = len(lines)
+        ranges = index.candidate_ranges(needles, total)
+        if ranges is None or sum(b - a for a, b in ranges) > total * INDEX_MAX_COVERAGE:
+            return None
+        return ranges
+
+    def _search_ranges(
+        self,
+        lines,
+        regex: "re.Pattern",
+        cancel_token: Optional[CancellationToken],
+        literal: Optional[str],
+        ranges: List[Tuple[int, int]]
+    ) -> Iterator[Tuple[int, MatchList]]:
+        """
+        只扫描给定的行区间（其余行已由索引排除）
+
+        Yields:
+            (已扫描到的行号, 本块的匹配)
+        """
+        for first, last in ranges:
+            yield from self._search_lines(lines, regex, cancel_token, literal, first, last)
+        total = len(lines)
+        if not ranges or ranges[-1][1] < total:
+            yield total, MatchList()
+
+    @staticmethod
+    def _search_line_numbers(
+        lines,
+        regex: "re.Pattern",
+        cancel_token: Optional[CancellationToken],
+        hits: MatchList
+    ) -> Iterator[Tuple[int, MatchList]]:
+        """
+        只在 hits 的命中行中重新搜索，每 CANCEL_CHECK_LINES 行为一块
+
+        Yields:
+            (已扫描到的行号, 本块的匹配)
+        """
+        numbers = [line for line, _, _ in hits.line_groups()]
+        for start in range(0, len(numbers), CANCEL_CHECK_LINES):
+            check_cancelled(cancel_token)
+            found = MatchList()
+            for line_number in numbers[start:start + CANCEL_CHECK_LINES]:
+                for m in regex.finditer(lines[line_number]):
+                    found.append(line_number, m.start(), m.end())
+            yield numbers[min(start + CANCEL_CHECK_LINES, len(numbers)) - 1] + 1, found
+        yield len(lines), MatchList()
+
+    def _use_parallel(self, lines) -> bool:
+        """大文件的 mmap 行存储交给进程池搜索"""
+        return (self.workers > 1 and supports_parallel_search(lines)
+                and lines.size > self.parallel_threshold)
+
+    @staticmethod
+    def _search_lines(
+        lines: List[str],
+        regex: "re.Pattern",
+        cancel_token: Optional[CancellationToken],
+        literal: Optional[str] = None,
+        first: int = 0,
+        last: Optional[int] = None
+    ) -> Iterator[Tuple[int, MatchList]]:
+        """
+        单线程搜索 [first, last) 行（last 默认到末尾），每 CANCEL_CHECK_LINES 行为一块
+
+        Yields:
+            (已扫描到的行号, 本块的匹配)
+        """
+        total = len(lines) if last is None else last
+        raw_search = SearchEngine._raw_search(lines, regex, literal)
+        for start in range(first, total, CANCEL_CHECK_LINES):
+            check_cancelled(cancel_token)
+            end = min(start + CANCEL_CHECK_LINES, total)
+            yield end, SearchEngine._search_block(lines, start, end, regex, literal, cancel_token, raw_search)
+
+    @staticmethod
+    def _raw_search(lines, regex: "re.Pattern", literal: Optional[str]) -> bool:
+        """
+        能否在本进程中先在原始字节上筛选、只解码候选行（UTF-8 / GBK 等的 mmap 行存储）
+
+        只用于字面量查找：正则一律在受限进程中执行，由该进程自行读取原始字节筛选。
+        """
+        return byte_search_supported(lines) and literal is not None
+
+    @staticmethod
+    def _search_block(
+        lines,
+        start: int,
+        end: int,
+        regex: "re.Pattern",
+        literal: Optional[str],
+        cancel_token: Optional[CancellationToken],
+        raw_search: bool
+    ) -> MatchList:
+        """搜索 [start, end) 行：raw_search 时先在原始字节上筛选，无法筛选时解码整块"""
+        found = search_store_block(lines, start, end, regex) if raw_search else None
+        if found is None and literal is None and supports_parallel_search(lines):
+            # 受限进程自行读取文件：不必把整块行传过去，也能先在原始字节上筛选
+            args = (
+                lines.file_path, lines.encoding, lines.newline,
+                lines.line_offset(start), lines.line_offset(end), start, regex.pattern, regex.flags
+            )
+            found = run_bounded(search_range, args, regex.pattern, cancel_token)
+        if found is None:
+            found = bounded_search_block(lines[start:end], start, regex, literal, cancel_token)
+        return found
+
+    def _search_parallel(
+        self,
+        lines,
+        regex: "re.Pattern",
+        cancel_token: Optional[CancellationToken],
+        literal: Optional[str] = None
+    ) -> Iterator[Tuple[int, MatchList]]:
+        """
+        多进程搜索，各段结果按行号顺序产出；进程池异常时从已完成的行继续单线程搜索
+
+        Yields:
+            (已扫描到的行号, 本段的匹配)
+        """
+        scanned = 0
+        try:
+            for scanned, part in iter_parallel_search(lines, regex, self.workers, literal):
+                yield scanned, part
+                check_cancelled(cancel_token)
+        except BrokenProcessPool:
+            reset_process_pool()
+            yield from self._search_lines(lines, regex, cancel_token, literal, scanned)
+
+    def set_matches(self, matches: Iterable[Tuple[int, int, int]]):
+        """设置在其他线程中完成的搜索结果"""
+        self.matches = matches if isinstance(matches, MatchList) else MatchList(matches)
+        self.current_match_index = 0 if matches else -1
+        self.searching = False
+
+    def start_results(self):
+        """开始接收流式结果（清空旧结果，当前位置在第一个匹配之前）"""
+        self.matches = MatchList()
+        self.current_match_index = -1
+        self.searching = True
+
+    def add_matches(self, matches: Iterable[Tuple[int, int, int]]):
+        """追加一批流式结果（行号在已有结果之后）"""
+        self.matches.extend(matches)
+
+    def finish_results(self):
+        """流式结果接收完毕"""
+        self.searching = False
 
     def get_match_count(self) -> int:
         """获取匹配数量"""
         return len(self.matches)
 
+    def get_line_matches(self, line_number: int) -> List[Tuple[int, int, int]]:
+        """获取某一行的全部匹配（二分查找）"""
+        first, last = self.matches.line_range(line_number)
+        return self.matches[first:last]
+
     def get_current_match(self) -> Optional[Tuple[int, int, int]]:
         """获取当前匹配"""
         if 0 <= self.current_match_index < len(self.matches):
@@ -79,22 +730,62 @@ class SearchEngine:
         return None
 
     def next_match(self) -> Optional[Tuple[int, int, int]]:
-        """跳转到下一个匹配"""
+        """跳转到下一个匹配（搜索进行中时停在已有的最后一个，不回绕）"""
         if not self.matches:
             return None
 
+        if self.searching and self.current_match_index + 1 >= len(self.matches):
+            return self.get_current_match()
         self.current_match_index = (self.current_match_index + 1) % len(self.matches)
         return self.get_current_match()
 
     def prev_match(self) -> Optional[Tuple[int, int, int]]:
-        """跳转到上一个匹配"""
+        """跳转到上一个匹配（搜索进行中时停在第一个，不回绕）"""
         if not self.matches:
             return None
 
-        self.current_match_index = (self.current_match_index - 1 + len(self.matches)) % len(self.matches)
+        if self.current_match_index < 0:
+            self.current_match_index = len(self.matches) - 1
+        elif self.searching and self.current_match_index == 0:
+            pass
+        else:
+            self.current_match_index = (self.current_match_index - 1 + len(self.matches)) % len(self.matches)
         return self.get_current_match()
 
     def clear(self):
         """清除搜索结果"""
-        self.matches = []
+        self.matches = MatchList()
         self.current_match_index = -1
+        self.searching = False
+
+
+def grep_lines(
+    lines: List[str],
+    keywords: List[str],
+    cancel_token: Optional[CancellationToken] = None
+) -> List[int]:
+    """
+    Grep：查找包含任一关键词的行（OR 逻辑）
+
+    Args:
+        lines: 日志行列表
+        keywords: 关键词列表
+        cancel_token: 取消令牌，每 CANCEL_CHECK_LINES 行检查一次
+
+    Returns:
+        匹配的行号列表（0-based）
+    """
+    if not keywords:
+        return []
+    if "" in keywords:
+        # 空关键词匹配所有行（与 "" in line 一致）
+        return list(range(len(lines)))
+    # 所有关键词合成一个前缀树正则，每行只扫描一次
+    search = KeywordMatcher(keywords).regex.search
+    result = []
+    for line_num, line in enumerate(lines):
+        if line_num % CANCEL_CHECK_LINES == 0:
+            check_cancelled(cancel_token)
+        if search(line):
+            result.append(line_num)
+    return result
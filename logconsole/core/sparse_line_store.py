@@ -0,0 +1,172 @@
+"""
+稀疏行存储 - 每 N 行记录一个检查点偏移，按块扫描定位行，适合上亿行的文件
+"""
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Tuple
+
+from .line_store import LineStore, scan_newlines
+
+
+class SparseLineStore(LineStore):
+    """
+    稀疏索引的行存储
+
+    checkpoints[b] 为第 b * block_lines 行的起始偏移，每个块固定 block_lines 行
+    （最后一个块除外），内存占用约为稠密索引的 1/block_lines。
+    访问某行时从所在块的检查点开始扫描换行符，整块解码后放入 LRU 缓存。
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        encoding: str = "utf-8",
+        data_start: int = 0,
+        block_lines: int = 1024,
+        cache_blocks: int = 64
+    ):
+        """
+        初始化稀疏行存储
+
+        Args:
+            file_path: 文件路径
+            encoding: 行解码使用的编码
+            data_start: 数据起始偏移（跳过 BOM）
+            block_lines: 每个块的行数（检查点间隔）
+            cache_blocks: 缓存的已解码块数量（LRU）
+        """
+        super().__init__(file_path, encoding, data_start)
+        self.block_lines = block_lines
+        self.checkpoints = array("Q", [data_start])
+        self.line_count = 0  # 已索引的完整行数（以换行符结尾）
+        self.last_line_start = data_start  # 最后一个换行符之后的偏移
+        self._cache_blocks = cache_blocks
+        self._blocks: "OrderedDict[int, Tuple[array, List[str]]]" = OrderedDict()
+
+    def add_newlines(self, offsets: array):
+        """追加索引：只保留落在块边界上的行起始偏移"""
+        if not offsets:
+            return
+        with self._cond:
+            # 最后一个块会变长，丢弃它的缓存
+            self._blocks.pop(len(self.checkpoints) - 1, None)
+            # offsets[j] 是第 line_count + j + 1 行的起始偏移
+            first = -(self.line_count + 1) % self.block_lines
+            self.checkpoints.extend(offsets[first::self.block_lines])
+            self.line_count += len(offsets)
+            self.last_line_start = offsets[-1]
+            self._cond.notify_all()
+
+    def finish(self, end=None):
+        """索引结束：末行没有换行符时计入一行"""
+        end = self.size if end is None else end
+        with self._cond:
+            self._blocks.pop(len(self.checkpoints) - 1, None)
+            self.partial_tail = self.last_line_start < end
+            self.indexed_end = end
+            self.complete = True
+            self._cond.notify_all()
+
+    def _reopen_tail(self):
+        """末行可以继续增长"""
+        self._blocks.pop(len(self.checkpoints) - 1, None)
+        self.partial_tail = False
+
+    def indexed_offset(self) -> int:
+        """已建立索引的字节位置（最后一个换行符之后）"""
+        return self.indexed_end if self.complete else self.last_line_start
+
+    def newline_offsets(self) -> array:
+        """
+        稀疏索引不保存每行偏移，不支持导出稠密行索引（重建要占用与稠密索引相同的内存）
+
+        Raises:
+            NotImplementedError: 总是抛出
+        """
+        raise NotImplementedError("稀疏索引不保存每行偏移，不能导出稠密行索引")
+
+    def memory_usage(self) -> int:
+        """索引占用的字节数"""
+        return self.checkpoints.itemsize * len(self.checkpoints)
+
+    def _block(self, block: int) -> Tuple[array, List[str]]:
+        """
+        扫描并解码一个块
+
+        Returns:
+            (块内各行起始偏移 + 结束偏移, 块内各行内容)
+        """
+        # 加锁：建索引线程可能同时在追加最后一个块
+        with self._cond:
+            cached = self._blocks.get(block)
+            if cached is not None:
+                self._blocks.move_to_end(block)
+                return cached
+            entry = self._scan_block(block)
+            self._blocks[block] = entry
+            while len(self._blocks) > self._cache_blocks:
+                self._blocks.popitem(last=False)
+            return entry
+
+    def _scan_block(self, block: int) -> Tuple[array, List[str]]:
+        """从块的检查点开始扫描换行符，并整块解码"""
+        start = self.checkpoints[block]
+        if block + 1 < len(self.checkpoints):
+            end = self.checkpoints[block + 1]
+        else:
+            end = self.indexed_end if self.partial_tail else self.last_line_start
+
+        if start >= end:
+            return array("Q", [start]), []
+
+        raw = self.read_bytes(start, end)
+        offsets = array("Q", [start])
+        offsets.extend(scan_newlines(raw, start, self.newline))
+        if offsets[-1] < end:
+            offsets.append(end)  # 末行没有换行符
+
+        if raw.endswith(self.newline):
+            raw = raw[:-self.unit]
+        text = raw.decode(self.encoding, errors="replace")
+        lines = [line[:-1] if line.endswith("\r") else line for line in text.split("\n")]
+        return offsets, lines
+
+    def get_line(self, line_number: int) -> str:
+        """获取单行内容（0-based，调用方负责范围检查）"""
+        block, index = divmod(line_number, self.block_lines)
+        return self._block(block)[1][index]
+
+    def get_lines(self, start: int, end: int) -> List[str]:
+        """获取 [start, end) 范围的行，逐块读取"""
+        start = max(0, start)
+        end = min(len(self), end)
+        result: List[str] = []
+        while start < end:
+            block, index = divmod(start, self.block_lines)
+            lines = self._block(block)[1]
+            take = min(end - start, len(lines) - index)
+            if take <= 0:
+                break  # 文件内容与索引不一致
+            result.extend(lines[index:index + take])
+            start += take
+        return result
+
+    def line_offset(self, line_number: int) -> int:
+        """第 line_number 行的起始字节偏移（line_number == len(self) 时为结束位置）"""
+        block, index = divmod(line_number, self.block_lines)
+        if block >= len(self.checkpoints):
+            block, index = block - 1, index + self.block_lines
+        return self._block(block)[0][index]
+
+    def line_at_offset(self, pos: int) -> int:
+        """包含字节偏移 pos 的行号（超出范围时取最近的行）"""
+        if len(self) == 0:
+            return 0
+        block = max(0, bisect_right(self.checkpoints, pos) - 1)
+        offsets = self._block(block)[0]
+        index = max(0, bisect_right(offsets, pos) - 1)
+        return min(block * self.block_lines + index, len(self) - 1)
+
+    def __len__(self) -> int:
+        return self.line_count + (1 if self.partial_tail else 0)
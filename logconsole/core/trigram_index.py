@@ -0,0 +1,367 @@
+"""
+三元组倒排索引 - 按行块记录出现过的字节三元组，重复搜索时只校验候选块
+"""
+import mmap
+import threading
+from array import array
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cancellation import CancellationToken, check_cancelled
+from .regex_literals import case_safe_segments
+from .worker_pool import get_process_pool, reset_process_pool
+
+# 每个索引块的行数：候选块内逐行校验
+INDEX_BLOCK_LINES = 16 * 1024
+
+# 每个工作进程任务处理的块数
+BLOCKS_PER_TASK = 16
+
+# 每个三元组在字典中的固定开销估计（键、bytearray 对象、哈希表槽位）
+TRIGRAM_OVERHEAD = 120
+
+
+def block_trigrams(raw: bytes) -> array:
+    """
+    提取一段字节中各个词内部出现的全部三元组（ASCII 字母统一小写）
+
+    按空白切分后先对词去重，日志中大量重复的词只提取一次；跨越空白的三元组
+    不记录，查询时同样按空白切分查找串（见 query_trigrams）。
+
+    Returns:
+        升序排列的三元组编码 array('I')（三个字节拼成 24 位整数）
+    """
+    # 用换行连接去重后的词：跨词的三元组含有空白字节，查询永远不会用到
+    data = b"\n".join(set(raw.lower().split()))
+    grams = set(zip(data, data[1:], data[2:]))
+    return array("I", sorted((a << 16) | (b << 8) | c for a, b, c in grams))
+
+
+def query_trigrams(needle: bytes) -> set:
+    """查找串按空白切分后各段内部的三元组编码集合（ASCII 字母统一小写）"""
+    grams = set()
+    for word in needle.lower().split():
+        grams.update((a << 16) | (b << 8) | c for a, b, c in zip(word, word[1:], word[2:]))
+    return grams
+
+
+def encode_needles(literals: List[str], encoding: str, ignore_case: bool = False) -> List[bytes]:
+    """
+    把必需字面量编码成可用于索引查询的字节串
+
+    解码替换字符 U+FFFD 不对应文件中的固定字节，会切断片段；忽略大小写时只保留
+    大小写变体全在 ASCII 内的字符（i/k/s 另有非 ASCII 变体）和没有大小写的字符。
+
+    Args:
+        literals: 每个匹配都必然包含的文本片段
+        encoding: 文件编码
+        ignore_case: 是否忽略大小写
+
+    Returns:
+        字节串列表（无法编码时为空列表，表示不能筛选）
+    """
+    segments = [
+        piece
+        for segment in case_safe_segments(literals, ignore_case)
+        for piece in segment.split("\ufffd")
+        if piece
+    ]
+
+    # 带 BOM 的编码（如 utf-16）编码任何字符串都会先输出 BOM
+    bom = len("".encode(encoding))
+    try:
+        return [s.encode(encoding)[bom:] for s in segments]
+    except (UnicodeEncodeError, LookupError):
+        return []
+
+
+def index_blocks(file_path: str, ranges: List[Tuple[int, int]]) -> List[array]:
+    """工作进程：提取各个字节区间的三元组"""
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [block_trigrams(mm[start:end]) for start, end in ranges]
+
+
+def _append_varint(out: bytearray, value: int):
+    """追加一个变长整数（每字节 7 位，最高位表示后面还有字节）"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_postings(buf: bytes) -> List[int]:
+    """解码差分 + 变长整数压缩的块号列表"""
+    blocks = []
+    value = shift = last = 0
+    for byte in buf:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        last += value
+        blocks.append(last)
+        value = shift = 0
+    return blocks
+
+
+class TrigramIndex:
+    """
+    块级三元组倒排索引
+
+    每 block_lines 行为一块，postings[三元组] 为出现过该三元组的块号列表，
+    以差分 + 变长整数压缩存储。索引按块顺序增长，后台建立期间即可查询（只对
+    已建立的块生效）；占用超过 memory_budget 时停止，其余的块搜索时照常扫描。
+    """
+
+    def __init__(self, block_lines: int = INDEX_BLOCK_LINES, memory_budget: int = 64 * 1024 * 1024):
+        """
+        初始化索引
+
+        Args:
+            block_lines: 每块行数
+            memory_budget: 索引内存上限（字节）
+        """
+        self.block_lines = block_lines
+        self.memory_budget = memory_budget
+        self.postings: Dict[int, bytearray] = {}
+        self.block_count = 0  # 已建立索引的块数
+        self.line_count = 0  # 索引覆盖的行数（前 line_count 行，末块可能不满）
+        self.complete = False  # 已覆盖建立时的全部行
+        self.truncated = False  # 因内存上限提前停止
+        self._last_block: Dict[int, int] = {}  # 每个三元组最后记录的块号（差分用）
+        self._posting_bytes = 0
+        self._lock = threading.Lock()
+
+    def memory_usage(self) -> int:
+        """索引占用的内存估计（字节）"""
+        return self._posting_bytes + len(self.postings) * TRIGRAM_OVERHEAD
+
+    def add_block(self, trigrams: Iterable[int], end_line: int) -> bool:
+        """
+        追加下一块的三元组
+
+        Args:
+            trigrams: 该块出现过的三元组编码（不重复）
+            end_line: 该块的结束行号
+
+        Returns:
+            是否已加入（超出内存上限时返回 False，索引停止增长）
+        """
+        with self._lock:
+            if self.memory_usage() >= self.memory_budget:
+                self.truncated = True
+                return False
+            block = self.block_count
+            postings, last_block = self.postings, self._last_block
+            added = 0
+            for gram in trigrams:
+                buf = postings.get(gram)
+                if buf is None:
+                    buf = postings[gram] = bytearray()
+                    delta = block
+                else:
+                    delta = block - last_block[gram]
+                last_block[gram] = block
+                before = len(buf)
+                if delta < 0x80:
+                    buf.append(delta)
+                else:
+                    _append_varint(buf, delta)
+                added += len(buf) - before
+            self._posting_bytes += added
+            self.block_count = block + 1
+            self.line_count = end_line
+            return True
+
+    def candidate_blocks(self, needles: List[bytes]) -> Optional[List[int]]:
+        """
+        包含全部查找串所有三元组的块号（只在已建立索引的块中）
+
+        Args:
+            needles: 必须出现的字节串（不足 3 字节的忽略）
+
+        Returns:
+            候选块号（升序）；没有可用的三元组时返回 None（不能筛选）
+        """
+        grams = set()
+        for needle in needles:
+            grams |= query_trigrams(needle)
+        if not grams:
+            return None
+
+        with self._lock:
+            lists = []
+            for gram in grams:
+                buf = self.postings.get(gram)
+                if buf is None:
+                    return []
+                lists.append(bytes(buf))
+
+        # 从最短的列表开始求交集
+        lists.sort(key=len)
+        candidates = set(decode_postings(lists[0]))
+        for buf in lists[1:]:
+            candidates.intersection_update(decode_postings(buf))
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def candidate_ranges(self, needles: List[bytes], total_lines: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        需要校验的行区间：候选块 + 索引未覆盖的部分
+
+        Returns:
+            [(起始行, 结束行)]；不能筛选时返回 None
+        """
+        covered = min(self.line_count, total_lines)
+        blocks = self.candidate_blocks(needles)
+        if blocks is None:
+            return None
+        ranges = []
+        for block in blocks:
+            start = block * self.block_lines
+            end = min(start + self.block_lines, covered)
+            if start >= end:
+                break
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        if covered < total_lines:
+            ranges.append((covered, total_lines))
+        return ranges
+
+    def build(
+        self,
+        store,
+        cancel_token: Optional[CancellationToken] = None,
+        workers: int = 1,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ):
+        """
+        为行存储建立索引（在后台线程中调用）
+
+        Args:
+            store: 已完成行索引的 LineStore
+            cancel_token: 取消令牌，每块检查一次
+            workers: 工作进程数（1 表示在当前线程中提取三元组）
+            on_progress: 进度回调 (已索引块数, 总块数)
+
+        Raises:
+            OperationCancelled: 被取消（已建立的部分仍可使用）
+        """
+        # 没有换行符的末行在跟随模式下还会变长，留给搜索时照常扫描
+        total_lines = len(store) - (1 if store.partial_tail else 0)
+        total_blocks = -(-total_lines // self.block_lines)
+        first_block = self.block_count
+        ranges = [
+            (store.line_offset(b * self.block_lines),
+             store.line_offset(min((b + 1) * self.block_lines, total_lines)))
+            for b in range(first_block, total_blocks)
+        ]
+
+        def block_end(block: int) -> int:
+            return min((block + 1) * self.block_lines, total_lines)
+
+        if workers > 1 and len(ranges) > BLOCKS_PER_TASK:
+            try:
+                results = self._iter_parallel(store.file_path, ranges, workers)
+                for trigrams in results:
+                    if not self.add_block(trigrams, block_end(self.block_count)):
+                        results.close()
+                        return
+                    if on_progress:
+                        on_progress(self.block_count, total_blocks)
+                    check_cancelled(cancel_token)
+                self.complete = True
+                return
+            except BrokenProcessPool:
+                reset_process_pool()
+                # 已加入的块不再重复提取
+                ranges = ranges[self.block_count - first_block:]
+
+        for start, end in ranges:
+            trigrams = block_trigrams(store.read_bytes(start, end))
+            if not self.add_block(trigrams, block_end(self.block_count)):
+                return
+            if on_progress:
+                on_progress(self.block_count, total_blocks)
+            check_cancelled(cancel_token)
+        self.complete = True
+
+    @staticmethod
+    def _iter_parallel(file_path: str, ranges: List[Tuple[int, int]], workers: int):
+        """多进程提取三元组，按块顺序产出"""
+        pool = get_process_pool(workers)
+        futures = [
+            pool.submit(index_blocks, file_path, ranges[i:i + BLOCKS_PER_TASK])
+            for i in range(0, len(ranges), BLOCKS_PER_TASK)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def export(self) -> Tuple[dict, array, array, array, bytes]:
+        """
+        导出索引内容（持久化用）
+
+        Returns:
+            (计数和参数, 三元组编码 array('I'), 各三元组最后记录的块号 array('I'),
+             各倒排表在拼接数据中的结束位置 array('Q'), 拼接的倒排表)
+        """
+        with self._lock:
+            header = {
+                "block_lines": self.block_lines,
+                "block_count": self.block_count,
+                "line_count": self.line_count,
+                "complete": self.complete,
+                "truncated": self.truncated,
+            }
+            grams = array("I", self.postings)
+            last_blocks = array("I", (self._last_block[gram] for gram in grams))
+            ends = array("Q")
+            data = bytearray()
+            for gram in grams:
+                data += self.postings[gram]
+                ends.append(len(data))
+        return header, grams, last_blocks, ends, bytes(data)
+
+    @classmethod
+    def restore(
+        cls,
+        header: dict,
+        grams: array,
+        last_blocks: array,
+        ends: array,
+        data: bytes,
+        memory_budget: int = 64 * 1024 * 1024
+    ) -> "TrigramIndex":
+        """
+        由 export() 的结果重建索引
+
+        Raises:
+            ValueError: 数据不一致（各数组长度不同、结束位置不递增或超出数据长度）
+        """
+        if not len(grams) == len(last_blocks) == len(ends):
+            raise ValueError("三元组、块号和结束位置的数量不一致")
+        if (ends and ends[-1] != len(data)) or (not ends and data):
+            raise ValueError("倒排表长度与数据长度不一致")
+        if any(ends[i] > ends[i + 1] for i in range(len(ends) - 1)):
+            raise ValueError("倒排表结束位置不递增")
+
+        index = cls(int(header["block_lines"]), memory_budget)
+        index.block_count = int(header["block_count"])
+        index.line_count = int(header["line_count"])
+        index.complete = bool(header["complete"])
+        index.truncated = bool(header["truncated"])
+        start = 0
+        for gram, last_block, end in zip(grams, last_blocks, ends):
+            index.postings[gram] = bytearray(data[start:end])
+            index._last_block[gram] = last_block
+            start = end
+        index._posting_bytes = len(data)
+        return index
@@ -0,0 +1,88 @@
+"""
+共享进程池 - 行索引、并行搜索等 CPU 密集任务复用同一组工作进程
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_guard_pool = None
+_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """默认工作进程数（CPU 核数）"""
+    return max(1, os.cpu_count() or 1)
+
+
+def get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    获取共享进程池，首次调用时创建
+
+    使用 spawn 启动方式：加载线程运行在 Qt 进程中，fork 多线程进程不安全。
+
+    Args:
+        max_workers: 工作进程数（默认 CPU 核数），与现有进程池不同时重建
+
+    Returns:
+        ProcessPoolExecutor
+    """
+    global _pool, _pool_workers
+    workers = max_workers or default_workers()
+    with _lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def reset_process_pool():
+    """丢弃当前进程池（进程池损坏或需要强制终止任务时调用）"""
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+        _pool_workers = 0
+
+
+def get_guard_pool():
+    """
+    获取执行可能失控的正则用的单进程池，首次调用时创建
+
+    multiprocessing.Pool 可以用 terminate() 强制结束正在执行的任务，
+    ProcessPoolExecutor 不行。
+    """
+    global _guard_pool
+    with _lock:
+        if _guard_pool is None:
+            _guard_pool = multiprocessing.get_context("spawn").Pool(1)
+        return _guard_pool
+
+
+def terminate_guard_pool(pool=None):
+    """
+    强制终止正则进程池（超时或取消时工作进程可能仍在回溯）
+
+    Args:
+        pool: 只在当前进程池仍是它时终止（None 表示无条件终止）
+    """
+    global _guard_pool
+    with _lock:
+        if _guard_pool is None or (pool is not None and _guard_pool is not pool):
+            return
+        pool, _guard_pool = _guard_pool, None
+    pool.terminate()
+
+
+atexit.register(reset_process_pool)
+atexit.register(terminate_guard_pool)
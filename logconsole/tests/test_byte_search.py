@@ -0,0 +1,82 @@
+"""
+字节级搜索单元测试
+"""
+import os
+import re
+import tempfile
+
+import pytest
+
+from logconsole.core.byte_search import byte_search_supported, search_raw_block
+from logconsole.core.log_parser import LogParser
+from logconsole.core.parallel_search import search_range
+from logconsole.core.search_engine import SearchEngine, SearchMode
+
+
+def sample_lines():
+    """中英文混合的示例日志行（含 GBK 尾字节与 ASCII 重叠的 "丂"）"""
+    lines = []
+    for i in range(5000):
+        if i % 100 == 0:
+            lines.append(f"[{i}] 丂x 设备-{i % 7} 状态=失败 Timeout")
+        elif i % 10 == 0:
+            lines.append(f"[{i}] @x 设备-{i % 7} ERROR 超时 timeout\r")
+        else:
+            lines.append(f"[{i}] 中文日志 robot-{i % 7} INFO ok")
+    return lines
+
+
+class TestByteSearch:
+    """原始字节上的搜索测试类"""
+
+    @pytest.fixture(params=["utf-8", "gbk"])
+    def loaded(self, request):
+        """按给定编码写入示例日志并加载"""
+        lines = sample_lines()
+        with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".log") as f:
+            f.write("\n".join(lines).encode(request.param))
+        parser = LogParser()
+        parser.load(f.name)
+        yield parser.lines, [line.rstrip("\r") for line in lines]
+        parser.close()
+        os.unlink(f.name)
+
+    @pytest.mark.parametrize("pattern,mode,case_sensitive", [
+        ("@x", SearchMode.PLAIN, True),
+        ("timeout", SearchMode.PLAIN, False),
+        ("设备-3", SearchMode.PLAIN, True),
+        (r"设备-\d \w+", SearchMode.REGEX, True),
+        (r"robot-[0-2] INFO", SearchMode.REGEX, True),
+        (r"\[\d+\] 丂", SearchMode.REGEX, True),
+        ("(?i)error.*超时", SearchMode.REGEX, True),
+    ])
+    def test_matches_decoded_search(self, loaded, pattern, mode, case_sensitive):
+        """测试字节级搜索与逐行解码搜索结果一致（列号为字符位置）"""
+        store, lines = loaded
+        assert byte_search_supported(store)
+        expected = SearchEngine(workers=1).search(lines, pattern, mode, case_sensitive)
+        assert expected
+        assert SearchEngine(workers=1).search(store, pattern, mode, case_sensitive) == expected
+        assert SearchEngine(workers=1).find_next(store, pattern, mode, case_sensitive) == expected[0]
+
+    def test_gbk_straddling_bytes(self):
+        """测试 GBK 尾字节与 ASCII 重叠造成的字节命中被排除"""
+        raw = "丂x\n@x 中文\nok\nok\nok\n".encode("gbk")
+        assert "丂".encode("gbk") == b"\x81@"
+        assert search_raw_block(raw, 10, re.compile("@x"), "gbk") == [(11, 0, 2)]
+        assert search_raw_block(raw, 10, re.compile("中文"), "gbk") == [(11, 3, 5)]
+        # 没有必需字面量或候选行过半时交给调用方解码整块
+        assert search_raw_block(raw, 0, re.compile(r"\w+"), "gbk") is None
+        assert search_raw_block(raw, 0, re.compile("o"), "gbk") is None
+
+    def test_parallel_worker(self, loaded):
+        """测试工作进程在原始字节上搜索"""
+        store, lines = loaded
+        regex = re.compile(r"设备-\d ERROR")
+        found = search_range(
+            store.file_path, store.encoding, store.newline,
+            store.line_offset(100), store.line_offset(len(store)), 100, regex.pattern, regex.flags
+        )
+        assert found == [
+            (n, m.start(), m.end()) for n, line in enumerate(lines) if n >= 100 for m in regex.finditer(line)
+        ]
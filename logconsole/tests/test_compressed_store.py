@@ -0,0 +1,119 @@
+"""
+压缩日志（gzip / bz2 / xz）单元测试
+"""
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+
+import pytest
+
+from logconsole.core.compressed_store import CompressedLineStore, detect_compression
+from logconsole.core.line_store import scan_newlines
+from logconsole.core.log_parser import LogParser
+
+
+def make_lines(count: int) -> bytes:
+    return b"".join(b"%06d event %s\n" % (i, b"x" * (i % 23)) for i in range(count))
+
+
+class TestCompressedStore:
+    """压缩行存储测试类"""
+
+    @pytest.fixture
+    def make_file(self):
+        """按字节内容创建临时文件"""
+        paths = []
+
+        def _make(content: bytes, suffix: str) -> str:
+            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix=suffix) as f:
+                f.write(content)
+                paths.append(f.name)
+            return f.name
+
+        yield _make
+
+        for path in paths:
+            os.unlink(path)
+
+    @pytest.mark.parametrize("compress,suffix,kind", [
+        (gzip.compress, ".gz", "gzip"),
+        (bz2.compress, ".bz2", "bz2"),
+        (lzma.compress, ".xz", "xz"),
+    ])
+    def test_load_compressed(self, make_file, compress, suffix, kind):
+        """测试三种压缩格式的加载和按行读取"""
+        content = make_lines(2000)
+        path = make_file(compress(content), suffix)
+
+        parser = LogParser()
+        result = parser.load(path)
+
+        assert parser.compression == kind
+        assert isinstance(result["lines"], CompressedLineStore)
+        assert result["line_count"] == 2000
+        assert parser.get_line(1234) == content.splitlines()[1234].decode()
+        assert list(parser.lines) == content.decode().splitlines()
+        assert result["file_size"] == len(content)
+
+    def test_detect_plain_file(self, make_file):
+        """测试普通文本不会被识别为压缩文件"""
+        assert detect_compression(make_file(b"plain text\n", ".log")) is None
+
+    def test_gzip_checkpoints_random_access(self, make_file):
+        """测试 gzip 检查点：随机读取与原文一致"""
+        content = make_lines(20000)
+        path = make_file(gzip.compress(content), ".gz")
+
+        store = CompressedLineStore(path, "gzip", checkpoint_interval=16 * 1024, read_block=4096)
+        store.open()
+        for _, base, data in store.stream():
+            store.add_newlines(scan_newlines(data, base))
+        store.finish()
+
+        expected = content.decode().splitlines()
+        assert len(store.checkpoints) > 10
+        assert store.checkpoints[1].state is not None
+        for start in (0, 7777, 15000, 19990, 3):
+            assert store.get_lines(start, start + 10) == expected[start:start + 10]
+        store.close()
+
+    @pytest.mark.parametrize("compress,kind", [(bz2.compress, "bz2"), (lzma.compress, "xz")])
+    def test_single_stream_random_access(self, make_file, compress, kind, monkeypatch):
+        """测试单流 bz2 / xz 的随机读取直接读取建立索引时写入的临时文件，不再从头解压"""
+        content = make_lines(20000)
+        path = make_file(compress(content), "." + kind)
+
+        store = CompressedLineStore(path, kind, read_block=4096)
+        store.open()
+        for _, base, data in store.stream():
+            store.add_newlines(scan_newlines(data, base))
+        store.finish()
+
+        monkeypatch.setattr(store, "_decompress_from", None)
+        expected = content.decode().splitlines()
+        for start in (19990, 7777, 0, 15000):
+            assert store.get_lines(start, start + 10) == expected[start:start + 10]
+        store.close()
+
+    def test_multi_member_gzip(self, make_file):
+        """测试多成员 gzip（分段压缩后拼接）"""
+        part1, part2 = make_lines(100), b"second member\nlast"
+        path = make_file(gzip.compress(part1) + gzip.compress(part2), ".gz")
+
+        parser = LogParser()
+        parser.load(path)
+
+        assert parser.get_line_count() == 102
+        assert parser.get_line(100) == "second member"
+        assert parser.get_line(101) == "last"
+        assert not parser.lines.follow_supported
+
+    def test_compressed_memory_mode(self, make_file):
+        """测试压缩文件在内存模式下的加载"""
+        parser = LogParser(use_mmap=False)
+        result = parser.load(make_file(gzip.compress(b"a\nb\n"), ".gz"))
+
+        assert result["lines"] == ["a", "b"]
+        assert result["file_size"] == 4
@@ -0,0 +1,88 @@
+"""
+FileFollower 单元测试
+"""
+import pytest
+import os
+from logconsole.core.file_follower import FileFollower, FollowEvent
+from logconsole.core.log_parser import LogParser
+
+
+class TestFileFollower:
+    """FileFollower 测试类"""
+
+    @pytest.fixture
+    def log_path(self, tmp_path):
+        """创建示例日志文件"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"line 0\nline 1\n")
+        return str(path)
+
+    @pytest.fixture
+    def follower(self, log_path):
+        """加载文件并创建跟随器"""
+        parser = LogParser()
+        parser.load(log_path)
+        return FileFollower(parser.lines)
+
+    def test_no_change(self, follower):
+        """测试文件未变化"""
+        update = follower.poll()
+        assert update.event == FollowEvent.NONE
+        assert update.line_count == 2
+
+    def test_append(self, follower, log_path):
+        """测试追加内容增量索引"""
+        with open(log_path, "ab") as f:
+            f.write(b"line 2\nline 3\n")
+
+        update = follower.poll()
+        assert update.event == FollowEvent.APPENDED
+        assert update.first_changed_line == 2
+        assert update.line_count == 4
+        assert follower.store[3] == "line 3"
+
+    def test_partial_line_completed(self, follower, log_path):
+        """测试不完整的末行补全后从该行开始重绘"""
+        with open(log_path, "ab") as f:
+            f.write(b"half")
+        update = follower.poll()
+        assert update.line_count == 3
+        assert follower.store[2] == "half"
+
+        with open(log_path, "ab") as f:
+            f.write(b" done\nline 3\n")
+        update = follower.poll()
+        assert update.first_changed_line == 2
+        assert follower.store[2:4] == ["half done", "line 3"]
+
+    def test_burst_split_across_polls(self, log_path):
+        """测试大量写入按字节上限分批索引"""
+        parser = LogParser()
+        parser.load(log_path)
+        follower = FileFollower(parser.lines, max_bytes_per_poll=64)
+
+        with open(log_path, "ab") as f:
+            f.write(b"".join(b"burst %03d\n" % i for i in range(100)))
+
+        polls = 0
+        while follower.poll().event == FollowEvent.APPENDED:
+            polls += 1
+        assert polls > 1
+        assert len(follower.store) == 102
+        assert follower.store[101] == "burst 099"
+
+    def test_truncate_detected(self, follower, log_path):
+        """测试截断（copytruncate）触发重新打开"""
+        with open(log_path, "wb") as f:
+            f.write(b"new\n")
+
+        assert follower.poll().event == FollowEvent.RESET
+
+    def test_rotation_detected(self, follower, log_path):
+        """测试 logrotate 改名后新建文件（inode 变化）"""
+        os.rename(log_path, log_path + ".1")
+        assert follower.poll().event == FollowEvent.NONE
+
+        with open(log_path, "wb") as f:
+            f.write(b"line 0\nline 1\nline 2\n")
+        assert follower.poll().event == FollowEvent.RESET
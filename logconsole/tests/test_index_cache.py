@@ -0,0 +1,100 @@
+"""
+IndexCache 单元测试
+"""
+import pytest
+import os
+import tempfile
+from logconsole.core.index_cache import IndexCache
+from logconsole.core.log_parser import LogParser
+
+
+class TestIndexCache:
+    """IndexCache 测试类"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """使用临时目录的缓存，不限制最小文件大小"""
+        return IndexCache(cache_dir=str(tmp_path / "cache"), min_file_size=0)
+
+    @pytest.fixture
+    def log_file(self):
+        """创建示例日志文件"""
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.log') as f:
+            for i in range(1000):
+                f.write(f"2024-12-16 10:00:00 INFO line {i}\n")
+            file_path = f.name
+
+        yield file_path
+
+        os.unlink(file_path)
+
+    def test_reopen_hits_cache(self, cache, log_file):
+        """测试再次打开文件时命中缓存"""
+        LogParser(index_cache=cache).load(log_file)
+
+        cached = cache.lookup(log_file)
+        assert cached is not None
+        assert cached.complete
+
+        progress_calls = []
+        parser = LogParser(index_cache=cache)
+        result = parser.load(log_file, on_progress=lambda br, tb: progress_calls.append(br))
+        assert result["line_count"] == 1000
+        assert parser.get_line(999) == "2024-12-16 10:00:00 INFO line 999"
+        assert progress_calls == [os.path.getsize(log_file)]
+
+    def test_grown_file_indexes_only_appended_bytes(self, cache, log_file):
+        """测试文件增长后只索引新增部分"""
+        LogParser(index_cache=cache).load(log_file)
+
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write("partial")
+        cached = cache.lookup(log_file)
+        assert cached is not None
+        assert not cached.complete
+
+        result = LogParser(index_cache=cache).load(log_file)
+        assert result["line_count"] == 1001
+        assert result["lines"][1000] == "partial"
+
+        # 末行补全后续建索引，半行不能被拆成两行
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(" done\nnext\n")
+        parser = LogParser(index_cache=cache)
+        result = parser.load(log_file)
+        assert result["line_count"] == 1002
+        assert parser.get_lines(1000, 1002) == ["partial done", "next"]
+
+    def test_rewritten_file_misses_cache(self, cache, log_file):
+        """测试头部内容变化时缓存失效"""
+        LogParser(index_cache=cache).load(log_file)
+
+        with open(log_file, "r+b") as f:
+            f.write(b"X")
+        os.utime(log_file, ns=(0, 0))
+
+        assert cache.lookup(log_file) is None
+
+    def test_truncated_file_misses_cache(self, cache, log_file):
+        """测试文件被截断时缓存失效"""
+        LogParser(index_cache=cache).load(log_file)
+
+        with open(log_file, "r+b") as f:
+            f.truncate(100)
+
+        assert cache.lookup(log_file) is None
+
+    def test_evict_by_size(self, tmp_path, log_file):
+        """测试超过容量时淘汰缓存"""
+        cache = IndexCache(cache_dir=str(tmp_path / "cache"), min_file_size=0, max_bytes=0)
+        LogParser(index_cache=cache).load(log_file)
+
+        assert cache.lookup(log_file) is None
+        assert list((tmp_path / "cache").glob("*.idx")) == []
+
+    def test_small_file_not_cached(self, tmp_path, log_file):
+        """测试小文件不写缓存"""
+        cache = IndexCache(cache_dir=str(tmp_path / "cache"))
+        LogParser(index_cache=cache).load(log_file)
+
+        assert not (tmp_path / "cache").exists()
@@ -0,0 +1,126 @@
+"""
+KeywordMatcher 单元测试
+"""
+import random
+import re
+
+import pytest
+
+from logconsole.core.keyword_matcher import KeywordMatcher
+from logconsole.core.regex_literals import literal_alternatives
+from logconsole.core.search_engine import SearchEngine, SearchMode, grep_lines
+
+
+class TestKeywordMatcher:
+    """多关键词匹配器测试类"""
+
+    def test_finditer_reports_keyword(self):
+        """测试一次扫描报告每个命中及对应的关键词，同一位置取最长"""
+        matcher = KeywordMatcher(["robot-01", "robot-012", "ERROR", "错误"], ignore_case=True)
+        text = "robot-012 error robot-01x 发生错误"
+
+        hits = [(text[s:e], matcher.keywords[i]) for s, e, i in matcher.finditer(text)]
+        assert hits == [
+            ("robot-012", "robot-012"), ("error", "ERROR"), ("robot-01", "robot-01"), ("错误", "错误")
+        ]
+        assert matcher.search("xx ROBOT-01")
+        assert not KeywordMatcher(["robot"]).search("ROBOT")
+
+    def test_duplicates_and_special_characters(self):
+        """测试重复、空关键词和正则特殊字符"""
+        matcher = KeywordMatcher(["a.b", "", "A.B", "(x)", "a.b"], ignore_case=True)
+
+        assert matcher.keywords == ["a.b", "(x)"]
+        assert not matcher.search("aXb")
+        assert [i for _, _, i in matcher.finditer("A.B (x)")] == [0, 1]
+        assert not KeywordMatcher([]).search("anything")
+
+    def test_matches_per_keyword_search(self):
+        """测试与逐个关键词查找的命中行一致"""
+        rng = random.Random(7)
+        keywords = [f"robot-{i:03d}" for i in range(0, 1000, 7)] + ["Container-D-08"]
+        lines = [f"{rng.randint(0, 999)} robot-{rng.randint(0, 999):03d} container-d-{rng.randint(0, 9):02d}"
+                 for _ in range(3000)]
+
+        expected = [i for i, line in enumerate(lines) if any(k in line for k in keywords)]
+        assert grep_lines(lines, keywords) == expected
+        assert grep_lines(lines, []) == []
+        assert grep_lines(lines[:3], ["", "zzz"]) == [0, 1, 2]
+
+        matcher = KeywordMatcher(keywords, ignore_case=True)
+        lowered = [k.lower() for k in keywords]
+        assert [i for i, line in enumerate(lines) if matcher.search(line)] == \
+            [i for i, line in enumerate(lines) if any(k in line.lower() for k in lowered)]
+
+    def test_literal_alternatives(self):
+        """测试识别纯文本分支"""
+        assert literal_alternatives(r"robot\-01|robot-02") == ["robot-01", "robot-02"]
+        assert literal_alternatives(r"(a|b)") is None
+        assert literal_alternatives(r"a\|b") is None
+        assert literal_alternatives(r"a+|b") is None
+        assert literal_alternatives(r"(?i)a|b") is None
+
+    def test_search_engine_alternation(self):
+        """测试正则纯文本分支走前缀树正则，结果与原正则一致；分支互为前缀时保持原正则"""
+        lines = ["id-1 id-12 ID-2", "none", "xid-3"]
+        pattern = "id-1|id-2|id-3"
+
+        assert SearchEngine._keyword_regex(pattern, re.IGNORECASE) is not None
+        assert SearchEngine._keyword_regex("ab|abc", 0) is None
+        for case_sensitive in (True, False):
+            expected = [
+                (n, m.start(), m.end())
+                for n, line in enumerate(lines)
+                for m in re.finditer(pattern, line, 0 if case_sensitive else re.IGNORECASE)
+            ]
+            engine = SearchEngine(workers=1)
+            assert engine.search(lines, pattern, SearchMode.REGEX, case_sensitive) == expected
+
+    @staticmethod
+    def _paint(text, spans):
+        """按顺序把命中涂到每个字符上，返回每个字符最终的关键词下标（后面的覆盖前面的）"""
+        painted = [None] * len(text)
+        for start, end, index in spans:
+            painted[start:end] = [index] * (end - start)
+        return painted
+
+    @pytest.mark.parametrize("keywords", [
+        ["ERROR", "ERROR_CODE"],
+        ["ERROR_CODE", "error"],
+        ["time", "timeout", "meout"],
+        ["out", "timeout", "Time", "o"],
+        ["robot-01", "robot-02", "ok"],
+        ["ſa", "s", "SAS"],
+        ["σς", "Σ", "\u212a", "ok"],
+        ["aa", "a"],
+    ])
+    def test_finditer_each_matches_per_keyword(self, keywords):
+        """测试重叠、嵌套的关键词各自的命中与逐个关键词 finditer 的结果（含顺序）相同"""
+        rng = random.Random(3)
+        pieces = ["ERROR", "error_code", "ERROR_CODE", "timeout", "TIME", "meout", "robot-01", "robot-02",
+                  "ok", "ſa", "SA", "aaa", "ςσ", "\u212a", "K", " ", "x"]
+        lines = ["".join(rng.choice(pieces) for _ in range(12)) for _ in range(300)]
+        matcher = KeywordMatcher(keywords, ignore_case=True)
+
+        for line in lines:
+            expected = [
+                (m.start(), m.end(), i)
+                for i, keyword in enumerate(keywords)
+                for m in re.finditer(re.escape(keyword), line, re.IGNORECASE)
+            ]
+            assert matcher.finditer_each(line) == expected
+
+    def test_finditer_each_single_scan(self, monkeypatch):
+        """测试大量互为前缀的关键词（robot-1 ~ robot-200）一次扫描报告全部命中，不逐个关键词匹配"""
+        keywords = [f"robot-{i}" for i in range(1, 201)]
+        matcher = KeywordMatcher(keywords, ignore_case=True)
+        monkeypatch.setattr(matcher, "_keyword_regex", None)
+        line = "robot-1 ROBOT-123 robot-20x robot-2000"
+
+        expected = [
+            (m.start(), m.end(), i)
+            for i, keyword in enumerate(keywords)
+            for m in re.finditer(re.escape(keyword), line, re.IGNORECASE)
+        ]
+        assert matcher.finditer_each(line) == expected
+        assert [line[s:e] for s, e, _ in expected].count("robot-2") == 2
@@ -0,0 +1,267 @@
+"""
+LineStore 单元测试
+"""
+import pytest
+import os
+import tempfile
+from logconsole.core.line_store import LineStore, LineSubset, scan_newlines
+from logconsole.core.log_parser import LogParser
+
+
+class TestLineStore:
+    """LineStore 测试类"""
+
+    @pytest.fixture
+    def make_file(self):
+        """按字节内容创建临时文件"""
+        paths = []
+
+        def _make(content: bytes) -> str:
+            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.log') as f:
+                f.write(content)
+                paths.append(f.name)
+            return f.name
+
+        yield _make
+
+        for path in paths:
+            os.unlink(path)
+
+    def test_scan_newlines(self):
+        """测试换行符扫描返回下一行起始偏移"""
+        assert list(scan_newlines(b"ab\ncd\n\nx", 100)) == [103, 106, 107]
+        assert list(scan_newlines(b"no newline", 0)) == []
+
+    def test_crlf_and_missing_trailing_newline(self, make_file):
+        """测试 CRLF 行尾和末行无换行符"""
+        parser = LogParser(chunk_size=4)
+        result = parser.load(make_file(b"first\r\nsecond\r\nthird"))
+
+        assert isinstance(result["lines"], LineStore)
+        assert result["line_count"] == 3
+        assert parser.get_lines(0, 3) == ["first", "second", "third"]
+
+    def test_slice_and_negative_index(self, make_file):
+        """测试切片和负下标"""
+        parser = LogParser()
+        parser.load(make_file(b"".join(b"line %d\n" % i for i in range(100))))
+        lines = parser.lines
+
+        assert len(lines) == 100
+        assert lines[-1] == "line 99"
+        assert lines[10:13] == ["line 10", "line 11", "line 12"]
+        assert lines[::50] == ["line 0", "line 50"]
+        with pytest.raises(IndexError):
+            lines[100]
+
+    def test_iteration(self, make_file):
+        """测试迭代按需解码所有行"""
+        parser = LogParser()
+        parser.load(make_file(b"".join(b"row %d\n" % i for i in range(10000))))
+
+        assert list(parser.lines) == [f"row {i}" for i in range(10000)]
+
+    def test_utf8_bom_skipped(self, make_file):
+        """测试 UTF-8 BOM 不出现在首行内容中"""
+        parser = LogParser()
+        parser.load(make_file(b"\xef\xbb\xbf" + "中文日志\n第二行\n".encode("utf-8")))
+
+        assert parser.get_line(0) == "中文日志"
+        assert parser.get_line(1) == "第二行"
+
+    def test_gbk_decoding(self, make_file):
+        """测试 GBK 文件按行解码"""
+        parser = LogParser()
+        parser.load(make_file("错误: 连接失败\n正常\n".encode("gbk")))
+
+        assert parser.encoding == "gbk"
+        assert parser.get_line(0) == "错误: 连接失败"
+
+    def test_memory_mode(self, make_file):
+        """测试关闭 mmap 时回退到 List[str]"""
+        parser = LogParser(use_mmap=False)
+        result = parser.load(make_file(b"a\nb\n"))
+
+        assert isinstance(result["lines"], list)
+        assert result["lines"] == ["a", "b"]
+
+    def test_parallel_index_matches_sequential(self, make_file, monkeypatch):
+        """测试多进程建索引与单线程结果一致"""
+        from logconsole.core import parallel_index, log_parser
+        monkeypatch.setattr(parallel_index, "MIN_RANGE_SIZE", 1000)
+        monkeypatch.setattr(log_parser, "FIRST_SCREEN_BYTES", 100)
+
+        content = b"".join(b"entry %d %s\n" % (i, b"x" * (i % 37)) for i in range(5000)) + b"tail"
+        path = make_file(content)
+
+        sequential = LogParser(workers=1)
+        sequential.load(path)
+
+        progress_calls = []
+        parallel = LogParser(workers=2, parallel_threshold=0, chunk_size=512)
+        parallel.load(path, on_progress=lambda br, tb: progress_calls.append(br))
+
+        assert parallel.lines.offsets == sequential.lines.offsets
+        assert parallel.get_line(5000) == "tail"
+        assert len(progress_calls) > 1
+        assert progress_calls == sorted(progress_calls)
+        assert progress_calls[-1] == len(content)
+
+    def test_on_ready_before_index_complete(self, make_file, monkeypatch):
+        """测试首屏回调在索引完成前触发，之后行数继续增长"""
+        from logconsole.core import log_parser
+        monkeypatch.setattr(log_parser, "FIRST_SCREEN_BYTES", 64)
+
+        ready_states = []
+
+        def on_ready(store):
+            ready_states.append((len(store), store.complete, store[0]))
+
+        parser = LogParser(chunk_size=256)
+        result = parser.load(make_file(b"".join(b"line %d\n" % i for i in range(1000))), on_ready=on_ready)
+
+        count, complete, first_line = ready_states[0]
+        assert 0 < count < 1000
+        assert not complete
+        assert first_line == "line 0"
+        assert result["lines"].complete
+        assert result["lines"].wait_for_lines(1000, timeout=0)
+        assert not result["lines"].wait_for_lines(1001, timeout=0)
+
+    def test_only_lf_splits_lines(self, make_file):
+        """测试只按 \\n / \\r\\n 分行，\\x0b、\\x1c、\\u2028 不视为换行（与 wc -l 一致）"""
+        content = "a\x0bb\x1cc d\r\ne\n".encode("utf-8")
+        for use_mmap in (True, False):
+            parser = LogParser(use_mmap=use_mmap)
+            parser.load(make_file(content))
+
+            assert parser.get_line_count() == content.count(b"\n")
+            assert parser.get_line(0) == "a\x0bb\x1cc d"
+
+    def test_memory_mode_line_across_chunks(self, make_file):
+        """测试内存模式下跨块的行不会被拆开"""
+        parser = LogParser(use_mmap=False, chunk_size=3)
+        parser.load(make_file(b"hello\r\nworld\nend"))
+
+        assert parser.lines == ["hello", "world", "end"]
+
+    @pytest.mark.parametrize("encoding,bom", [
+        ("utf-16-le", b"\xff\xfe"),
+        ("utf-16-be", b"\xfe\xff"),
+        ("utf-32-le", b"\xff\xfe\x00\x00"),
+    ])
+    def test_utf16_utf32_line_store(self, make_file, encoding, bom):
+        """测试 UTF-16 / UTF-32 文件使用字节行索引，换行符按码元对齐"""
+        text = "".join(f"第 {i} 行\r\n" for i in range(500)) + "末行"
+        parser = LogParser(chunk_size=101)
+        result = parser.load(make_file(bom + text.encode(encoding)))
+
+        assert parser.encoding == encoding
+        assert isinstance(result["lines"], LineStore)
+        assert result["line_count"] == 501
+        assert parser.get_line(0) == "第 0 行"
+        assert parser.get_lines(498, 501) == ["第 498 行", "第 499 行", "末行"]
+
+    def test_utf16_misaligned_newline_bytes(self, make_file):
+        """测试 UTF-16 中跨码元拼出的 0A 00 不被当作换行"""
+        # U+0A41 U+0100 的 LE 编码为 41 0A 00 01，奇数偏移处出现 0A 00
+        text = "ੁĀ\nnext\n"
+        assert list(scan_newlines(text.encode("utf-16-le"), 0, b"\n\x00")) == [6, 16]
+
+        parser = LogParser()
+        parser.load(make_file(b"\xff\xfe" + text.encode("utf-16-le")))
+        assert parser.lines[:] == ["ੁĀ", "next"]
+
+    def test_utf16_without_bom_detected(self, make_file):
+        """测试无 BOM 的 UTF-16 LE 日志被识别"""
+        parser = LogParser()
+        parser.load(make_file("INFO started\nERROR failed\n".encode("utf-16-le")))
+
+        assert parser.encoding == "utf-16-le"
+        assert parser.get_line(1) == "ERROR failed"
+
+    def test_estimate_line_count(self, make_file):
+        """测试采样估算的行数与实际行数接近"""
+        content = b"".join(b"%08d %s\n" % (i, b"x" * (i % 40)) for i in range(200000))
+        estimate = LogParser().estimate_line_count(make_file(content))
+
+        assert abs(estimate - 200000) < 200000 * 0.05
+
+    def test_estimate_while_indexing(self, make_file):
+        """测试索引未完成时按已索引行数 + 剩余字节估算，完成后为精确值"""
+        store = LineStore(make_file(b"abc\n" * 1000))
+        store.open()
+        store.sample_line_density()
+        store.add_newlines(scan_newlines(store.read_bytes(0, 400), 0))
+
+        assert len(store) == 100
+        assert store.estimated_total_lines() == 1000
+        store.add_newlines(scan_newlines(store.read_bytes(400, store.size), 400))
+        store.finish()
+        assert store.estimated_total_lines() == 1000
+        store.close()
+
+    def test_read_lines_at_offset(self, make_file):
+        """测试不依赖索引从任意字节位置对齐到行首读取"""
+        store = LineStore(make_file(b"first\r\nsecond\n\nfourth\nlast"))
+        store.open()
+
+        assert store.read_lines_at(0, 2) == ["first", "second"]
+        assert store.read_lines_at(3, 3) == ["second", "", "fourth"]
+        assert store.read_lines_at(7, 1) == ["second"]
+        assert store.read_lines_at(15, 10) == ["fourth", "last"]
+        assert store.read_lines_at(24, 5) == []
+        assert store.next_line_start(8) == 14
+        store.close()
+
+    def test_tail_offset(self, make_file):
+        """测试从文件末尾向前扫描定位最后几行"""
+        content = b"".join(b"line %d\n" % i for i in range(50000))
+        store = LineStore(make_file(content))
+        store.open()
+
+        assert store.read_lines_at(store.tail_offset(3), 3) == ["line 49997", "line 49998", "line 49999"]
+        # 需要的行数超出首个 64KB 窗口时扩大窗口
+        assert store.read_lines_at(store.tail_offset(20000), 1) == ["line 30000"]
+        assert store.tail_offset(10 ** 6) == 0
+        store.close()
+
+    def test_tail_offset_without_trailing_newline(self, make_file):
+        """测试末行没有换行符和 UTF-16 文件的末尾定位"""
+        store = LineStore(make_file(b"a\nb\n\nlast"))
+        store.open()
+        assert store.read_lines_at(store.tail_offset(2), 2) == ["", "last"]
+        store.close()
+
+        store = LineStore(make_file(b"\xff\xfe" + "一\n二\n三\n".encode("utf-16-le")), "utf-16-le", 2)
+        store.open()
+        assert store.read_lines_at(store.tail_offset(2), 5) == ["二", "三"]
+        assert store.tail_offset(5) == 2
+        store.close()
+
+    def test_open_at_tail_ready_before_scan(self, make_file):
+        """测试 open_at_tail 模式在扫描任何换行符之前回调 on_ready"""
+        ready_counts = []
+        parser = LogParser()
+        parser.load(
+            make_file(b"".join(b"line %d\n" % i for i in range(1000))),
+            on_ready=lambda store: ready_counts.append((len(store), store.read_lines_at(store.tail_offset(1), 1))),
+            open_at_tail=True
+        )
+
+        assert ready_counts == [(0, ["line 999"])]
+        assert parser.get_line_count() == 1000
+
+    def test_line_subset(self, make_file):
+        """测试行子集按原行号从行存储读取"""
+        parser = LogParser()
+        parser.load(make_file(b"".join(b"line %d\n" % i for i in range(100))))
+        store = parser.lines
+        subset = LineSubset(store, [3, 50, 51, 99])
+
+        assert len(subset) == 4
+        assert subset[1] == "line 50" and subset[-1] == "line 99"
+        assert subset[1:3] == ["line 50", "line 51"]
+        assert list(subset) == ["line 3", "line 50", "line 51", "line 99"]
+        assert subset.source_line(2) == 51
+        parser.close()
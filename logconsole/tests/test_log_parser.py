@@ -5,6 +5,7 @@ import pytest
 import os
 import tempfile
 from logconsole.core.log_parser import LogParser
+from logconsole.core.cancellation import CancellationToken, OperationCancelled
 
 
 class TestLogParser:
@@ -125,3 +126,30 @@ class TestLogParser:
             assert len(result["lines"]) == 0
         finally:
             os.unlink(file_path)
+
+    @pytest.mark.parametrize("use_mmap", [True, False])
+    def test_cancel_during_load(self, use_mmap):
+        """测试加载在下一个块结束时响应取消，并释放行存储"""
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.log') as f:
+            for i in range(10000):
+                f.write(f"Line {i}\n")
+            file_path = f.name
+
+        token = CancellationToken()
+        progress_calls = []
+        ready_stores = []
+
+        def on_progress(bytes_read, total_bytes):
+            progress_calls.append(bytes_read)
+            token.cancel()
+
+        parser = LogParser(chunk_size=1024, use_mmap=use_mmap)
+        try:
+            with pytest.raises(OperationCancelled):
+                parser.load(file_path, on_progress=on_progress, on_ready=ready_stores.append, cancel_token=token)
+            assert len(progress_calls) == 1
+            assert parser.lines == []
+            for store in ready_stores:
+                assert store._mm is None and store._file is None
+        finally:
+            os.unlink(file_path)
@@ -0,0 +1,44 @@
+"""
+MatchList 单元测试
+"""
+import pickle
+
+from logconsole.core.match_list import MatchList
+
+
+class TestMatchList:
+    """匹配结果列存储测试类"""
+
+    def test_sequence_access(self):
+        """测试下标、切片、迭代与列表一致"""
+        tuples = [(0, 1, 3), (0, 5, 7), (2, 0, 4), (9, 2, 3)]
+        matches = MatchList(tuples)
+
+        assert len(matches) == 4
+        assert matches[1] == (0, 5, 7)
+        assert matches[-1] == (9, 2, 3)
+        assert matches[1:3] == tuples[1:3]
+        assert list(matches) == tuples
+        assert matches == tuples
+        assert not MatchList()
+
+    def test_extend_by_columns(self):
+        """测试整段追加另一个 MatchList，以及序列化（进程间传递）"""
+        matches = MatchList([(0, 0, 1)])
+        matches.extend(MatchList([(1, 2, 3), (4, 5, 6)]))
+        matches.append(7, 0, 2)
+
+        assert matches == [(0, 0, 1), (1, 2, 3), (4, 5, 6), (7, 0, 2)]
+        assert pickle.loads(pickle.dumps(matches)) == matches
+        assert matches.memory_usage() == 16 * 4
+
+    def test_lookup_by_line(self):
+        """测试按行号二分查找和按行分组"""
+        matches = MatchList([(1, 0, 1), (3, 0, 1), (3, 4, 5), (3, 8, 9), (6, 0, 2)])
+
+        assert matches.index_at_line(0) == 0
+        assert matches.index_at_line(2) == 1
+        assert matches.index_at_line(7) == 5
+        assert matches.line_range(3) == (1, 4)
+        assert matches.line_range(4) == (4, 4)
+        assert list(matches.line_groups()) == [(1, 0, 1), (3, 1, 4), (6, 4, 5)]
@@ -0,0 +1,84 @@
+"""
+读取流水线单元测试
+"""
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from logconsole.core.log_parser import LogParser
+from logconsole.core.read_pipeline import BandwidthLimiter, BlockReader
+
+
+class TestReadPipeline:
+    """读取流水线测试类"""
+
+    @pytest.fixture
+    def make_file(self):
+        """按字节内容创建临时文件"""
+        paths = []
+
+        def _make(content: bytes) -> str:
+            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.log') as f:
+                f.write(content)
+                paths.append(f.name)
+            return f.name
+
+        yield _make
+
+        for path in paths:
+            os.unlink(path)
+
+    def test_blocks_in_order(self, make_file):
+        """测试各块按顺序产出，拼起来与文件内容一致"""
+        content = os.urandom(100_000)
+        path = make_file(content)
+
+        blocks = list(BlockReader(path, 10, len(content), 4096))
+
+        assert [pos for pos, _ in blocks] == list(range(10, len(content), 4096))
+        assert b"".join(data for _, data in blocks) == content[10:]
+
+    def test_early_exit_stops_reader(self, make_file):
+        """测试调用方提前结束时读线程随之退出"""
+        path = make_file(b"x" * 100_000)
+        before = threading.active_count()
+
+        reader = iter(BlockReader(path, 0, 100_000, 1024, prefetch=1))
+        next(reader)
+        reader.close()
+
+        assert threading.active_count() == before
+
+    def test_read_error_propagates(self, make_file):
+        """测试读线程中的异常在调用方抛出"""
+        path = make_file(b"abc")
+        reader = BlockReader(path, 0, 3, 1)
+        reader.block_size = -1  # os.pread 长度为负时报错
+
+        with pytest.raises((ValueError, OSError)):
+            list(reader)
+
+    def test_bandwidth_limiter(self):
+        """测试令牌桶限速：超出突发量的部分按速率等待"""
+        limiter = BandwidthLimiter(200_000, burst=10_000)
+        started = time.monotonic()
+        for _ in range(5):
+            limiter.consume(10_000)
+
+        assert time.monotonic() - started >= 0.15
+
+    def test_parser_with_bandwidth_limit(self, make_file):
+        """测试限速、不丢弃页缓存时索引结果不变"""
+        content = b"".join(b"line %d\n" % i for i in range(20000))
+        path = make_file(content)
+
+        reference = LogParser(workers=1)
+        reference.load(path)
+        limited = LogParser(chunk_size=4096, read_bandwidth=50 * 1024 * 1024, drop_behind=False)
+        limited.load(path)
+
+        assert limited.lines.offsets == reference.lines.offsets
+        assert limited.get_line(19999) == "line 19999"
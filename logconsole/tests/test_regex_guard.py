@@ -0,0 +1,85 @@
+"""
+正则执行预算单元测试
+"""
+import re
+import time
+
+import pytest
+
+from logconsole.core.literal_search import search_block
+from logconsole.core.regex_guard import (
+    HighlightBudget, RegexBudgetExceeded, backtracking_risk, bounded_search_block
+)
+from logconsole.core.search_engine import SearchEngine, SearchMode
+from logconsole.core.worker_pool import get_guard_pool
+
+
+class TestRegexGuard:
+    """回溯风险检查与受限执行测试类"""
+
+    @pytest.mark.parametrize("pattern,risky", [
+        (r"(a+)+b", True),
+        (r"(\w+\s?)*$", True),
+        (r"(.*,)*x", True),
+        (r"(?i)(?:A+a)+", True),
+        (r"(a|aa)*b", True),
+        (r"(a|a)*$", True),
+        (r"(\w|\d)+x", True),
+        (r"([^,]+,)*x", True),
+        (r"(?:\d+\.)+", False),
+        (r"(?:ab+)+", False),
+        (r"(?:[^,]+,)*x", False),
+        (r"(?:a|b)+c", False),
+        (r"robot=\S+ task=\d+ cost=(\d+)ms", False),
+        (r"[invalid(", False),
+    ])
+    def test_backtracking_risk(self, pattern, risky):
+        """测试识别嵌套的无界重复和重复的分支、捕获分组，被字面量隔开的不算风险"""
+        assert backtracking_risk(pattern) == risky
+
+    def test_budget_exceeded_terminates_worker(self):
+        """测试失控的正则超出预算后抛出异常并终止工作进程，之后的搜索正常"""
+        regex = re.compile(r"(a+)+b")
+        pool = get_guard_pool()
+        start = time.monotonic()
+        with pytest.raises(RegexBudgetExceeded):
+            bounded_search_block(["a" * 40], 0, regex, budget=1.0)
+        assert time.monotonic() - start < 10
+        assert get_guard_pool() is not pool
+
+        lines = ["aab", "xyz", "ab aaab"]
+        assert bounded_search_block(lines, 10, regex) == search_block(lines, 10, regex)
+
+    def test_unflagged_regex_is_bounded(self):
+        """测试静态检查认为安全的正则也在受限进程中执行，失控时同样被终止"""
+        regex = re.compile(r"\w*\w*\w*x")
+        assert not backtracking_risk(regex.pattern)
+        with pytest.raises(RegexBudgetExceeded):
+            bounded_search_block(["a" * 5000], 0, regex, budget=0.5)
+
+    def test_search_engine_guards_risky_regex(self):
+        """测试搜索引擎对有风险的正则使用受限执行，结果与逐行正则一致"""
+        lines = [f"{i} key=value, other=x," for i in range(100)] + ["plain"]
+        pattern = r"(\w+\s?)+,"
+        assert backtracking_risk(pattern)
+        expected = [(n, m.start(), m.end()) for n, line in enumerate(lines) for m in re.finditer(pattern, line)]
+        assert SearchEngine(workers=1).search(lines, pattern, SearchMode.REGEX) == expected
+
+    def test_highlight_budget(self):
+        """测试高亮预算：有风险或超时的规则被禁用并通知，长行只匹配开头"""
+        disabled = []
+        budget = HighlightBudget(lambda name, reason: disabled.append(name), max_line=10)
+
+        assert budget.finditer("risky", re.compile(r"(a+)+b"), "aab") == []
+        assert budget.finditer("branch", re.compile(r"(a|aa)*b"), "a" * 10) == []
+        assert budget.finditer("error", re.compile("E"), "E" * 20) == [(i, i + 1) for i in range(10)]
+        assert disabled == ["risky", "branch"]
+
+        budget.budget = 0
+        budget.finditer("error", re.compile("E"), "E")
+        assert disabled == ["risky", "branch", "error"]
+        assert budget.finditer("error", re.compile("E"), "E") == []
+
+        budget.reset()
+        budget.budget = 1.0
+        assert budget.finditer("error", re.compile("E"), "E") == [(0, 1)]
@@ -0,0 +1,61 @@
+"""
+正则预筛选单元测试
+"""
+import random
+import re
+
+from logconsole.core.literal_search import candidate_lines, search_block
+from logconsole.core.regex_literals import regex_prefilter
+
+
+def per_line(lines, regex, first_line=0):
+    """逐行正则的参考结果"""
+    return [
+        (n, m.start(), m.end())
+        for n, line in enumerate(lines, first_line)
+        for m in regex.finditer(line)
+    ]
+
+
+class TestRegexPrefilter:
+    """必需字面量预筛选测试类"""
+
+    def test_required_needles(self):
+        """测试提取必需片段，长的在前；没有可用片段时返回 None"""
+        assert regex_prefilter(r"robot=\S+ cost=(\d+)ms", 0) == ((" cost=", "robot=", "ms"), False)
+        assert regex_prefilter(r"ERROR.*Timeout", re.IGNORECASE) == (("error", "meout"), True)
+        # 忽略大小写时 i/k/s 有特殊等价字符（İ、K、ſ），在此处断开
+        assert regex_prefilter(r"(?i)task", 0) == (("ta",), True)
+        assert regex_prefilter(r"\d+ms|fail", 0) is None
+        assert regex_prefilter(r"[a-z]+\d", 0) is None
+        assert regex_prefilter(r"x\d", 0) is None
+
+    def test_candidate_lines(self):
+        """测试每个包含片段的行只报告一次"""
+        text = "ab ab\nxx\nab\n\nzab"
+        assert candidate_lines(text, "ab") == [0, 2, 4]
+        assert candidate_lines(text, "zz") == []
+
+    def test_matches_per_line_search(self):
+        """测试预筛选结果与逐行正则一致，包括忽略大小写和行内标志"""
+        rng = random.Random(11)
+        lines = [
+            f"{i} robot={rng.randint(0, 99)} " + rng.choice(["OK", "error: Timeout", "cost=12ms", "İ error"])
+            for i in range(2000)
+        ]
+        for pattern, flags in [
+            (r"error.*timeout", re.IGNORECASE),
+            (r"(?i)ERROR", 0),
+            (r"cost=(\d+)ms", 0),
+            (r"robot=9\d", 0),
+            (r"robot=\d+", 0),  # 每行都命中，走逐行正则
+            (r"nothing here", 0),
+        ]:
+            regex = re.compile(pattern, flags)
+            assert search_block(lines, 100, regex) == per_line(lines, regex, 100), pattern
+
+    def test_embedded_newline_falls_back(self):
+        """测试行内含换行符时退回逐行正则"""
+        lines = ["a\nerror", "error", "ok"]
+        regex = re.compile("error")
+        assert search_block(lines, 0, regex) == [(0, 2, 7), (1, 0, 5)]
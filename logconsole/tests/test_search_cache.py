@@ -0,0 +1,118 @@
+"""
+SearchCache 单元测试
+"""
+import os
+import tempfile
+
+import pytest
+
+from logconsole.core.log_parser import LogParser
+from logconsole.core.match_list import MatchList
+from logconsole.core.search_cache import SearchCache, literal_contains
+from logconsole.core.search_engine import SearchEngine, SearchMode
+
+
+class TestSearchCache:
+    """搜索结果缓存测试类"""
+
+    @pytest.fixture
+    def store(self):
+        """加载示例日志，返回 LineStore"""
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.log') as f:
+            for i in range(2000):
+                f.write(f"{i} robot=container-D-{i % 20:02d} state={'OK' if i % 3 else 'FAIL'}\n")
+            file_path = f.name
+
+        parser = LogParser()
+        parser.load(file_path)
+        yield parser.lines
+
+        parser.close()
+        os.unlink(file_path)
+
+    @staticmethod
+    def forbid_full_scan(monkeypatch):
+        """再出现全量扫描时测试失败"""
+        def fail(*args, **kwargs):
+            raise AssertionError("unexpected full scan")
+        monkeypatch.setattr(SearchEngine, "_search_lines", staticmethod(fail))
+
+    def test_repeated_query_hits_cache(self, store, monkeypatch):
+        """测试相同查询直接返回缓存结果"""
+        engine = SearchEngine(workers=1, cache=SearchCache())
+        first = list(engine.search(store, "FAIL"))
+        assert len(first) == 667
+
+        self.forbid_full_scan(monkeypatch)
+        batches = list(engine.iter_search(store, "FAIL"))
+        assert len(batches) == 1 and batches[0].scanned == len(store)
+        assert engine.matches == first
+        assert engine.current_match_index == -1
+
+    def test_narrowing_rescans_hit_lines(self, store, monkeypatch):
+        """测试细化的查询只重新检查已缓存查询的命中行，结果与全量扫描一致"""
+        expected = SearchEngine(workers=1).search(store, "robot=Container-D-08", case_sensitive=False)
+        engine = SearchEngine(workers=1, cache=SearchCache())
+        engine.search(store, "robot=container", case_sensitive=False)
+
+        self.forbid_full_scan(monkeypatch)
+        assert engine.search(store, "robot=Container-D-08", case_sensitive=False) == expected
+        assert len(expected) == 100
+        # 区分大小写的结果不能用于忽略大小写的查询，反之亦然
+        with pytest.raises(AssertionError):
+            engine.search(store, "robot=container-D-08", case_sensitive=True)
+
+    def test_regex_is_not_narrowed(self, store):
+        """测试正则查询只命中完全相同的缓存"""
+        cache = SearchCache()
+        engine = SearchEngine(workers=1, cache=cache)
+        engine.search(store, "robot")
+        assert cache.narrowing(store, "robot=c", True) is not None
+
+        engine.search(store, r"D-0[0-4]", SearchMode.REGEX)
+        assert cache.get(store, r"D-0[0-4]", True, True) == engine.matches
+        assert cache.get(store, r"D-0[0-4]", False, True) is None
+
+    def test_memory_eviction(self, store):
+        """测试超出内存上限时淘汰最久未用的结果，list 不缓存"""
+        small = MatchList([(0, 0, 1)] * 4)
+        cache = SearchCache(max_bytes=small.memory_usage() * 2)
+        cache.put(store, "a", False, True, small)
+        cache.put(store, "b", False, True, small)
+        cache.get(store, "a", False, True)
+        cache.put(store, "c", False, True, small)
+
+        assert cache.get(store, "b", False, True) is None
+        assert cache.get(store, "a", False, True) is small
+        assert len(cache) == 2 and cache.memory_usage() == small.memory_usage() * 2
+
+        cache.put(["x"], "a", False, True, small)
+        assert cache.get(["x"], "a", False, True) is None
+
+    def test_growing_tail_invalidates(self):
+        """测试跟随模式下不完整的末行变长（行数不变）时不返回过期结果"""
+        with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".log") as f:
+            f.write(b"first\nsecond F")
+            file_path = f.name
+        parser = LogParser()
+        parser.load(file_path)
+        store = parser.lines
+        engine = SearchEngine(workers=1, cache=SearchCache())
+        assert engine.search(store, "FAIL") == []
+
+        with open(file_path, "ab") as f:
+            f.write(b"AIL")
+        assert store.extend() == 1
+        assert len(store) == 2
+        assert engine.search(store, "FAIL") == [(1, 7, 11)]
+        assert engine.search(store, "FAIL x") == []
+
+        parser.close()
+        os.unlink(file_path)
+
+    def test_literal_contains(self):
+        """测试查询包含关系"""
+        assert literal_contains("robot=container-D-08", "robot=container", True)
+        assert not literal_contains("ROBOT=container", "robot", True)
+        assert literal_contains("ROBOT=container", "robot", False)
+        assert not literal_contains("İrobot", "irobot", False)
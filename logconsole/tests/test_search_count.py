@@ -0,0 +1,128 @@
+"""
+只计数搜索单元测试
+"""
+import os
+import re
+import tempfile
+
+import pytest
+
+from logconsole.core.log_parser import LogParser
+from logconsole.core.search_cache import SearchCache
+from logconsole.core.regex_guard import RegexBudgetExceeded, backtracking_risk
+from logconsole.core.search_count import SearchCount, bounded_count_block, time_bucket
+from logconsole.core.search_engine import SearchEngine, SearchMode
+
+
+def expected_count(engine, lines, pattern, mode=SearchMode.PLAIN, case_sensitive=True):
+    """由完整搜索结果得到的参考计数"""
+    matches = engine.search(lines, pattern, mode, case_sensitive)
+    return len(matches), len({line for line, _, _ in matches})
+
+
+class TestSearchCount:
+    """计数 API 测试类"""
+
+    @pytest.fixture
+    def lines(self):
+        """带时间戳的示例日志行（每 10 行一条不带时间戳的续行）"""
+        result = []
+        for i in range(3000):
+            if i % 10 == 9:
+                result.append(f"    at worker.run(error {i})")
+            else:
+                result.append(f"2024-01-01 {i // 1000:02d}:{i % 60:02d}:00 INFO robot-{i % 7} Error error")
+        return result
+
+    @pytest.mark.parametrize("pattern,mode,case_sensitive", [
+        ("error", SearchMode.PLAIN, True),
+        ("error", SearchMode.PLAIN, False),
+        ("robot-3", SearchMode.PLAIN, True),
+        (r"robot-[0-2] \w+", SearchMode.REGEX, True),
+        (r"(\w+\s?)+\)", SearchMode.REGEX, True),  # 有回溯风险，受限执行
+        ("[", SearchMode.REGEX, True),
+    ])
+    def test_matches_search(self, lines, pattern, mode, case_sensitive):
+        """测试计数与完整搜索的匹配数、匹配行数一致"""
+        engine = SearchEngine(workers=1)
+        result = engine.count(lines, pattern, mode, case_sensitive)
+        assert engine.matches == []
+        assert (result.matches, result.lines) == expected_count(engine, lines, pattern, mode, case_sensitive)
+        assert result.buckets == {}
+
+    @pytest.mark.parametrize("needle", ["σ", "ſ", "\u212a"])
+    def test_special_case_folding(self, needle):
+        """测试忽略大小写的非 ASCII 字面量计数与流式搜索结果一致"""
+        lines = [f"{i} ΣσςSsſKk\u212a" for i in range(5000)]
+        engine = SearchEngine(workers=1)
+        expected = sum(len(batch.matches) for batch in engine.iter_search(lines, needle, case_sensitive=False))
+        result = engine.count(lines, needle, case_sensitive=False)
+        assert result.matches == expected and result.lines == 5000
+        assert engine.count_files({"a.log": lines}, needle, case_sensitive=False)["a.log"] == result
+
+    def test_time_buckets(self, lines):
+        """测试按行首时间戳分段统计，没有时间戳的行记在空键下"""
+        result = SearchEngine(workers=1).count(lines, "error", time_bucket="hour")
+
+        assert result.buckets == {"2024-01-01 00": 900, "2024-01-01 01": 900, "2024-01-01 02": 900, "": 300}
+        assert sum(result.buckets.values()) == result.matches
+        assert time_bucket("[2024-01-01T12:34:56.789] x", 16) == "2024-01-01 12:34"
+        assert time_bucket("no time", 13) == ""
+
+    def test_parallel_and_cached(self, lines, monkeypatch):
+        """测试多进程计数与单线程一致；缓存中有完整结果时不再扫描"""
+        from logconsole.core import parallel_search
+        monkeypatch.setattr(parallel_search, "MIN_RANGE_SIZE", 10000)
+
+        with tempfile.NamedTemporaryFile(mode="w", encoding="utf-8", delete=False, suffix=".log") as f:
+            f.write("\n".join(lines))
+        try:
+            parser = LogParser()
+            parser.load(f.name)
+            store = parser.lines
+
+            expected = SearchEngine(workers=1).count(store, "Error", case_sensitive=False, time_bucket="day")
+            parallel = SearchEngine(workers=2, parallel_threshold=0)
+            assert parallel._use_parallel(store)
+            progress = []
+            result = parallel.count(
+                store, "Error", case_sensitive=False, time_bucket="day",
+                on_progress=lambda scanned, total, part: progress.append(scanned)
+            )
+            assert result == expected and progress[-1] == len(store)
+
+            engine = SearchEngine(workers=1, cache=SearchCache())
+            engine.search(store, "robot-3")
+            monkeypatch.setattr(SearchEngine, "_count_ranges", None)
+            cached = engine.count(store, "robot-3", time_bucket="hour")
+            assert (cached.matches, cached.lines) == expected_count(engine, store, "robot-3")
+            assert sum(cached.buckets.values()) == cached.matches
+            parser.close()
+        finally:
+            os.unlink(f.name)
+
+    def test_regex_count_bounded(self, lines):
+        """测试正则计数一律受限执行：行存储上由受限进程读取文件，结果与内存中一致；失控时被终止"""
+        with tempfile.NamedTemporaryFile(mode="w", encoding="utf-8", delete=False, suffix=".log") as f:
+            f.write("\n".join(lines))
+        try:
+            parser = LogParser()
+            parser.load(f.name)
+            pattern = r"robot-[0-2] \w+"
+            expected = SearchEngine(workers=1).count(lines, pattern, SearchMode.REGEX, time_bucket="hour")
+            result = SearchEngine(workers=1).count(parser.lines, pattern, SearchMode.REGEX, time_bucket="hour")
+            assert result == expected
+            parser.close()
+        finally:
+            os.unlink(f.name)
+
+        regex = re.compile(r"\w*\w*\w*x")
+        assert not backtracking_risk(regex.pattern)
+        with pytest.raises(RegexBudgetExceeded):
+            bounded_count_block(["a" * 5000], regex, budget=0.5)
+
+    def test_count_files(self, lines):
+        """测试分别统计多个文件"""
+        counts = SearchEngine(workers=1).count_files({"a.log": lines, "b.log": lines[:10]}, "robot-1")
+        assert counts["a.log"].matches == len([line for line in lines if "robot-1 " in line])
+        assert counts["b.log"] == SearchCount(matches=2, lines=2)
@@ -1,8 +1,16 @@
 """
 SearchEngine 单元测试
 """
+import os
+import random
+import re
+import tempfile
+
 import pytest
-from logconsole.core.search_engine import SearchEngine, SearchMode
+from logconsole.core.literal_search import find_literal
+from logconsole.core.log_parser import LogParser
+from logconsole.core.search_engine import SearchEngine, SearchMode, CANCEL_CHECK_LINES, grep_lines
+from logconsole.core.cancellation import CancellationToken, OperationCancelled
 
 
 class TestSearchEngine:
@@ -144,3 +152,172 @@ class TestSearchEngine:
         matches = engine.search(lines, "$100", SearchMode.PLAIN)
 
         assert len(matches) == 1  # 应该被正确转义
+
+    def test_literal_fast_path_matches_regex(self, engine):
+        """测试字面量快速路径与逐行正则结果一致"""
+        lines = [
+            "aaaa", "", "ERROR 错误 error", "多行\n内容 error", "İstanbul error",
+            "x" * 5000 + "Error", "ÉRROR éRROR", "no hit",
+        ] * 3
+        for pattern in ("aa", "error", "错误", "rror", "érror"):
+            for case_sensitive in (True, False):
+                regex = re.compile(re.escape(pattern), 0 if case_sensitive else re.IGNORECASE)
+                expected = [(i, m.start(), m.end()) for i, line in enumerate(lines) for m in regex.finditer(line)]
+                assert engine.search(lines, pattern, SearchMode.PLAIN, case_sensitive) == expected
+
+    def test_find_literal(self):
+        """测试在多行文本中查找字面量并换算行号和列"""
+        assert find_literal("ab\nxab ab\n\nab", "ab", 10) == [(10, 0, 2), (11, 1, 3), (11, 4, 6), (13, 0, 2)]
+        assert find_literal("Hello\nhELLO", "hello", ignore_case=True) == [(0, 0, 5), (1, 0, 5)]
+        assert find_literal("İ hello", "hello", ignore_case=True) is None  # 小写后长度变化
+
+    @pytest.mark.parametrize("needle", ["σ", "ς", "ſ", "\u212a", "s", "Key"])
+    def test_ignore_case_special_folding(self, needle):
+        """测试忽略大小写的普通文本查找与 re.IGNORECASE 一致（σ/ς/Σ、ſ/s、Kelvin 符号 K/k）"""
+        rng = random.Random(7)
+        alphabet = "σςΣſsSkK\u212aey ab"
+        lines = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(30000)]
+        regex = re.compile(re.escape(needle), re.IGNORECASE)
+        expected = [(i, m.start(), m.end()) for i, line in enumerate(lines) for m in regex.finditer(line)]
+
+        engine = SearchEngine(workers=1)
+        assert engine.search(lines, needle, SearchMode.PLAIN, case_sensitive=False) == expected
+        line = len(lines) // 2
+        nearest = next(m for m in expected if m[0] >= line)
+        assert engine.find_next(lines, needle, case_sensitive=False, line=line) == nearest
+
+    def test_iter_search_streams_batches(self, engine):
+        """测试流式搜索逐块产出结果和进度，扫描完成前即可导航"""
+        lines = ["hit" if i % 1000 == 0 else "miss" for i in range(3 * CANCEL_CHECK_LINES)]
+        batches = engine.iter_search(lines, "hit")
+
+        first = next(batches)
+        assert first.scanned == CANCEL_CHECK_LINES and first.total == len(lines)
+        assert [m[0] for m in first.matches] == [0, 1000, 2000, 3000, 4000]
+        assert engine.searching and engine.get_current_match() is None
+
+        # 进行中：不回绕
+        assert engine.next_match() == (0, 0, 3)
+        for _ in range(10):
+            engine.next_match()
+        assert engine.get_current_match() == (4000, 0, 3)
+        assert engine.prev_match() == (3000, 0, 3)
+
+        rest = list(batches)
+        assert rest[-1].scanned == len(lines)
+        assert not engine.searching
+        assert engine.get_match_count() == len(range(0, len(lines), 1000))
+        assert engine.next_match() == (4000, 0, 3)
+        assert engine.next_match() == (5000, 0, 3)
+
+    def test_cancelled_search(self, engine, sample_lines):
+        """测试已取消的搜索抛出 OperationCancelled 并清空结果"""
+        engine.search(sample_lines, "ERROR")
+        token = CancellationToken()
+        token.cancel()
+
+        with pytest.raises(OperationCancelled):
+            engine.search(sample_lines, "INFO", cancel_token=token)
+        assert engine.matches == []
+        assert engine.get_current_match() is None
+
+    def test_find_next_from_cursor(self, engine, sample_lines):
+        """测试从光标位置向后/向前查找最近的匹配并回绕"""
+        lines = sample_lines + ["ERROR ERROR"]
+
+        assert engine.find_next(lines, "ERROR", line=2) == (5, 20, 25)
+        assert engine.find_next(lines, "ERROR", line=1, column=20) == (1, 20, 25)
+        assert engine.find_next(lines, "ERROR", line=6, column=5) == (6, 6, 11)
+        assert engine.find_next(lines, "ERROR", line=6, column=11) == (1, 20, 25)  # 回绕到开头
+        assert engine.find_next(lines, "ERROR", line=6, column=6, backward=True) == (6, 0, 5)
+        assert engine.find_next(lines, "ERROR", line=1, column=20, backward=True) == (6, 6, 11)  # 回绕到末尾
+        assert engine.find_next(lines, "error", line=3, case_sensitive=False, backward=True) == (1, 20, 25)
+        assert engine.find_next(lines, r"E\w+R", SearchMode.REGEX, line=2) == (5, 20, 25)
+        assert engine.find_next(lines, "FATAL") is None
+        assert engine.find_next(lines, "[", SearchMode.REGEX) is None
+        assert engine.matches == []
+
+    def test_find_next_scans_only_to_first_hit(self, engine, monkeypatch):
+        """测试只扫描到第一个匹配；缓存中有完整结果时不扫描"""
+        from logconsole.core import search_engine
+        from logconsole.core.search_cache import SearchCache
+
+        lines = ["hit" if i % 1000 == 0 else "miss" for i in range(10 * CANCEL_CHECK_LINES)]
+        scanned = []
+        real_search_block = search_engine.bounded_search_block
+
+        def counting_search_block(block, first_line, *args):
+            scanned.append(first_line)
+            return real_search_block(block, first_line, *args)
+
+        monkeypatch.setattr(search_engine, "bounded_search_block", counting_search_block)
+        assert engine.find_next(lines, "hit", line=5 * CANCEL_CHECK_LINES + 1) == (21000, 0, 3)
+        assert scanned == [5 * CANCEL_CHECK_LINES + 1]
+
+        # list 不进缓存，这里直接替换 get 模拟缓存命中
+        cache = SearchCache()
+        full = SearchEngine(workers=1).search(lines, "hit")
+        cache.get = lambda *args: full
+        scanned.clear()
+        cached = SearchEngine(workers=1, cache=cache)
+        assert cached.find_next(lines, "hit", line=40000, column=3) == (0, 0, 3)
+        assert cached.find_next(lines, "hit", line=21000, backward=True) == (20000, 0, 3)
+        assert scanned == []
+
+    def test_iter_search_files(self):
+        """测试并发搜索多个文件：各文件的批次按行号顺序产出，结果与逐个搜索一致"""
+        sources = [
+            [f"line {i} {'ERROR' if i % 3 == 0 else 'INFO'}" for i in range(3 * CANCEL_CHECK_LINES)],
+            ["ERROR a", "INFO b", "ERROR ERROR"],
+            [],
+            ["INFO"],
+        ]
+        engine = SearchEngine(workers=1)
+        found = {index: [] for index in range(len(sources))}
+        scanned = {}
+        for index, batch in engine.iter_search_files(sources, "ERROR"):
+            assert batch.scanned >= scanned.get(index, 0)
+            scanned[index] = batch.scanned
+            found[index].extend(batch.matches)
+
+        assert engine.matches == []
+        for index, lines in enumerate(sources):
+            assert found[index] == SearchEngine(workers=1).search(lines, "ERROR")
+            if lines:
+                assert scanned[index] == len(lines)
+
+    def test_iter_search_files_cancelled(self):
+        """测试取消时停止全部文件的搜索"""
+        token = CancellationToken()
+        sources = [["ERROR"] * (4 * CANCEL_CHECK_LINES) for _ in range(3)]
+        with pytest.raises(OperationCancelled):
+            for _ in SearchEngine(workers=1).iter_search_files(sources, "ERROR", cancel_token=token):
+                token.cancel()
+
+    def test_grep_lines(self, sample_lines):
+        """测试 Grep 按任一关键词过滤行"""
+        assert grep_lines(sample_lines, ["ERROR", "WARN"]) == [1, 2, 5]
+        assert grep_lines(sample_lines, ["FATAL"]) == []
+
+    @pytest.mark.parametrize("encoding,sparse", [("utf-8", False), ("utf-8", True), ("utf-16-le", False)])
+    def test_parallel_search_matches_sequential(self, monkeypatch, encoding, sparse):
+        """测试多进程搜索与单线程结果一致（CRLF、末行无换行、多字节编码、稀疏索引）"""
+        from logconsole.core import parallel_search
+        monkeypatch.setattr(parallel_search, "MIN_RANGE_SIZE", 1000)
+
+        text = "".join(f"{i} Error 错误 error\r\n" if i % 7 == 0 else f"{i} ok\n" for i in range(3000))
+        with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".log") as f:
+            bom = "\ufeff" if encoding != "utf-8" else ""
+            f.write((bom + text + "last error").encode(encoding))
+        try:
+            parser = LogParser(sparse=sparse, sparse_block_lines=64)
+            parser.load(f.name)
+
+            expected = SearchEngine(workers=1).search(parser.lines, "error", case_sensitive=False)
+            parallel = SearchEngine(workers=2, parallel_threshold=0)
+            assert parallel._use_parallel(parser.lines)
+            assert parallel.search(parser.lines, "error", case_sensitive=False) == expected
+            assert expected[-1] == (3000, 5, 10)
+            parser.close()
+        finally:
+            os.unlink(f.name)
@@ -0,0 +1,110 @@
+"""
+SparseLineStore 单元测试
+"""
+import pytest
+import os
+import tempfile
+from logconsole.core.file_follower import FileFollower, FollowEvent
+from logconsole.core.index_cache import IndexCache
+from logconsole.core.log_parser import LogParser
+from logconsole.core.sparse_line_store import SparseLineStore
+
+
+class TestSparseLineStore:
+    """SparseLineStore 测试类"""
+
+    @pytest.fixture
+    def make_file(self):
+        """按字节内容创建临时文件"""
+        paths = []
+
+        def _make(content: bytes) -> str:
+            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.log') as f:
+                f.write(content)
+                paths.append(f.name)
+            return f.name
+
+        yield _make
+
+        for path in paths:
+            os.unlink(path)
+
+    @pytest.mark.parametrize("content", [
+        b"".join(b"line %d %s\r\n" % (i, b"y" * (i % 11)) for i in range(1000)),
+        b"".join(b"line %d\n" % i for i in range(700)) + b"partial tail",
+        b"\n\n\nx\n" * 50,
+        b"".join(b"line %d\n" % i for i in range(70)),  # 行数恰好是块大小的整数倍
+    ])
+    def test_matches_dense_index(self, make_file, content):
+        """测试稀疏索引的读取结果与稠密索引一致"""
+        path = make_file(content)
+        dense = LogParser(sparse=False)
+        dense.load(path)
+        sparse = LogParser(sparse=True, sparse_block_lines=7, chunk_size=100)
+        result = sparse.load(path)
+
+        assert isinstance(result["lines"], SparseLineStore)
+        assert result["line_count"] == len(dense.lines)
+        assert list(sparse.lines) == list(dense.lines)
+        assert sparse.get_lines(5, 40) == dense.get_lines(5, 40)
+        assert sparse.lines[-1] == dense.lines[-1]
+        for i in (0, 6, 7, 13, len(dense.lines)):
+            assert sparse.lines.line_offset(i) == dense.lines.line_offset(i)
+        for pos in (0, 50, 333, len(content) - 1, len(content) + 10):
+            assert sparse.lines.line_at_offset(pos) == dense.lines.line_at_offset(pos)
+
+    def test_memory_usage(self, make_file):
+        """测试稀疏索引只保存每个块的检查点"""
+        parser = LogParser(sparse=True, sparse_block_lines=100)
+        parser.load(make_file(b"x\n" * 10000))
+
+        assert len(parser.lines.checkpoints) == 101
+        assert parser.lines.memory_usage() == 101 * 8
+
+    def test_not_cached(self, make_file, tmp_path):
+        """测试稀疏索引不导出稠密行索引，也不写入行索引缓存"""
+        cache = IndexCache(cache_dir=str(tmp_path / "cache"), min_file_size=0)
+        parser = LogParser(sparse=True, sparse_block_lines=4)
+        parser.load(make_file(b"".join(b"line %d\n" % i for i in range(50))))
+
+        with pytest.raises(NotImplementedError):
+            parser.lines.newline_offsets()
+        assert not cache.save(parser.lines)
+        assert cache.lookup(parser.lines.file_path) is None
+
+    def test_block_cache_is_bounded(self, make_file):
+        """测试已解码块的 LRU 缓存有上限"""
+        parser = LogParser(sparse=True, sparse_block_lines=10)
+        parser.load(make_file(b"".join(b"%d\n" % i for i in range(1000))))
+        parser.lines._cache_blocks = 3
+
+        for i in range(0, 1000, 10):
+            assert parser.lines[i] == str(i)
+        assert len(parser.lines._blocks) == 3
+
+    def test_auto_selects_sparse_over_budget(self, make_file):
+        """测试稠密索引估算超过内存预算时自动使用稀疏索引"""
+        path = make_file(b"ab\n" * 5000)
+
+        assert not isinstance(LogParser().load(path)["lines"], SparseLineStore)
+        parser = LogParser(index_memory_budget=1000)
+        assert isinstance(parser.load(path)["lines"], SparseLineStore)
+        assert parser.get_line_count() == 5000
+
+    def test_follow_append(self, make_file):
+        """测试稀疏索引在跟随模式下追加行"""
+        path = make_file(b"".join(b"line %d\n" % i for i in range(20)) + b"half")
+        parser = LogParser(sparse=True, sparse_block_lines=8)
+        parser.load(path)
+        follower = FileFollower(parser.lines)
+        assert parser.lines[20] == "half"
+
+        with open(path, "ab") as f:
+            f.write(b" done\n" + b"".join(b"more %d\n" % i for i in range(10)))
+        update = follower.poll()
+
+        assert update.event == FollowEvent.APPENDED
+        assert update.first_changed_line == 20
+        assert len(parser.lines) == 31
+        assert parser.lines[20] == "half done"
+        assert parser.lines[30] == "more 9"
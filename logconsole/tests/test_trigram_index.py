@@ -0,0 +1,198 @@
+"""
+TrigramIndex 单元测试
+"""
+import os
+import re
+import tempfile
+
+import pytest
+
+from logconsole.core.index_cache import IndexCache
+from logconsole.core.log_parser import LogParser
+from logconsole.core.regex_literals import required_literals
+from logconsole.core.search_engine import SearchEngine, SearchMode
+from logconsole.core.trigram_index import TrigramIndex, decode_postings, encode_needles
+
+
+class TestTrigramIndex:
+    """三元组索引测试类"""
+
+    @pytest.fixture
+    def make_file(self):
+        """按文本内容创建临时文件"""
+        paths = []
+
+        def _make(text: str) -> str:
+            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.log') as f:
+                f.write(text.encode("utf-8"))
+                paths.append(f.name)
+            return f.name
+
+        yield _make
+
+        for path in paths:
+            os.unlink(path)
+
+    @staticmethod
+    def sample_text() -> str:
+        """每 100 行一块时，只有第 3 块有 Timeout，第 7 块有 用户 登录失败"""
+        lines = []
+        for i in range(1000):
+            if i == 321:
+                lines.append(f"{i} ERROR Connection TIMEOUT after 30s")
+            elif i == 777:
+                lines.append(f"{i} WARN 用户 admin 登录失败")
+            else:
+                lines.append(f"{i} INFO request handled")
+        return "\n".join(lines) + "\n"
+
+    def load_indexed(self, path: str, block_lines: int = 100, cache=None):
+        parser = LogParser(index_cache=cache)
+        parser.load(path)
+        index = TrigramIndex(block_lines=block_lines)
+        index.build(parser.lines)
+        parser.lines.trigram_index = index
+        return parser, index
+
+    def test_candidate_blocks(self, make_file):
+        """测试候选块只包含出现过全部三元组的块，大小写不敏感"""
+        parser, index = self.load_indexed(make_file(self.sample_text()))
+
+        assert index.complete and index.block_count == 10 and index.line_count == 1000
+        assert index.candidate_blocks([b"connection timeout"]) == [3]
+        assert index.candidate_blocks([b"TimeOut"]) == [3]
+        assert index.candidate_blocks(["登录失败".encode("utf-8")]) == [7]
+        assert index.candidate_blocks([b"request"]) == list(range(10))
+        assert index.candidate_blocks([b"nothing"]) == []
+        assert index.candidate_blocks([b"ab"]) is None
+        assert index.candidate_ranges([b"timeout"], 1050) == [(300, 400), (1000, 1050)]
+        parser.close()
+
+    @pytest.mark.parametrize("pattern,mode,case_sensitive", [
+        ("timeout", SearchMode.PLAIN, False),
+        ("TIMEOUT", SearchMode.PLAIN, True),
+        ("登录失败", SearchMode.PLAIN, True),
+        (r"Conn\w+ TIME(OUT)+ after \d+s", SearchMode.REGEX, True),
+        (r"(?i)connection\s+timeout", SearchMode.REGEX, True),
+        ("request|timeout", SearchMode.REGEX, False),
+    ])
+    def test_indexed_search_matches_full_scan(self, make_file, pattern, mode, case_sensitive):
+        """测试使用索引的搜索结果与全量扫描一致"""
+        parser, _ = self.load_indexed(make_file(self.sample_text()))
+        engine = SearchEngine(workers=1)
+
+        indexed = engine.search(parser.lines, pattern, mode, case_sensitive)
+        parser.lines.trigram_index = None
+        full = engine.search(parser.lines, pattern, mode, case_sensitive)
+
+        assert indexed == full
+        assert len(full) > 0
+        parser.close()
+
+    def test_index_narrows_scan(self, make_file):
+        """测试有索引时只扫描候选块和未覆盖的行"""
+        parser, index = self.load_indexed(make_file(self.sample_text()))
+        engine = SearchEngine(workers=1)
+
+        ranges = engine._index_ranges(parser.lines, "timeout", SearchMode.PLAIN, re.compile("timeout", re.I))
+        assert ranges == [(300, 400)]
+        # 候选块太多时退回全量扫描
+        assert engine._index_ranges(parser.lines, "request", SearchMode.PLAIN, re.compile("request")) is None
+        parser.close()
+
+    def test_memory_budget_truncates(self, make_file):
+        """测试超出内存上限后停止建立，未覆盖的行仍会被扫描"""
+        path = make_file(self.sample_text())
+        parser = LogParser()
+        parser.load(path)
+        index = TrigramIndex(block_lines=100, memory_budget=1)
+        index.build(parser.lines)
+        parser.lines.trigram_index = index
+
+        assert index.truncated and not index.complete
+        assert index.block_count == 1 and index.memory_usage() > 0
+        assert index.candidate_ranges([b"timeout"], 1000) == [(100, 1000)]
+        assert SearchEngine(workers=1).search(parser.lines, "timeout", case_sensitive=False) == [(321, 21, 28)]
+        parser.close()
+
+    def test_postings_compression(self):
+        """测试块号差分变长编码"""
+        index = TrigramIndex(block_lines=1)
+        for block in range(300):
+            index.add_block([1] if block in (0, 5, 299) else [2], block + 1)
+
+        assert decode_postings(index.postings[1]) == [0, 5, 299]
+        assert decode_postings(index.postings[2]) == [b for b in range(300) if b not in (0, 5, 299)]
+
+    def test_required_literals(self):
+        """测试正则必需字面量提取"""
+        assert required_literals(r"foo\d+bar")[0] == ["foo", "bar"]
+        assert required_literals(r"(?:abc)+x?yz")[0] == ["abc", "yz"]
+        assert required_literals(r"a|bcd")[0] == []
+        assert required_literals(r"(?i)Error")[1]
+        assert required_literals(r"[")[0] == []
+
+    def test_encode_needles(self):
+        """测试忽略大小写时切断有非 ASCII 大小写变体的字符"""
+        assert encode_needles(["Disk full"], "utf-8") == [b"Disk full"]
+        assert encode_needles(["Disk full"], "utf-8", ignore_case=True) == [b"D", b" full"]
+        assert encode_needles(["错误"], "utf-16", ignore_case=True) == ["错误".encode("utf-16-le")]
+
+    def test_persisted_index(self, make_file, tmp_path):
+        """测试开启后索引保存在缓存目录中，文件变化后失效"""
+        path = make_file(self.sample_text())
+        cache = IndexCache(cache_dir=str(tmp_path / "cache"), min_file_size=0, persist_trigram_index=True)
+        parser, index = self.load_indexed(path, cache=cache)
+
+        assert cache.save_trigram_index(parser.lines, index)
+        loaded = cache.lookup_trigram_index(parser.lines)
+        assert loaded.candidate_blocks([b"timeout"]) == [3]
+        assert loaded.postings == index.postings and loaded._last_block == index._last_block
+        assert (loaded.block_count, loaded.line_count, loaded.complete) == \
+            (index.block_count, index.line_count, index.complete)
+        parser.close()
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("more\n")
+        parser = LogParser()
+        parser.load(path)
+        assert cache.lookup_trigram_index(parser.lines) is None
+        parser.close()
+
+        cache.clear()
+        assert not list((tmp_path / "cache").iterdir())
+
+    def test_not_persisted_by_default(self, make_file, tmp_path):
+        """测试默认不保存也不读取三元组索引"""
+        path = make_file(self.sample_text())
+        cache = IndexCache(cache_dir=str(tmp_path / "cache"), min_file_size=0)
+        parser, index = self.load_indexed(path, cache=cache)
+
+        assert not cache.save_trigram_index(parser.lines, index)
+        assert not list((tmp_path / "cache").glob("*.tri"))
+        assert cache.lookup_trigram_index(parser.lines) is None
+        parser.close()
+
+    @pytest.mark.parametrize("corrupt", [
+        lambda raw: b"",
+        lambda raw: b"not json\n",
+        lambda raw: b"[1]\n",
+        lambda raw: raw.split(b"\n", 1)[0] + b"\n",
+        lambda raw: raw[:-3],
+        lambda raw: raw + b"x",
+    ])
+    def test_corrupt_persisted_index(self, make_file, tmp_path, corrupt):
+        """测试截断或损坏的索引缓存按未命中处理并被删除，之后可以重新保存"""
+        path = make_file(self.sample_text())
+        cache = IndexCache(cache_dir=str(tmp_path / "cache"), min_file_size=0, persist_trigram_index=True)
+        parser, index = self.load_indexed(path, cache=cache)
+        assert cache.save_trigram_index(parser.lines, index)
+
+        tri_path, = (tmp_path / "cache").glob("*.tri")
+        tri_path.write_bytes(corrupt(tri_path.read_bytes()))
+        assert cache.lookup_trigram_index(parser.lines) is None
+        assert not tri_path.exists()
+
+        assert cache.save_trigram_index(parser.lines, index)
+        assert cache.lookup_trigram_index(parser.lines).candidate_blocks([b"timeout"]) == [3]
+        parser.close()
@@ -0,0 +1,68 @@
+"""
+VirtualLogViewer 单元测试
+"""
+import os
+import tempfile
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from logconsole.core.line_store import LineStore, scan_newlines
+from logconsole.ui.virtual_log_viewer import VirtualLogViewer
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    """测试用的 QApplication"""
+    return QApplication.instance() or QApplication([])
+
+
+class TestVirtualLogViewer:
+    """虚拟滚动查看器测试类"""
+
+    @pytest.fixture
+    def store(self):
+        """前半部分短行、后半部分长行的文件，索引只建立到开头，估算行数会随索引变化"""
+        content = b"".join(b"%06d\n" % i for i in range(20000))
+        content += b"".join(b"%06d %s\n" % (i, b"x" * 200) for i in range(20000, 30000))
+        with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".log") as f:
+            f.write(content)
+        store = LineStore(f.name)
+        store.open()
+        store.sample_line_density()
+        store.add_newlines(scan_newlines(store.read_bytes(0, 7000), 0))
+        yield store
+        store.close()
+        os.unlink(f.name)
+
+    @staticmethod
+    def top_line_text(viewer):
+        """可见区域第一行的内容（去掉行号）"""
+        return viewer.text_view.toPlainText().split("\n", 1)[0].split(" │ ", 1)[1]
+
+    def test_estimate_change_keeps_viewport(self, qapp, store):
+        """测试估算行数被替换时按顶部行的字节位置校正滚动条，可见内容不跳动"""
+        viewer = VirtualLogViewer()
+        viewer.set_lines(store)
+        target = store.size * 3 // 4
+        viewer.scroll_to_offset(target)
+        top = self.top_line_text(viewer)
+        top_offset = viewer._top_offset
+        estimate = store.estimated_total_lines()
+
+        # 索引推进到长行区域之前：估算行数变化，顶部行仍未索引
+        store.add_newlines(scan_newlines(store.read_bytes(7000, 140000), 7000))
+        assert store.estimated_total_lines() != estimate
+        viewer.update_line_count()
+        assert viewer._top_offset == top_offset
+        assert self.top_line_text(viewer) == top
+        fraction = (top_offset - store.data_start) / (store.size - store.data_start)
+        assert viewer.scrollbar.value() == int(store.estimated_total_lines() * fraction)
+
+        # 索引完成：换算成精确行号，内容不变
+        store.add_newlines(scan_newlines(store.read_bytes(140000, store.size), 140000))
+        store.finish()
+        viewer.update_line_count()
+        assert viewer._top_offset is None
+        assert self.top_line_text(viewer) == top
+        assert viewer.scrollbar.value() == viewer.current_top_line == store.line_at_offset(top_offset)
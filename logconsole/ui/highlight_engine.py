@@ -9,12 +9,16 @@
 4. 增量更新 - 滚动时仅更新新进入可见区的内容
 """
 import re
-from typing import List, Dict, Optional, Callable
+from operator import itemgetter
+from typing import List, Dict, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 from PyQt5.QtWidgets import QTextEdit, QPlainTextEdit
 from PyQt5.QtGui import QTextCursor, QTextCharFormat, QColor, QFont
 from PyQt5.QtCore import QTimer, QObject, pyqtSignal
 
+from ..core.keyword_matcher import KeywordMatcher, keyword_key
+from ..core.regex_literals import literal_alternatives
+
 
 @dataclass
 class HighlightRule:
@@ -69,6 +73,9 @@ class HighlightEngine(QObject):
 
         # 关键词规则缓存
         self._keyword_rules: List[HighlightRule] = []
+        self._keyword_matcher: Optional[KeywordMatcher] = None  # 纯文本规则合成的匹配器
+        self._matcher_rules: List[Tuple[int, QTextCharFormat]] = []  # 按匹配器关键词下标排列的 (规则序号, 格式)
+        self._regex_rules: List[Tuple[int, HighlightRule]] = []  # 其余逐条匹配的 (规则序号, 规则)
 
         # 防抖定时器
         self._debounce_timer = QTimer()
@@ -83,14 +90,41 @@ class HighlightEngine(QObject):
         self._needs_full_refresh = True
 
     def set_keyword_rules(self, rules: List[HighlightRule]):
-        """设置关键词高亮规则"""
+        """
+        设置关键词高亮规则
+
+        忽略大小写的纯文本规则合成一个多关键词匹配器，每行只扫描一次；高亮结果与
+        逐条规则匹配相同，重叠时后面的规则覆盖前面的。
+        """
         self._keyword_rules = rules
+        literal_rules = {}
+        self._regex_rules = []
+        for order, rule in enumerate(rules):
+            flags = rule.pattern.flags
+            literals = literal_alternatives(rule.pattern.pattern, flags) if flags & re.IGNORECASE else None
+            if literals is not None and len(literals) == 1:
+                # 重复的纯文本规则只保留最后一个（命中相同，会把前面的全部覆盖）
+                key = keyword_key(literals[0], True)
+                literal_rules.pop(key, None)
+                literal_rules[key] = (literals[0], order, rule)
+            else:
+                self._regex_rules.append((order, rule))
+        if literal_rules:
+            entries = list(literal_rules.values())
+            self._keyword_matcher = KeywordMatcher([literal for literal, _, _ in entries], ignore_case=True)
+            self._matcher_rules = [(order, self._rule_format(rule)) for _, order, rule in entries]
+        else:
+            self._keyword_matcher = None
+            self._matcher_rules = []
         self._needs_full_refresh = True
         self._schedule_apply()
 
     def clear_keyword_rules(self):
         """清除关键词规则"""
         self._keyword_rules = []
+        self._keyword_matcher = None
+        self._matcher_rules = []
+        self._regex_rules = []
         self._layers["keyword"].selections = []
         self._needs_full_refresh = True
         self._schedule_apply()
@@ -240,6 +274,9 @@ class HighlightEngine(QObject):
             start_num, end_num = self._get_visible_range()
 
         block = doc.findBlockByNumber(start_num)
+        regex_formats = [(order, rule, self._rule_format(rule)) for order, rule in self._regex_rules]
+        # 两种规则都有时按规则顺序排列各命中，重叠时后面的规则覆盖前面的
+        mixed = bool(regex_formats) and self._keyword_matcher is not None
 
         for _ in range(end_num - start_num + 1):
             if not block.isValid():
@@ -248,28 +285,41 @@ class HighlightEngine(QObject):
             text = block.text()
             block_pos = block.position()
 
-            for rule in self._keyword_rules:
+            spans = []
+            if self._keyword_matcher is not None:
+                for start, end, index in self._keyword_matcher.finditer_each(text):
+                    order, fmt = self._matcher_rules[index]
+                    spans.append((order, start, end, fmt))
+            for order, rule, fmt in regex_formats:
                 for match in rule.pattern.finditer(text):
-                    sel = QTextEdit.ExtraSelection()
-                    cursor = QTextCursor(doc)
-                    cursor.setPosition(block_pos + match.start())
-                    cursor.setPosition(block_pos + match.end(), QTextCursor.KeepAnchor)
-
-                    fmt = QTextCharFormat()
-                    fmt.setForeground(QColor(rule.fg_color))
-                    if rule.bg_color:
-                        fmt.setBackground(QColor(rule.bg_color))
-                    if rule.bold:
-                        fmt.setFontWeight(QFont.Bold)
-
-                    sel.cursor = cursor
-                    sel.format = fmt
-                    selections.append(sel)
+                    spans.append((order, match.start(), match.end(), fmt))
+            if mixed:
+                spans.sort(key=itemgetter(0))
+
+            for _, start, end, fmt in spans:
+                sel = QTextEdit.ExtraSelection()
+                cursor = QTextCursor(doc)
+                cursor.setPosition(block_pos + start)
+                cursor.setPosition(block_pos + end, QTextCursor.KeepAnchor)
+                sel.cursor = cursor
+                sel.format = fmt
+                selections.append(sel)
 
             block = block.next()
 
         self._layers["keyword"].selections = selections
 
+    @staticmethod
+    def _rule_format(rule: HighlightRule) -> QTextCharFormat:
+        """规则对应的文字格式"""
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(rule.fg_color))
+        if rule.bg_color:
+            fmt.setBackground(QColor(rule.bg_color))
+        if rule.bold:
+            fmt.setFontWeight(QFont.Bold)
+        return fmt
+
     def _schedule_apply(self):
         """调度应用（防抖）"""
         if not self._debounce_timer.isActive():
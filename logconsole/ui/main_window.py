@@ -17,10 +17,21 @@ from PyQt5.QtGui import (
     QTextCursor, QSyntaxHighlighter, QKeySequence,
     QTextDocument, QIcon
 )
-from typing import Optional
+import time
+from typing import Dict, Optional, Tuple
 
 from ..core.log_parser import LogParser
-from ..core.search_engine import SearchEngine, SearchMode
+from ..core.index_cache import IndexCache
+from ..core.line_store import LineStore, LineSubset
+from ..core.file_follower import FileFollower, FollowEvent
+from ..core.search_engine import SearchBatch, SearchEngine, SearchMode, CANCEL_CHECK_LINES, grep_lines
+from ..core.search_cache import SearchCache
+from ..core.match_list import MatchList
+from ..core.keyword_matcher import KeywordMatcher, keyword_key
+from ..core.parallel_search import supports_parallel_search
+from ..core.trigram_index import TrigramIndex
+from ..core.cancellation import CancellationToken, OperationCancelled
+from ..core.regex_guard import HighlightBudget
 from ..core.template_manager import TemplateManager
 from ..core.highlight_template import HighlightTemplate, HighlightRule
 from .virtual_log_viewer import VirtualLogViewer
@@ -40,6 +51,18 @@ from .highlight_engine import HighlightEngine, HighlightRule, create_highlight_e
 # 大文件阈值（字节），超过此大小使用虚拟滚动
 LARGE_FILE_THRESHOLD = 10 * 1024 * 1024  # 10MB
 
+# 跟随模式轮询间隔（毫秒）：每个间隔内的追加内容合并为一批渲染
+FOLLOW_INTERVAL_MS = 50
+
+# 流式搜索结果推送到界面的最短间隔（秒）
+SEARCH_BATCH_INTERVAL = 0.1
+
+# 结果树中每个文件最多显示的匹配数
+RESULT_TREE_LIMIT = 500
+
+# 带行号视图的行号前缀长度: "{i:6d} │ " = 9 字符
+LINE_PREFIX_LEN = 9
+
 
 # ========== 搜索结果富文本代理 ==========
 class HighlightDelegate(QStyledItemDelegate):
@@ -87,16 +110,52 @@ class HighlightDelegate(QStyledItemDelegate):
         return size
 
 
+def build_keyword_matcher(keywords: list):
+    """
+    把启用的用户关键词合成一个忽略大小写的多关键词匹配器
+
+    关键词按列表顺序排列，高亮时后面的覆盖前面的；忽略大小写重复的关键词只保留
+    最后一个（它的命中与前面的完全相同，会把前面的全部覆盖）。
+
+    Returns:
+        (KeywordMatcher 或 None, 按匹配器关键词下标排列的 [(关键词, QTextCharFormat)])
+    """
+    enabled = {}
+    for kw in keywords:
+        if kw.enabled and kw.keyword:
+            key = keyword_key(kw.keyword, True)
+            enabled.pop(key, None)
+            enabled[key] = kw
+    if not enabled:
+        return None, []
+
+    matcher = KeywordMatcher([kw.keyword for kw in enabled.values()], ignore_case=True)
+    rules = []
+    for keyword, kw in zip(matcher.keywords, enabled.values()):
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(kw.fg_color))
+        if kw.bg_color:
+            fmt.setBackground(QColor(kw.bg_color))
+        if kw.bold:
+            fmt.setFontWeight(QFont.Bold)
+        rules.append((keyword, fmt))
+    return matcher, rules
+
+
 # ========== 现代化日志语法高亮器 ==========
 class ModernLogHighlighter(QSyntaxHighlighter):
     """现代化日志语法高亮器 - 支持模板系统 + 用户关键词高亮"""
 
+    rule_disabled = pyqtSignal(str, str)  # (规则名, 原因)：正则超出执行预算被禁用
+
     def __init__(self, parent: QTextDocument, template: Optional[HighlightTemplate] = None):
         super().__init__(parent)
         self.template = template
         self.search_pattern = None
         self.compiled_rules = []
-        self.user_keyword_rules = []  # 用户关键词高亮规则
+        self.budget = HighlightBudget(self.rule_disabled.emit)  # 模板规则和搜索高亮的执行预算
+        self.user_keyword_matcher = None  # 用户关键词的多关键词匹配器
+        self.user_keyword_rules = []  # 与匹配器关键词下标对应的 (关键词, 格式)
         self._dirty_blocks = set()  # 需要重新高亮的 block
         self.apply_template(template)
 
@@ -104,6 +163,7 @@ class ModernLogHighlighter(QSyntaxHighlighter):
         """应用模板"""
         self.template = template
         self.compiled_rules = []
+        self.budget.reset()
 
         if not template:
             return
@@ -163,23 +223,8 @@ class ModernLogHighlighter(QSyntaxHighlighter):
             self.search_pattern = None
 
     def set_user_keywords(self, keywords: list, mark_dirty: bool = True):
-        """设置用户关键词高亮规则"""
-        import re
-        self.user_keyword_rules = []
-        for kw in keywords:
-            if not kw.enabled:
-                continue
-            try:
-                pattern = re.compile(re.escape(kw.keyword), re.IGNORECASE)
-                fmt = QTextCharFormat()
-                fmt.setForeground(QColor(kw.fg_color))
-                if kw.bg_color:
-                    fmt.setBackground(QColor(kw.bg_color))
-                if kw.bold:
-                    fmt.setFontWeight(QFont.Bold)
-                self.user_keyword_rules.append((kw.keyword, pattern, fmt))
-            except re.error:
-                pass
+        """设置用户关键词高亮规则（所有关键词合成一个多关键词匹配器，每行只扫描一次）"""
+        self.user_keyword_matcher, self.user_keyword_rules = build_keyword_matcher(keywords)
 
         # 标记所有 block 为脏（需要重新高亮）
         if mark_dirty:
@@ -187,45 +232,91 @@ class ModernLogHighlighter(QSyntaxHighlighter):
 
     def highlightBlock(self, text: str):
         """高亮单行文本"""
-        # 1. 应用模板规则（按优先级）
+        # 1. 应用模板规则（按优先级；超出执行预算的规则被禁用）
         for rule_name, pattern, fmt, priority in self.compiled_rules:
-            for match in pattern.finditer(text):
-                self.setFormat(match.start(), match.end() - match.start(), fmt)
+            for start, end in self.budget.finditer(rule_name, pattern, text):
+                self.setFormat(start, end - start, fmt)
 
-        # 2. 应用用户关键词高亮（优先级高于模板）
-        for keyword, pattern, fmt in self.user_keyword_rules:
-            for match in pattern.finditer(text):
-                self.setFormat(match.start(), match.end() - match.start(), fmt)
+        # 2. 应用用户关键词高亮（优先级高于模板，重叠时后面的关键词覆盖前面的）
+        if self.user_keyword_matcher is not None:
+            for start, end, index in self.user_keyword_matcher.finditer_each(text):
+                self.setFormat(start, end - start, self.user_keyword_rules[index][1])
 
         # 3. 搜索匹配高亮（最高优先级，覆盖所有其他格式）
         if self.search_pattern:
-            for match in self.search_pattern.finditer(text):
-                self.setFormat(match.start(), match.end() - match.start(), self.search_highlight_fmt)
+            name = f"搜索 {self.search_pattern.pattern}"
+            for start, end in self.budget.finditer(name, self.search_pattern, text):
+                self.setFormat(start, end - start, self.search_highlight_fmt)
 
 
 # ========== 文件加载线程 ==========
 class LoadFileThread(QThread):
     """文件加载线程"""
     progress = pyqtSignal(int, int)
+    ready = pyqtSignal(object)  # 首屏行可用（LineStore，索引仍在增长）
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal()
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, open_at_tail: bool = False):
         super().__init__()
         self.file_path = file_path
-        self.parser = LogParser()
+        self.open_at_tail = open_at_tail
+        self.parser = LogParser(index_cache=IndexCache())
+        self.cancel_token = CancellationToken()
 
     def run(self):
         try:
             result = self.parser.load(
                 self.file_path,
-                on_progress=lambda br, tb: self.progress.emit(br, tb)
+                on_progress=lambda br, tb: self.progress.emit(br, tb),
+                on_ready=lambda store: self.ready.emit(store),
+                cancel_token=self.cancel_token,
+                open_at_tail=self.open_at_tail
             )
             self.finished.emit(result)
+        except OperationCancelled:
+            self.cancelled.emit()
         except Exception as e:
             self.error.emit(str(e))
 
 
+class TaskThread(QThread):
+    """
+    可取消的后台任务线程（搜索 / Grep / 导出），在工作线程中执行 fn(cancel_token)
+
+    给出 on_partial 时执行 fn(cancel_token, emit)，emit(value) 把中间结果按顺序
+    交给界面线程的 on_partial(value)。
+    """
+    done = pyqtSignal(object)
+    partial = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, kind: str, label: str, fn, on_done, key=None, on_partial=None):
+        super().__init__()
+        self.kind = kind
+        self.label = label
+        self.fn = fn
+        self.on_done = on_done
+        self.on_partial = on_partial
+        self.key = key
+        self.cancel_token = CancellationToken()
+
+    def run(self):
+        try:
+            if self.on_partial is not None:
+                result = self.fn(self.cancel_token, self.partial.emit)
+            else:
+                result = self.fn(self.cancel_token)
+        except OperationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.done.emit(result)
+
+
 # ========== 专业搜索面板 ==========
 class ModernSearchPanel(QFrame):
     """现代化搜索面板 - 参考 IntelliJ IDEA"""
@@ -358,10 +449,10 @@ class ModernSearchPanel(QFrame):
         self.hide()
         self.closed.emit()
 
-    def update_match_count(self, current: int, total: int):
-        """更新匹配计数"""
+    def update_match_count(self, current: int, total: int, more: bool = False):
+        """更新匹配计数（more 表示搜索仍在进行，总数还会增加）"""
         if total > 0:
-            self.match_label.setText(f"{current} / {total}")
+            self.match_label.setText(f"{current} / {total}{'+' if more else ''}")
         else:
             self.match_label.setText("无匹配")
 
@@ -373,10 +464,11 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.parser = LogParser()
+        self.search_cache = SearchCache()  # 各次搜索共享，重复或细化的查询不必全量扫描
         self.search_engine = SearchEngine()
         self.template_manager = TemplateManager()
         self.keyword_highlight_manager = KeywordHighlightManager()
-        self.lines = []
+        self.lines = []  # 当前文件的行（LineStore，按需解码）
         self.grep_tabs = {}  # 存储 Grep 标签页 {tab_index: filters}
         self.active_search_context = None  # 当前搜索上下文
         self.is_large_file = False  # 是否为大文件模式
@@ -384,6 +476,18 @@ class MainWindow(QMainWindow):
         self.search_dialog = None  # 高级搜索弹窗
         self.search_results = []  # 多次搜索历史 [{search_id, query, ...}]
         self.highlight_panel = None  # 高亮管理面板
+        self._progressive_store = None  # 正在渐进加载、已显示首屏的行存储
+        self._pending_jump = None  # 等待索引到达后再跳转的行号（1-based）
+        self.follower = None  # tail -f 跟随器
+        self.load_thread = None  # 当前文件加载线程
+        self._loading = False  # 加载线程是否仍在工作
+        self._tasks = {}  # 正在执行的后台任务 {kind: TaskThread}
+        self._retired_threads = []  # 已取消、尚未退出的线程（保持引用直到线程结束）
+
+        # 跟随模式定时器
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(FOLLOW_INTERVAL_MS)
+        self.follow_timer.timeout.connect(self._on_follow_tick)
 
         # 监听关键词变化
         self.keyword_highlight_manager.on_change(self._on_keyword_highlight_changed)
@@ -469,6 +573,7 @@ class MainWindow(QMainWindow):
         # 设置语法高亮（使用当前模板）
         current_template = self.template_manager.get_current_template()
         self.main_highlighter = ModernLogHighlighter(self.main_log_viewer.document(), current_template)
+        self.main_highlighter.rule_disabled.connect(self._on_highlight_rule_disabled)
 
         # 添加主标签页（标题初始为"Untitled"）
         self.main_tab_index = self.tab_widget.addTab(self.main_viewer_container, "Untitled")
@@ -556,6 +661,21 @@ class MainWindow(QMainWindow):
         self.wrap_btn.clicked.connect(self.toggle_word_wrap)
         toolbar.addWidget(self.wrap_btn)
 
+        # 跟随模式（tail -f）
+        self.follow_btn = QPushButton("⇣")
+        self.follow_btn.setToolTip("Follow (tail -f)")
+        self.follow_btn.setCheckable(True)
+        self.follow_btn.setChecked(False)
+        self.follow_btn.clicked.connect(self.toggle_follow)
+        toolbar.addWidget(self.follow_btn)
+
+        # 打开时定位到末尾：不等索引完成，从文件末尾向前扫描显示最后一屏
+        self.tail_btn = QPushButton("⤓")
+        self.tail_btn.setToolTip("Open at end")
+        self.tail_btn.setCheckable(True)
+        self.tail_btn.setChecked(False)
+        toolbar.addWidget(self.tail_btn)
+
         # 高亮管理按钮
         highlight_btn = QPushButton("◆")
         highlight_btn.setToolTip("Keyword Highlights (Ctrl+H)")
@@ -580,11 +700,20 @@ class MainWindow(QMainWindow):
         self.encoding_label = QLabel("")
         self.cursor_label = QLabel("Ln 1, Col 1")
 
+        # 取消按钮：有加载 / 搜索 / Grep / 导出在进行时显示
+        self.cancel_btn = QPushButton("✕ Cancel")
+        self.cancel_btn.setFlat(True)
+        self.cancel_btn.setCursor(Qt.PointingHandCursor)
+        self.cancel_btn.setToolTip("取消正在进行的操作")
+        self.cancel_btn.clicked.connect(self.cancel_operations)
+        self.cancel_btn.hide()
+
         # 添加状态栏组件 - 无分隔符，靠内边距区分
         self.status_bar.addWidget(self.file_label)
         self.status_bar.addWidget(self.size_label)
         self.status_bar.addWidget(self.line_label)
         self.status_bar.addWidget(self.encoding_label)
+        self.status_bar.addPermanentWidget(self.cancel_btn)
         self.status_bar.addPermanentWidget(self.cursor_label)
 
     def setup_shortcuts(self):
@@ -626,93 +755,190 @@ class MainWindow(QMainWindow):
 
     def _on_dialog_find_next(self, pattern: str, is_regex: bool, case_sensitive: bool):
         """弹窗：查找下一个（仅跳转，不保存结果）"""
-        print(f"[find_next] ENTER: pattern='{pattern}', regex={is_regex}, case={case_sensitive}")
-        ctx = self.get_active_viewer_context()
-        if not ctx or not pattern:
-            print(f"[find_next] EXIT: ctx={ctx is not None}, pattern='{pattern}'")
-            return
-
-        # 检查是否需要重新搜索（pattern 或搜索参数变化）
-        need_search = (
-            not self.search_engine.matches or
-            getattr(self, '_last_search_pattern', None) != pattern or
-            getattr(self, '_last_search_ctx_id', None) != id(ctx["lines"])
-        )
-        print(f"[find_next] need_search={need_search}, matches={len(self.search_engine.matches)}, last_pattern={getattr(self, '_last_search_pattern', None)}")
-
-        if need_search:
-            mode = SearchMode.REGEX if is_regex else SearchMode.PLAIN
-            self.search_engine.search(ctx["lines"], pattern, mode, case_sensitive)
-            self._last_search_pattern = pattern
-            self._last_search_ctx_id = id(ctx["lines"])
-            self.active_search_context = ctx
-            print(f"[find_next] search done: {len(self.search_engine.matches)} matches")
-            # 仅设置高亮 pattern，不执行 rehighlight（避免 UI 卡死）
-            if ctx["highlighter"]:
-                ctx["highlighter"].set_search_pattern(pattern, is_regex, case_sensitive)
-
-        matches = self.search_engine.matches
-        if matches:
-            prev_idx = self.search_engine.current_match_index
-            match = self.search_engine.next_match()
-            print(f"[find_next] next_match: prev_idx={prev_idx}, new_idx={self.search_engine.current_match_index}, match={match}")
-            if match:
-                self.scroll_to_match(match[0], match[1], match[2], select=True)
-                idx = self.search_engine.current_match_index + 1
-                self.search_dialog.update_status(f"第 {idx}/{len(matches)} 个匹配")
-        else:
-            print(f"[find_next] no matches found")
-            self.search_dialog.update_status("未找到匹配项")
+        self._find_from_cursor(pattern, is_regex, case_sensitive, backward=False)
 
     def _on_dialog_find_prev(self, pattern: str, is_regex: bool, case_sensitive: bool):
         """弹窗：查找上一个（仅跳转，不保存结果）"""
-        print(f"[find_prev] ENTER: pattern='{pattern}', regex={is_regex}, case={case_sensitive}")
+        self._find_from_cursor(pattern, is_regex, case_sensitive, backward=True)
+
+    def _find_from_cursor(self, pattern: str, is_regex: bool, case_sensitive: bool, backward: bool):
+        """
+        弹窗查找：从光标位置后台查找最近的一个匹配并跳转
+
+        只扫描到第一个匹配为止（到末尾/开头后回绕），不做全量搜索；缓存中有
+        完整结果时直接定位并显示序号。
+        """
         ctx = self.get_active_viewer_context()
         if not ctx or not pattern:
-            print(f"[find_prev] EXIT: ctx={ctx is not None}, pattern='{pattern}'")
             return
 
-        # 检查是否需要重新搜索（pattern 或搜索参数变化）
-        need_search = (
-            not self.search_engine.matches or
-            getattr(self, '_last_search_pattern', None) != pattern or
-            getattr(self, '_last_search_ctx_id', None) != id(ctx["lines"])
+        mode = SearchMode.REGEX if is_regex else SearchMode.PLAIN
+        lines = ctx["lines"]
+        line, column = self._find_origin(ctx, backward)
+        self.active_search_context = ctx
+        # 仅设置高亮 pattern，不执行 rehighlight（避免 UI 卡死）
+        if ctx["highlighter"]:
+            ctx["highlighter"].set_search_pattern(pattern, is_regex, case_sensitive)
+
+        engine = SearchEngine(workers=1, cache=self.search_cache)
+
+        def on_done(match):
+            if match is None:
+                self.search_dialog.update_status("未找到匹配项")
+                return
+            self._last_find = (id(lines), match)
+            self.scroll_to_match(match[0], match[1], match[2], select=True)
+            cached = self.search_cache.get(lines, pattern, is_regex, case_sensitive)
+            if cached is not None:
+                first, last = cached.line_range(match[0])
+                idx = first + cached.starts[first:last].index(match[1]) + 1
+                self.search_dialog.update_status(f"第 {idx}/{len(cached)} 个匹配")
+                return
+            found_at = (match[0], match[1])
+            wrapped = found_at >= (line, column) if backward else found_at < (line, column)
+            self.search_dialog.update_status(f"第 {match[0] + 1} 行" + ("（已回绕）" if wrapped else ""))
+
+        self.search_dialog.update_status("查找中…")
+        self._start_task(
+            "find", "Find",
+            lambda token: engine.find_next(lines, pattern, mode, case_sensitive, line, column, backward, token),
+            on_done,
+            key=(id(lines), pattern, is_regex, case_sensitive, line, column, backward)
         )
-        print(f"[find_prev] need_search={need_search}, matches={len(self.search_engine.matches)}, last_pattern={getattr(self, '_last_search_pattern', None)}")
-
-        if need_search:
-            mode = SearchMode.REGEX if is_regex else SearchMode.PLAIN
-            self.search_engine.search(ctx["lines"], pattern, mode, case_sensitive)
-            self._last_search_pattern = pattern
-            self._last_search_ctx_id = id(ctx["lines"])
-            self.active_search_context = ctx
-            print(f"[find_prev] search done: {len(self.search_engine.matches)} matches")
-            # 仅设置高亮 pattern，不执行 rehighlight（避免 UI 卡死）
-            if ctx["highlighter"]:
-                ctx["highlighter"].set_search_pattern(pattern, is_regex, case_sensitive)
 
-        matches = self.search_engine.matches
-        if matches:
-            prev_idx = self.search_engine.current_match_index
-            match = self.search_engine.prev_match()
-            print(f"[find_prev] prev_match: prev_idx={prev_idx}, new_idx={self.search_engine.current_match_index}, match={match}")
-            if match:
-                self.scroll_to_match(match[0], match[1], match[2], select=True)
-                idx = self.search_engine.current_match_index + 1
-                self.search_dialog.update_status(f"第 {idx}/{len(matches)} 个匹配")
+    def _find_origin(self, ctx: dict, backward: bool) -> Tuple[int, int]:
+        """
+        查找起点 (行号, 列)：向后查找从选区末尾开始，向前查找从选区开头开始
+
+        光标仍停在上次跳转到的匹配所在行时以该匹配为起点（虚拟视图只能整行选中，
+        选区列号不可用）。
+        """
+        viewer = ctx["viewer"]
+        cursor = viewer.textCursor()
+        doc = cursor.document()
+        position = cursor.selectionStart() if backward else cursor.selectionEnd()
+        block = doc.findBlock(position)
+        prefix = LINE_PREFIX_LEN if getattr(viewer, "show_line_numbers", True) else 0
+        column = max(0, position - block.position() - prefix)
+        if ctx.get("is_virtual") and hasattr(viewer, "get_actual_line_number"):
+            line = viewer.get_actual_line_number(block.blockNumber())
         else:
-            print(f"[find_prev] no matches found")
-            self.search_dialog.update_status("未找到匹配项")
+            line = block.blockNumber()
+
+        last = getattr(self, "_last_find", None)
+        if last is not None and last[0] == id(ctx["lines"]) and last[1][0] == line:
+            _, (line, start, end) = last
+            column = start if backward else end
+        return line, column
+
+    def _match_total_text(self) -> str:
+        """匹配总数，搜索仍在进行时加 "+" """
+        total = len(self.search_engine.matches)
+        return f"{total}+" if self.search_engine.searching else str(total)
+
+    def _stream_search(self, lines, pattern: str, mode, case_sensitive: bool, token, emit, tag=None) -> int:
+        """
+        在工作线程中流式搜索，把新匹配分批交给 emit((tag, 新匹配, 已扫描行数, 总行数))
+
+        第一批匹配立即推送（界面可以马上跳转），之后每 SEARCH_BATCH_INTERVAL 秒推送一次，
+        最后一次推送时已扫描行数等于总行数。结果缓存在 search_cache 中。
+
+        Returns:
+            匹配总数
+        """
+        engine = SearchEngine(cache=self.search_cache)
+        pending = MatchList()
+        last_emit = time.monotonic()
+        for batch in engine.iter_search(lines, pattern, mode, case_sensitive, token):
+            pending.extend(batch.matches)
+            first = pending and len(engine.matches) == len(pending)
+            if first or time.monotonic() - last_emit >= SEARCH_BATCH_INTERVAL:
+                emit((tag, pending, batch.scanned, batch.total))
+                pending = MatchList()
+                last_emit = time.monotonic()
+        emit((tag, pending, len(lines), len(lines)))
+        return len(engine.matches)
+
+    def _stream_search_files(self, sources: list, pattern: str, mode, case_sensitive: bool, token, emit) -> int:
+        """
+        在工作线程中并发搜索多个文件，把各文件的新匹配分批交给 emit((文件下标, 新匹配, 已扫描行数, 总行数))
+
+        各文件的第一批匹配和扫描完成时立即推送，其余每 SEARCH_BATCH_INTERVAL 秒推送一次。
+
+        Returns:
+            匹配总数
+        """
+        engine = SearchEngine(cache=self.search_cache)
+        pending: Dict[int, SearchBatch] = {}
+        seen = set()  # 已推送过匹配的文件
+
+        def flush(index: int):
+            part = pending.pop(index)
+            if part.matches:
+                seen.add(index)
+            emit((index, part.matches, part.scanned, part.total))
+
+        total = 0
+        last_emit = time.monotonic()
+        for index, batch in engine.iter_search_files(sources, pattern, mode, case_sensitive, token):
+            total += len(batch.matches)
+            part = pending.setdefault(index, SearchBatch(MatchList(), 0, batch.total))
+            part.matches.extend(batch.matches)
+            part.scanned = batch.scanned
+            if (part.matches and index not in seen) or batch.scanned == batch.total:
+                flush(index)
+            elif time.monotonic() - last_emit >= SEARCH_BATCH_INTERVAL:
+                for i in list(pending):
+                    flush(i)
+                last_emit = time.monotonic()
+        for i in list(pending):
+            flush(i)
+        return total
 
     def _on_dialog_count(self, pattern: str, is_regex: bool, case_sensitive: bool):
-        """弹窗：计数（仅统计，不保存结果）"""
+        """弹窗：计数（只统计匹配数、匹配行数和每小时的匹配数，不保存匹配位置）"""
         ctx = self.get_active_viewer_context()
         if not ctx or not pattern:
             return
 
         mode = SearchMode.REGEX if is_regex else SearchMode.PLAIN
-        matches = self.search_engine.search(ctx["lines"], pattern, mode, case_sensitive)
-        self.search_dialog.update_status(f"共 {len(matches)} 个匹配")
+        lines = ctx["lines"]
+        engine = SearchEngine(cache=self.search_cache)
+
+        def count(token, emit):
+            last_emit = [time.monotonic()]
+
+            def on_progress(scanned, total, result):
+                if time.monotonic() - last_emit[0] >= SEARCH_BATCH_INTERVAL:
+                    emit((result.matches, scanned * 100 // max(1, total)))
+                    last_emit[0] = time.monotonic()
+
+            return engine.count(lines, pattern, mode, case_sensitive, token, "hour", on_progress)
+
+        def on_partial(part):
+            matches, percent = part
+            self.search_dialog.update_status(f"计数中… {matches} ({percent}%)")
+
+        def on_done(result):
+            self.search_dialog.update_status(
+                f"共 {result.matches} 个匹配，{result.lines} 行", self._format_time_buckets(result.buckets)
+            )
+
+        self.search_dialog.update_status("计数中…")
+        self._start_task("count", "Count", count, on_done, on_partial=on_partial)
+
+    @staticmethod
+    def _format_time_buckets(buckets: dict, limit: int = 48) -> str:
+        """每小时匹配数的悬停提示（按时间排列，最多 limit 行）"""
+        if not buckets:
+            return ""
+        rows = [
+            f"{key + ':00' if key else '无时间戳'}  {count}"
+            for key, count in sorted(buckets.items())
+        ]
+        if len(rows) > limit:
+            rows = rows[:limit] + [f"… 另有 {len(rows) - limit} 个时间段"]
+        return "每小时匹配数\n" + "\n".join(rows)
 
     def _on_dialog_find_in_current(self, pattern: str, is_regex: bool, case_sensitive: bool):
         """弹窗：在当前文件中查找（保存结果到面板）"""
@@ -724,9 +950,7 @@ class MainWindow(QMainWindow):
 
     def _do_find_and_save(self, pattern: str, is_regex: bool, case_sensitive: bool, all_files: bool):
         """执行搜索并保存结果到三级树形结构"""
-        import uuid
         import os
-        from datetime import datetime
 
         if not pattern:
             return
@@ -744,20 +968,13 @@ class MainWindow(QMainWindow):
                     "lines": self.lines,
                     "highlighter": self.highlighter
                 })
-            # Grep 标签页
+            # Grep 标签页（直接搜索它们的行子集）
             for tab_idx, tab_info in self.grep_tabs.items():
                 tab_name = self.tab_widget.tabText(tab_idx)
-                grep_text = tab_info["viewer"].toPlainText()
-                grep_lines = []
-                for line in grep_text.split("\n"):
-                    if " │ " in line:
-                        grep_lines.append(line.split(" │ ", 1)[1])
-                    else:
-                        grep_lines.append(line)
                 files_to_search.append({
                     "tab_index": tab_idx,
                     "filename": tab_name,
-                    "lines": grep_lines,
+                    "lines": tab_info["lines"],
                     "highlighter": tab_info.get("highlighter")
                 })
         else:
@@ -774,43 +991,94 @@ class MainWindow(QMainWindow):
                 "highlighter": ctx["highlighter"]
             })
 
-        # 执行搜索
-        mode = SearchMode.REGEX if is_regex else SearchMode.PLAIN
-        total_matches = 0
-        file_results = []
-
-        for file_info in files_to_search:
-            matches = self.search_engine.search(file_info["lines"], pattern, mode, case_sensitive)
-            if matches:
-                total_matches += len(matches)
-                file_results.append({
-                    "tab_index": file_info["tab_index"],
-                    "filename": file_info["filename"],
-                    "lines": file_info["lines"],
-                    "matches": matches,
-                    "highlighter": file_info["highlighter"]
-                })
-                # 仅设置高亮 pattern，不调用 rehighlight（避免 UI 卡死）
-                if file_info["highlighter"]:
-                    file_info["highlighter"].set_search_pattern(pattern, is_regex, case_sensitive)
-
-        if total_matches == 0:
-            self.search_dialog.update_status("未找到匹配项")
-            return
+        # 后台流式搜索，结果边到达边加入结果树
+        import uuid
+        from datetime import datetime
 
-        # 创建搜索结果记录
-        search_id = str(uuid.uuid4())[:8]
+        mode = SearchMode.REGEX if is_regex else SearchMode.PLAIN
         search_result = {
-            "search_id": search_id,
+            "search_id": str(uuid.uuid4())[:8],
             "query": pattern,
             "is_regex": is_regex,
             "case_sensitive": case_sensitive,
             "timestamp": datetime.now(),
-            "file_results": file_results,
-            "total_matches": total_matches
+            "file_results": [],
+            "total_matches": 0,
+            "scrolled": False  # 是否已跳转到当前标签页的第一个匹配
         }
 
-        # 检查是否已有相同搜索词，有则更新
+        def search_files(token, emit):
+            sources = [file_info["lines"] for file_info in files_to_search]
+            return self._stream_search_files(sources, pattern, mode, case_sensitive, token, emit)
+
+        self.search_dialog.update_status("搜索中…")
+        self._start_task(
+            "search", "Search", search_files,
+            lambda total: self._finish_saved_results(search_result),
+            on_partial=lambda part: self._add_saved_results(search_result, files_to_search, part)
+        )
+
+    def _add_saved_results(self, search_result: dict, files_to_search: list, part: tuple):
+        """
+        追加一批流式结果到三级树形结构
+
+        第一批时保存搜索记录；当前标签页的第一批匹配到达时跳转到其中第一个（各文件并发搜索，
+        其他文件的行号对当前视图没有意义）
+        """
+        index, matches, _, _ = part
+        if matches:
+            file_info = files_to_search[index]
+            file_result = next(
+                (r for r in search_result["file_results"] if r["tab_index"] == file_info["tab_index"]), None
+            )
+            if file_result is None:
+                file_result = dict(file_info, matches=MatchList())
+                search_result["file_results"].append(file_result)
+            shown = len(file_result["matches"])
+            file_result["matches"].extend(matches)
+            search_result["total_matches"] += len(matches)
+
+            file_item = self._find_result_item(search_result["search_id"], file_info["tab_index"])
+            if not any(r is search_result for r in self.search_results):
+                # 第一批结果：保存记录
+                self._store_search_result(search_result)
+                self._rebuild_results_tree()
+            elif file_item is None:
+                # 新文件有了匹配
+                self._rebuild_results_tree()
+            else:
+                self._add_match_items(
+                    file_item, search_result, file_result, file_result["matches"][shown:RESULT_TREE_LIMIT]
+                )
+                self._set_item_count(file_item, file_result["filename"], len(file_result["matches"]))
+                self._set_item_count(
+                    file_item.parent(), f"\"{search_result['query']}\"", search_result["total_matches"]
+                )
+            if not search_result["scrolled"] and file_info["tab_index"] == self.tab_widget.currentIndex():
+                search_result["scrolled"] = True
+                first_match = matches[0]
+                self.scroll_to_match(first_match[0], first_match[1], first_match[2])
+        self.search_dialog.update_status(f"搜索中… {search_result['total_matches']} 个匹配")
+
+    def _finish_saved_results(self, search_result: dict):
+        """流式搜索完成：设置高亮并更新状态"""
+        file_results = search_result["file_results"]
+        for file_result in file_results:
+            # 仅设置高亮 pattern，不调用 rehighlight（避免 UI 卡死）
+            if file_result["highlighter"]:
+                file_result["highlighter"].set_search_pattern(
+                    search_result["query"], search_result["is_regex"], search_result["case_sensitive"]
+                )
+
+        total_matches = search_result["total_matches"]
+        if total_matches == 0:
+            self.search_dialog.update_status("未找到匹配项")
+        else:
+            self.search_dialog.update_status(f"共 {total_matches} 个匹配，{len(file_results)} 个文件")
+
+    def _store_search_result(self, search_result: dict):
+        """保存搜索记录：已有相同搜索词时替换，否则追加（最多 10 条）"""
+        pattern = search_result["query"]
         existing_idx = next((i for i, r in enumerate(self.search_results) if r["query"] == pattern), None)
         if existing_idx is not None:
             self.search_results[existing_idx] = search_result
@@ -820,16 +1088,44 @@ class MainWindow(QMainWindow):
                 self.search_results.pop(0)
             self.search_results.append(search_result)
 
-        # 更新结果树
-        self._rebuild_results_tree()
-
-        # 更新状态
-        self.search_dialog.update_status(f"共 {total_matches} 个匹配，{len(file_results)} 个文件")
+    def _find_result_item(self, search_id: str, tab_index: int) -> Optional[QTreeWidgetItem]:
+        """查找结果树中某次搜索下某个文件的节点"""
+        for i in range(self.results_tree.topLevelItemCount()):
+            search_item = self.results_tree.topLevelItem(i)
+            data = search_item.data(0, Qt.UserRole)
+            if not isinstance(data, dict) or data.get("search_id") != search_id:
+                continue
+            for j in range(search_item.childCount()):
+                file_item = search_item.child(j)
+                if file_item.data(0, Qt.UserRole).get("tab_index") == tab_index:
+                    return file_item
+        return None
 
-        # 跳转到第一个匹配
-        if file_results and file_results[0]["matches"]:
-            first_match = file_results[0]["matches"][0]
-            self.scroll_to_match(first_match[0], first_match[1], first_match[2])
+    @staticmethod
+    def _set_item_count(item: QTreeWidgetItem, label: str, count: int):
+        """更新节点文本中的计数（保留折叠箭头）"""
+        arrow = item.text(0)[:1]
+        item.setText(0, f"{arrow} {label} · {count}")
+
+    def _add_match_items(self, file_item: QTreeWidgetItem, search_result: dict, file_result: dict, matches):
+        """在文件节点下平铺添加匹配项（L3）"""
+        lines = file_result["lines"]
+        for line_num, start_pos, end_pos in matches:
+            line_text = lines[line_num] if line_num < len(lines) else ""
+            context = self._get_match_context(line_text, start_pos, end_pos)
+            l3_text = f"{line_num + 1}: {context}"
+            l3_item = QTreeWidgetItem([l3_text])
+            l3_item.setData(0, Qt.UserRole, {
+                "type": "match",
+                "search_id": search_result["search_id"],
+                "tab_index": file_result["tab_index"],
+                "line_num": line_num,
+                "start_pos": start_pos,
+                "end_pos": end_pos
+            })
+            # 高亮匹配词
+            self._highlight_match_in_item(l3_item, search_result["query"])
+            file_item.addChild(l3_item)
 
     def _rebuild_results_tree(self):
         """重建结果树 - 极简风格，支持折叠"""
@@ -859,7 +1155,6 @@ class MainWindow(QMainWindow):
                 filename = file_result["filename"]
                 matches = file_result["matches"]
                 tab_index = file_result["tab_index"]
-                lines = file_result["lines"]
 
                 # L2: 文件节点 - 使用文本箭头
                 arrow = "▼" if True else "▶"  # 默认展开
@@ -874,22 +1169,7 @@ class MainWindow(QMainWindow):
                 l1_item.addChild(l2_item)
 
                 # L3: 平铺显示所有匹配（不分组）
-                for match_idx, (line_num, start_pos, end_pos) in enumerate(matches[:500]):
-                    line_text = lines[line_num] if line_num < len(lines) else ""
-                    context = self._get_match_context(line_text, start_pos, end_pos)
-                    l3_text = f"{line_num + 1}: {context}"
-                    l3_item = QTreeWidgetItem([l3_text])
-                    l3_item.setData(0, Qt.UserRole, {
-                        "type": "match",
-                        "search_id": search_id,
-                        "tab_index": tab_index,
-                        "line_num": line_num,
-                        "start_pos": start_pos,
-                        "end_pos": end_pos
-                    })
-                    # 高亮匹配词
-                    self._highlight_match_in_item(l3_item, query)
-                    l2_item.addChild(l3_item)
+                self._add_match_items(l2_item, search_result, file_result, matches[:RESULT_TREE_LIMIT])
 
                 l2_item.setExpanded(True)
 
@@ -1059,6 +1339,11 @@ class MainWindow(QMainWindow):
             self.file_label.setText(f"Theme: {template_name}")
             QTimer.singleShot(2000, lambda: self.restore_file_label())
 
+    def _on_highlight_rule_disabled(self, name: str, reason: str):
+        """高亮规则超出执行预算被禁用：在状态栏提示"""
+        self.file_label.setText(f"⚠ 高亮规则已禁用: {name}（{reason}）")
+        QTimer.singleShot(5000, self.restore_file_label)
+
     def restore_file_label(self):
         """恢复文件标签"""
         if self.lines:
@@ -1090,19 +1375,10 @@ class MainWindow(QMainWindow):
         # 如果是 Grep 标签页
         if current_index in self.grep_tabs:
             tab_info = self.grep_tabs[current_index]
-            # 从 grep viewer 中提取行（去掉行号前缀）
-            grep_text = tab_info["viewer"].toPlainText()
-            grep_lines = []
-            for line in grep_text.split("\n"):
-                # 格式: "   123 │ 实际内容"
-                if " │ " in line:
-                    grep_lines.append(line.split(" │ ", 1)[1])
-                else:
-                    grep_lines.append(line)
             return {
                 "viewer": tab_info["viewer"],
                 "highlighter": tab_info["highlighter"],
-                "lines": grep_lines,
+                "lines": tab_info["lines"],
                 "is_grep": True,
                 "is_virtual": False
             }
@@ -1255,74 +1531,39 @@ class MainWindow(QMainWindow):
             viewer._keyword_selections = selections
             return
 
-        import re
         doc = viewer.document()
         total_blocks = doc.blockCount()
 
-        # 预编译所有关键词模式
-        kw_patterns = []
-        for kw in keywords:
-            if not kw.enabled:
-                continue
-            try:
-                pattern = re.compile(re.escape(kw.keyword), re.IGNORECASE)
-                kw_patterns.append((pattern, kw.fg_color, kw.bg_color, kw.bold))
-            except re.error:
-                pass
-
-        if not kw_patterns:
+        # 所有关键词合成一个匹配器，每行只扫描一次
+        matcher, rules = build_keyword_matcher(keywords)
+        if matcher is None:
             viewer._keyword_selections = selections
             return
 
         # 小文件：全文档搜索；大文件：仅可见区域 + 缓冲区
         if total_blocks < 5000:
-            block = doc.begin()
-            while block.isValid():
-                text = block.text()
-                block_pos = block.position()
-                for pattern, fg, bg, bold in kw_patterns:
-                    for match in pattern.finditer(text):
-                        selection = QTextEdit.ExtraSelection()
-                        cursor = QTextCursor(doc)
-                        cursor.setPosition(block_pos + match.start())
-                        cursor.setPosition(block_pos + match.end(), QTextCursor.KeepAnchor)
-                        fmt = QTextCharFormat()
-                        fmt.setForeground(QColor(fg))
-                        if bg:
-                            fmt.setBackground(QColor(bg))
-                        if bold:
-                            fmt.setFontWeight(QFont.Bold)
-                        selection.cursor = cursor
-                        selection.format = fmt
-                        selections.append(selection)
-                block = block.next()
+            start_num, end_num = 0, total_blocks - 1
         else:
             cursor_top = viewer.cursorForPosition(viewer.viewport().rect().topLeft())
             cursor_bottom = viewer.cursorForPosition(viewer.viewport().rect().bottomRight())
             start_num = max(0, cursor_top.block().blockNumber() - 100)
             end_num = min(total_blocks - 1, cursor_bottom.block().blockNumber() + 100)
-            block = doc.findBlockByNumber(start_num)
-            for _ in range(end_num - start_num + 1):
-                if not block.isValid():
-                    break
-                text = block.text()
-                block_pos = block.position()
-                for pattern, fg, bg, bold in kw_patterns:
-                    for match in pattern.finditer(text):
-                        selection = QTextEdit.ExtraSelection()
-                        cursor = QTextCursor(doc)
-                        cursor.setPosition(block_pos + match.start())
-                        cursor.setPosition(block_pos + match.end(), QTextCursor.KeepAnchor)
-                        fmt = QTextCharFormat()
-                        fmt.setForeground(QColor(fg))
-                        if bg:
-                            fmt.setBackground(QColor(bg))
-                        if bold:
-                            fmt.setFontWeight(QFont.Bold)
-                        selection.cursor = cursor
-                        selection.format = fmt
-                        selections.append(selection)
-                block = block.next()
+
+        block = doc.findBlockByNumber(start_num)
+        for _ in range(end_num - start_num + 1):
+            if not block.isValid():
+                break
+            text = block.text()
+            block_pos = block.position()
+            for start, end, index in matcher.finditer_each(text):
+                selection = QTextEdit.ExtraSelection()
+                cursor = QTextCursor(doc)
+                cursor.setPosition(block_pos + start)
+                cursor.setPosition(block_pos + end, QTextCursor.KeepAnchor)
+                selection.cursor = cursor
+                selection.format = rules[index][1]
+                selections.append(selection)
+            block = block.next()
 
         viewer._keyword_selections = selections
 
@@ -1345,13 +1586,28 @@ class MainWindow(QMainWindow):
         if not self.lines or not keyword:
             return
 
-        # 过滤日志行
-        filtered_lines = [
-            f"{i+1:6d} │ {line}"
-            for i, line in enumerate(self.lines)
-            if keyword in line
-        ]
+        # 后台过滤日志行
+        lines = self.lines
+        self._start_task(
+            "grep", "Grep",
+            lambda token: self._format_grep_lines(lines, [keyword], token),
+            lambda grep_result: self._create_grep_tab(keyword, grep_result, len(lines))
+        )
 
+    @staticmethod
+    def _format_grep_lines(lines, keywords: list, cancel_token=None) -> Tuple[LineSubset, list]:
+        """
+        过滤包含任一关键词的行并加上行号（在工作线程中执行）
+
+        Returns:
+            (命中行组成的行子集, 加上行号后用于显示的行)
+        """
+        subset = LineSubset(lines, grep_lines(lines, keywords, cancel_token))
+        return subset, [f"{i+1:6d} │ {line}" for i, line in zip(subset.line_numbers, subset)]
+
+    def _create_grep_tab(self, keyword: str, grep_result: Tuple[LineSubset, list], total_lines: int):
+        """为 Grep 结果创建新标签页"""
+        subset, filtered_lines = grep_result
         if not filtered_lines:
             QMessageBox.information(self, "Grep 结果", f"未找到包含 '{keyword}' 的日志")
             return
@@ -1370,7 +1626,7 @@ class MainWindow(QMainWindow):
         filter_layout.setSpacing(8)
 
         # 匹配数量标签 - Apple HIG 风格
-        count_label = QLabel(f"{len(filtered_lines)}/{len(self.lines)}")
+        count_label = QLabel(f"{len(filtered_lines)}/{total_lines}")
         count_label.setStyleSheet(get_count_label_style())
         filter_layout.addWidget(count_label)
 
@@ -1409,6 +1665,7 @@ class MainWindow(QMainWindow):
         if len(filtered_lines) <= 5000:
             current_template = self.template_manager.get_current_template()
             grep_highlighter = ModernLogHighlighter(grep_viewer.document(), current_template)
+            grep_highlighter.rule_disabled.connect(self._on_highlight_rule_disabled)
 
         # 显示过滤后的内容
         grep_viewer.setPlainText("\n".join(filtered_lines))
@@ -1420,6 +1677,7 @@ class MainWindow(QMainWindow):
         # 记录过滤关键词
         self.grep_tabs[tab_index] = {
             "filters": [keyword],
+            "lines": subset,  # 不带行号前缀的行内容（搜索直接针对它）
             "viewer": grep_viewer,
             "highlighter": grep_highlighter,
             "container": container,
@@ -1506,21 +1764,32 @@ class MainWindow(QMainWindow):
         if tab_index not in self.grep_tabs:
             return
 
-        # 获取标签页信息
+        # 后台重新过滤日志（OR 逻辑）
         tab_info = self.grep_tabs[tab_index]
+        filters = tab_info["filters"] + [keyword]
+        lines = self.lines
+        self._start_task(
+            "grep", "Grep",
+            lambda token: self._format_grep_lines(lines, filters, token),
+            lambda grep_result: self._apply_grep_to_tab(tab_info, keyword, grep_result, len(lines))
+        )
+
+    def _apply_grep_to_tab(self, tab_info: dict, keyword: str, grep_result: Tuple[LineSubset, list], total_lines: int):
+        """把新增关键词的过滤结果更新到 Grep 标签页"""
+        subset, filtered_lines = grep_result
+        # 等待期间标签页可能被关闭或重新编号
+        tab_index = next((i for i, info in self.grep_tabs.items() if info is tab_info), None)
+        if tab_index is None:
+            return
+
         existing_filters = tab_info["filters"]
         grep_viewer = tab_info["viewer"]
 
         # 添加新关键词
         existing_filters.append(keyword)
 
-        # 重新过滤日志（OR 逻辑）
-        filtered_lines = []
-        for i, line in enumerate(self.lines):
-            if any(f in line for f in existing_filters):
-                filtered_lines.append(f"{i+1:6d} │ {line}")
-
         # 更新标签页内容
+        tab_info["lines"] = subset
         grep_viewer.setPlainText("\n".join(filtered_lines))
 
         # 更新条件栏 - 添加新标签
@@ -1534,7 +1803,7 @@ class MainWindow(QMainWindow):
 
             # 更新计数
             if "count_label" in tab_info:
-                tab_info["count_label"].setText(f"{len(filtered_lines)}/{len(self.lines)}")
+                tab_info["count_label"].setText(f"{len(filtered_lines)}/{total_lines}")
 
         # 更新标签页标题
         title = ' + '.join(existing_filters)
@@ -1585,36 +1854,109 @@ class MainWindow(QMainWindow):
             self,
             "打开日志文件",
             "",
-            "日志文件 (*.log *.txt);;所有文件 (*.*)"
+            "日志文件 (*.log *.txt *.gz *.bz2 *.xz);;所有文件 (*.*)"
         )
         if file_path:
             self.load_file(file_path)
 
     def load_file(self, file_path: str):
         """加载文件"""
+        self._stop_follow()
+        if self._loading:
+            # 取消上一次尚未完成的加载：它在当前块结束后释放文件和映射
+            self._retire_thread(self.load_thread)
+            if self._progressive_store is not None:
+                self.lines = []
+        elif self.load_thread is not None:
+            self._keep_until_finished(self.load_thread)
+        for kind in ("index", "find", "count"):
+            # 旧文件的三元组索引、查找下一个和计数不再需要
+            task = self._tasks.pop(kind, None)
+            if task is not None:
+                self._retire_thread(task)
+                self._update_cancel_button()
         self.file_label.setText("Loading...")
         self.log_viewer.clear()
 
-        self.load_thread = LoadFileThread(file_path)
+        self._progressive_store = None
+        self._pending_jump = None
+
+        # 跟随模式下同样直接从末尾开始显示
+        open_at_tail = self.tail_btn.isChecked() or self.follow_btn.isChecked()
+        self.load_thread = LoadFileThread(file_path, open_at_tail)
         self.load_thread.progress.connect(self.on_load_progress)
+        self.load_thread.ready.connect(self.on_load_ready)
         self.load_thread.finished.connect(self.on_load_finished)
         self.load_thread.error.connect(self.on_load_error)
+        self.load_thread.cancelled.connect(self.on_load_cancelled)
+        self._loading = True
         self.load_thread.start()
+        self._update_cancel_button()
+
+    def _is_stale_load(self) -> bool:
+        """信号是否来自已被取代的加载线程（取消后队列中可能还有它的信号）"""
+        return self.sender() is not self.load_thread
+
+    def _end_load(self):
+        """当前加载线程结束（完成 / 失败 / 取消）"""
+        self._loading = False
+        self._update_cancel_button()
 
     def on_load_progress(self, bytes_read: int, total_bytes: int):
         """加载进度"""
-        progress = int((bytes_read / total_bytes) * 100)
+        if self._is_stale_load():
+            return
+        progress = int((bytes_read / total_bytes) * 100) if total_bytes else 100
         self.file_label.setText(f"Loading {progress}%")
 
+        # 渐进加载：行数和滚动范围随索引增长
+        if self._progressive_store is not None:
+            self.virtual_viewer.update_line_count()
+            self.line_label.setText(f" ≈{self._progressive_store.estimated_total_lines():,} 行… ")
+            self._run_pending_jump()
+
+    def on_load_ready(self, store):
+        """首屏就绪：大文件立即显示并可滚动，索引在后台继续"""
+        import os
+        if self._is_stale_load():
+            return
+        # 小文件很快加载完，完成后再一次性渲染（带语法高亮）
+        if store.size <= LARGE_FILE_THRESHOLD:
+            return
+
+        self.lines = store
+        self.parser = self.load_thread.parser
+        self.is_large_file = True
+        self._progressive_store = store
+
+        self.switch_to_virtual_viewer()
+        self.virtual_viewer.set_lines(store)
+        if self.load_thread.open_at_tail:
+            self.virtual_viewer.scroll_to_end()
+
+        filename = os.path.basename(store.file_path)
+        self.tab_widget.setTabText(self.main_tab_index, filename)
+        self.size_label.setText(f" {store.size / (1024 * 1024):.2f} MB ")
+        self.line_label.setText(f" ≈{store.estimated_total_lines():,} 行… ")
+        self.encoding_label.setText(f" {self.parser.encoding.upper()} ")
+
     def on_load_finished(self, result: dict):
         """加载完成"""
         import os
+        if self._is_stale_load():
+            return
+        self._end_load()
+        progressive = self._progressive_store is not None and self._progressive_store is result["lines"]
+        self._progressive_store = None
         self.lines = result["lines"]
         self.parser = self.load_thread.parser
-        file_size = result["file_size"]
+        file_size = result["file_size"]  # 压缩文件为解压后的大小
         self.is_large_file = file_size > LARGE_FILE_THRESHOLD
 
-        if self.is_large_file:
+        if progressive:
+            # 首屏已显示，只需补齐行数，保持用户当前的滚动位置
+            self.virtual_viewer.update_line_count()
+        elif self.is_large_file:
             # 大文件模式：使用虚拟滚动查看器
             self.switch_to_virtual_viewer()
             self.virtual_viewer.set_lines(self.lines)
@@ -1624,6 +1966,9 @@ class MainWindow(QMainWindow):
             formatted_lines = [f"{i:6d} │ {line}" for i, line in enumerate(self.lines, 1)]
             self.main_log_viewer.setPlainText("\n".join(formatted_lines))
 
+        if self.load_thread.open_at_tail and not progressive:
+            self._scroll_main_viewer_to_end()
+
         # 更新主标签页标题为文件名
         filename = os.path.basename(self.parser.file_path) if self.parser.file_path else "Unknown"
         self.tab_widget.setTabText(self.main_tab_index, filename)
@@ -1634,6 +1979,42 @@ class MainWindow(QMainWindow):
         self.size_label.setText(f" {file_size_mb:.2f} MB ")
         self.line_label.setText(f" {result['line_count']:,} 行 ")
         self.encoding_label.setText(f" {result['encoding'].upper()} ")
+        self._run_pending_jump()
+        self._start_trigram_index()
+
+        # 跟随模式开启时，重新打开（包括轮转后）继续跟随
+        if self.follow_btn.isChecked():
+            self._start_follow()
+
+    def _start_trigram_index(self):
+        """大文件在后台建立三元组索引，已建立的块立即参与搜索筛选；开启持久化且文件未变化时直接读取磁盘缓存"""
+        store = self.lines
+        if not self.is_large_file or not supports_parallel_search(store):
+            return
+        cache = self.parser.index_cache
+        index = cache.lookup_trigram_index(store) if cache else None
+        if index is not None:
+            store.trigram_index = index
+            return
+
+        index = TrigramIndex()
+        store.trigram_index = index
+        workers = self.search_engine.workers
+
+        def build(token):
+            index.build(store, token, workers)
+            if cache:
+                cache.save_trigram_index(store, index)
+            return index
+
+        self._start_task("index", "Index", build, self._on_trigram_index_done)
+
+    def _on_trigram_index_done(self, index: TrigramIndex):
+        """索引建立完成，在状态栏报告覆盖行数和内存占用"""
+        state = "truncated" if index.truncated else "ready"
+        size_mb = index.memory_usage() / (1024 * 1024)
+        self.file_label.setText(f"Index {state}: {index.line_count:,} lines, {size_mb:.1f} MB")
+        QTimer.singleShot(2000, self.restore_file_label)
 
     def switch_to_virtual_viewer(self):
         """切换到虚拟滚动查看器（大文件模式）"""
@@ -1672,9 +2053,123 @@ class MainWindow(QMainWindow):
 
     def on_load_error(self, error: str):
         """加载错误"""
+        if self._is_stale_load():
+            return
+        self._end_load()
         QMessageBox.critical(self, "Error", f"Failed to load file:\n{error}")
         self.file_label.setText("Load failed")
 
+    def on_load_cancelled(self):
+        """加载被取消（状态栏取消按钮）"""
+        if self._is_stale_load():
+            return
+        self._end_load()
+        if self._progressive_store is not None:
+            # 已显示的首屏所在的行存储已被释放
+            self._progressive_store = None
+            self._pending_jump = None
+            self.lines = []
+            self.log_viewer.clear()
+        self.file_label.setText("Load cancelled")
+
+    # ========== 可取消的长操作 ==========
+    def _start_task(self, kind: str, label: str, fn, on_done, key=None, on_partial=None):
+        """
+        在后台线程执行可取消的长操作，同类操作新的会取消旧的
+
+        Args:
+            kind: 操作类别（search / grep / export）
+            label: 状态栏取消按钮上显示的名称
+            fn: 在工作线程中执行的函数 fn(cancel_token)（有 on_partial 时为 fn(cancel_token, emit)）
+            on_done: 完成后在界面线程中调用 on_done(result)
+            key: 与正在执行的同类操作 key 相同时不重复启动
+            on_partial: 在界面线程中接收中间结果 on_partial(value)
+        """
+        running = self._tasks.get(kind)
+        if running is not None:
+            if key is not None and running.key == key:
+                return
+            self._retire_thread(running)
+
+        task = TaskThread(kind, label, fn, on_done, key, on_partial)
+        task.done.connect(self._on_task_done)
+        task.partial.connect(self._on_task_partial)
+        task.failed.connect(self._on_task_failed)
+        task.cancelled.connect(self._on_task_cancelled)
+        self._tasks[kind] = task
+        task.start()
+        self._update_cancel_button()
+
+    def _pop_task(self) -> Optional[TaskThread]:
+        """取出发出信号的任务；已被新任务取代的返回 None"""
+        task = self.sender()
+        if self._tasks.get(task.kind) is not task:
+            return None
+        del self._tasks[task.kind]
+        self._keep_until_finished(task)
+        self._update_cancel_button()
+        return task
+
+    def _on_task_done(self, result):
+        task = self._pop_task()
+        if task is not None:
+            task.on_done(result)
+
+    def _on_task_partial(self, value):
+        """转发中间结果；已被取代的任务的结果丢弃"""
+        task = self.sender()
+        if self._tasks.get(task.kind) is task:
+            task.on_partial(value)
+
+    def _on_task_failed(self, error: str):
+        task = self._pop_task()
+        if task is not None:
+            if task.kind == "search":
+                self.search_engine.finish_results()
+            QMessageBox.critical(self, f"{task.label} Error", error)
+
+    def _on_task_cancelled(self):
+        task = self._pop_task()
+        if task is not None:
+            if task.kind == "search":
+                # 保留已收到的部分结果，导航恢复回绕
+                self.search_engine.finish_results()
+            self.file_label.setText(f"{task.label} cancelled")
+            QTimer.singleShot(2000, self.restore_file_label)
+
+    def _retire_thread(self, thread: QThread):
+        """取消线程并保留引用，直到它在下一个检查点退出"""
+        thread.cancel_token.cancel()
+        self._keep_until_finished(thread)
+
+    def _keep_until_finished(self, thread: QThread):
+        """保留线程引用直到 run() 返回（运行中的 QThread 被回收会导致崩溃）"""
+        self._retired_threads = [t for t in self._retired_threads if t.isRunning()]
+        self._retired_threads.append(thread)
+
+    def _update_cancel_button(self):
+        """按正在进行的操作更新状态栏取消按钮"""
+        labels = (["Load"] if self._loading else []) + [t.label for t in self._tasks.values()]
+        self.cancel_btn.setText(f"✕ Cancel {' / '.join(labels)}")
+        self.cancel_btn.setVisible(bool(labels))
+
+    def cancel_operations(self):
+        """取消所有正在进行的加载、搜索、Grep 和导出"""
+        if self._loading:
+            self.load_thread.cancel_token.cancel()
+        for task in self._tasks.values():
+            task.cancel_token.cancel()
+
+    def closeEvent(self, event):
+        """关闭窗口前取消并等待后台线程退出"""
+        self.cancel_operations()
+        threads = self._retired_threads + list(self._tasks.values())
+        if self.load_thread is not None:
+            threads.append(self.load_thread)
+        for thread in threads:
+            thread.wait()
+        super().closeEvent(event)
+
     def perform_search(self, pattern: str, is_regex: bool, case_sensitive: bool):
         """执行搜索"""
         # 获取当前活动视图上下文
@@ -1698,35 +2193,57 @@ class MainWindow(QMainWindow):
         # 保存当前上下文以供后续导航使用
         self.active_search_context = ctx
 
-        # 执行搜索（先搜索，后高亮，避免卡顿）
+        # 后台流式搜索（先搜索，后高亮，避免卡顿），第一个匹配到达即跳转
         mode = SearchMode.REGEX if is_regex else SearchMode.PLAIN
-        matches = self.search_engine.search(lines, pattern, mode, case_sensitive)
-
-        # 更新结果树
+        tab_index = self.tab_widget.currentIndex()
+        self.search_engine.start_results()
         self.results_tree.clear()
-        current_tab_index = self.tab_widget.currentIndex()
+        self._start_task(
+            "search", "Search",
+            lambda token, emit: self._stream_search(lines, pattern, mode, case_sensitive, token, emit),
+            lambda count: self._finish_search_results(ctx, pattern, is_regex, case_sensitive),
+            on_partial=lambda part: self._add_search_results(ctx, tab_index, part)
+        )
 
-        if matches:
-            self.results_tree.show()
-
-            # 平铺显示所有匹配（不分组）
-            for match_idx, (line_num, start_pos, end_pos) in enumerate(matches[:500]):
-                line_text = lines[line_num]
-                context = self._get_match_context(line_text, start_pos, end_pos)
-                item = QTreeWidgetItem([f"{line_num + 1}: {context}"])
-                item.setData(0, Qt.UserRole, match_idx)
-                item.setData(0, Qt.UserRole + 1, current_tab_index)
-                item.setData(0, Qt.UserRole + 2, line_num)
-                self.results_tree.addTopLevelItem(item)
-
-            # 跳转到第一个匹配
-            self.scroll_to_match(matches[0][0], matches[0][1], matches[0][2])
-            self.search_panel.update_match_count(1, len(matches))
+    def _add_search_results(self, ctx: dict, tab_index: int, part: tuple):
+        """搜索面板：追加一批流式结果，第一批时跳转到第一个匹配"""
+        _, matches, _, _ = part
+        if not matches:
+            return
+        lines = ctx["lines"]
+        first_idx = len(self.search_engine.matches)
+        self.search_engine.add_matches(matches)
 
-            # 选中第一项
+        # 更新结果树：平铺显示匹配（不分组）
+        self.results_tree.show()
+        for match_idx in range(first_idx, min(len(self.search_engine.matches), RESULT_TREE_LIMIT)):
+            line_num, start_pos, end_pos = self.search_engine.matches[match_idx]
+            context = self._get_match_context(lines[line_num], start_pos, end_pos)
+            item = QTreeWidgetItem([f"{line_num + 1}: {context}"])
+            item.setData(0, Qt.UserRole, match_idx)
+            item.setData(0, Qt.UserRole + 1, tab_index)
+            item.setData(0, Qt.UserRole + 2, line_num)
+            self.results_tree.addTopLevelItem(item)
+
+        if first_idx == 0:
+            # 跳转到第一个匹配并选中第一项
+            self.search_engine.current_match_index = 0
+            self.scroll_to_match(matches[0][0], matches[0][1], matches[0][2])
             first_item = self.results_tree.topLevelItem(0)
             if first_item:
                 self.results_tree.setCurrentItem(first_item)
+        self.search_panel.update_match_count(
+            self.search_engine.current_match_index + 1, len(self.search_engine.matches), more=True
+        )
+
+    def _finish_search_results(self, ctx: dict, pattern: str, is_regex: bool, case_sensitive: bool):
+        """搜索面板：流式搜索完成"""
+        highlighter = ctx["highlighter"]
+        self.search_engine.finish_results()
+        matches = self.search_engine.matches
+
+        if matches:
+            self.search_panel.update_match_count(self.search_engine.current_match_index + 1, len(matches))
 
             # 延迟高亮（搜索完成后再刷新，提升响应速度）
             if highlighter:
@@ -1788,8 +2305,6 @@ class MainWindow(QMainWindow):
             if not block.isValid():
                 return
 
-            # 行号前缀长度: "{i:6d} │ " = 9 字符
-            LINE_PREFIX_LEN = 9
             actual_start = 0
             actual_end = 0
 
@@ -1835,7 +2350,9 @@ class MainWindow(QMainWindow):
         if match:
             self.scroll_to_match(match[0], match[1], match[2])
             idx = self.search_engine.current_match_index + 1
-            self.search_panel.update_match_count(idx, len(self.search_engine.matches))
+            self.search_panel.update_match_count(
+                idx, len(self.search_engine.matches), more=self.search_engine.searching
+            )
 
     def prev_match(self):
         """上一个匹配"""
@@ -1845,7 +2362,9 @@ class MainWindow(QMainWindow):
         if match:
             self.scroll_to_match(match[0], match[1], match[2])
             idx = self.search_engine.current_match_index + 1
-            self.search_panel.update_match_count(idx, len(self.search_engine.matches))
+            self.search_panel.update_match_count(
+                idx, len(self.search_engine.matches), more=self.search_engine.searching
+            )
 
     def _sync_tree_selection(self, match_idx: int):
         """同步树形控件选中状态"""
@@ -2158,14 +2677,177 @@ class MainWindow(QMainWindow):
             return
 
         from PyQt5.QtWidgets import QInputDialog
-        line_num, ok = QInputDialog.getInt(self, "跳转到行", "行号:", 1, 1, len(self.lines))
+        text, ok = QInputDialog.getText(self, "跳转到行", "行号（或 50% 按比例、@字节偏移）:")
+        text = text.strip().replace(",", "")
+        if not ok or not text:
+            return
+
+        # 按文件位置跳转：只扫描目标位置附近的换行符，索引完成前也可用
+        try:
+            if text.endswith("%"):
+                self._goto_position(fraction=float(text[:-1]) / 100)
+                return
+            if text.startswith("@"):
+                self._goto_position(offset=int(text[1:]))
+                return
+            line_num = max(1, int(text))
+        except ValueError:
+            return
+
+        # 索引尚未完成时总行数未知，允许输入超出当前已索引范围的行号
+        indexing = not getattr(self.lines, "complete", True)
+        if line_num > len(self.lines):
+            if indexing:
+                # 目标行还没索引到：等索引覆盖该行后再跳转
+                self._pending_jump = line_num
+                self.cursor_label.setText(f" Ln {line_num} (indexing…) ")
+                return
+            line_num = len(self.lines)
+        self._goto_line(line_num)
+
+    def _goto_position(self, fraction: Optional[float] = None, offset: Optional[int] = None):
+        """
+        跳转到文件中的位置（按比例或字节偏移）
+
+        Args:
+            fraction: 文件位置比例（0.0 ~ 1.0）
+            offset: 字节偏移（fraction 为 None 时使用）
+        """
+        store = self.lines
+        if not isinstance(store, LineStore):
+            # 内存模式：按行数比例
+            if fraction is not None:
+                self._goto_line(max(1, min(len(store), int(len(store) * fraction) + 1)))
+            return
 
-        if ok:
+        if fraction is not None:
+            offset = store.data_start + int((store.size - store.data_start) * min(max(fraction, 0.0), 1.0))
+        if self.is_large_file and self.virtual_viewer:
+            self.virtual_viewer.scroll_to_offset(offset)
+            self.cursor_label.setText(f" @{offset:,} ")
+        elif store.complete:
+            start = store.next_line_start(offset)
+            self._goto_line((store.line_at_offset(start) if start >= 0 else len(store) - 1) + 1)
+
+    def _goto_line(self, line_num: int):
+        """跳转到指定行（1-based）"""
+        if self.is_large_file and self.virtual_viewer:
+            self.virtual_viewer.scroll_to_line(line_num - 1)
+        else:
             cursor = self.log_viewer.textCursor()
             cursor.movePosition(QTextCursor.Start)
             cursor.movePosition(QTextCursor.Down, QTextCursor.MoveAnchor, line_num - 1)
             self.log_viewer.setTextCursor(cursor)
             self.log_viewer.ensureCursorVisible()
+        self.cursor_label.setText(f" Ln {line_num}, Col 1 ")
+
+    def _run_pending_jump(self):
+        """索引覆盖到等待中的目标行（或索引完成）时执行跳转"""
+        if self._pending_jump is None:
+            return
+        complete = getattr(self.lines, "complete", True)
+        if len(self.lines) >= self._pending_jump or complete:
+            line_num = min(self._pending_jump, len(self.lines))
+            self._pending_jump = None
+            if line_num > 0:
+                self._goto_line(line_num)
+
+    def toggle_follow(self):
+        """切换跟随模式（tail -f）"""
+        if self.follow_btn.isChecked():
+            self._start_follow()
+        else:
+            self._stop_follow()
+
+    def _start_follow(self):
+        """开始跟随当前文件"""
+        if not isinstance(self.lines, LineStore) or not self.lines.complete:
+            # 内存模式（UTF-16 等）不支持增量索引；加载中则等加载完成后自动开始
+            if not isinstance(self.lines, LineStore) and self.lines:
+                self.follow_btn.setChecked(False)
+                self.file_label.setText("Follow unavailable")
+                QTimer.singleShot(2000, self.restore_file_label)
+            return
+        if not self.lines.follow_supported:
+            # 压缩文件无法增量追加
+            self.follow_btn.setChecked(False)
+            self.file_label.setText("Follow unavailable")
+            QTimer.singleShot(2000, self.restore_file_label)
+            return
+        self.follower = FileFollower(self.lines)
+        self.follow_timer.start()
+        self._scroll_main_viewer_to_end()
+
+    def _stop_follow(self):
+        """停止跟随"""
+        self.follow_timer.stop()
+        self.follower = None
+
+    def _on_follow_tick(self):
+        """跟随定时器：把本周期内追加的内容作为一批渲染"""
+        if self.follower is None:
+            return
+
+        update = self.follower.poll()
+        if update.event == FollowEvent.RESET:
+            # 截断或轮转：重新打开文件，加载完成后继续跟随
+            file_path = self.follower.store.file_path
+            self._stop_follow()
+            self.load_file(file_path)
+            return
+        if update.event == FollowEvent.APPENDED:
+            self._append_followed_lines(update.first_changed_line)
+
+    def _append_followed_lines(self, first_line: int):
+        """把从 first_line 开始的新行追加到主视图，视图在底部时自动滚动"""
+        store = self.lines
+
+        # 小文件跟随到超过阈值时切换到虚拟滚动
+        if not self.is_large_file and store.size > LARGE_FILE_THRESHOLD:
+            self.is_large_file = True
+            self.switch_to_virtual_viewer()
+            self.virtual_viewer.set_lines(store)
+            self.virtual_viewer.scroll_to_end()
+        elif self.is_large_file:
+            viewer = self.virtual_viewer
+            at_bottom = viewer.scrollbar.value() >= viewer.scrollbar.maximum()
+            viewer.update_line_count(changed_from=first_line)
+            if at_bottom:
+                viewer.scroll_to_end()
+        else:
+            scrollbar = self.main_log_viewer.verticalScrollBar()
+            at_bottom = scrollbar.value() >= scrollbar.maximum()
+            doc = self.main_log_viewer.document()
+            cursor = QTextCursor(doc)
+
+            # 从第一条变化的行开始替换到文档末尾（末行可能是之前不完整的行）
+            block = doc.findBlockByNumber(first_line)
+            if first_line == 0:
+                cursor.setPosition(0)
+            elif block.isValid():
+                cursor.setPosition(block.position() - 1)
+            else:
+                cursor.movePosition(QTextCursor.End)
+            cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+
+            new_lines = store[first_line:len(store)]
+            text = "\n".join(f"{i:6d} │ {line}" for i, line in enumerate(new_lines, first_line + 1))
+            cursor.beginEditBlock()
+            cursor.insertText(("\n" if first_line > 0 else "") + text)
+            cursor.endEditBlock()
+            if at_bottom:
+                self._scroll_main_viewer_to_end()
+
+        self.size_label.setText(f" {store.size / (1024 * 1024):.2f} MB ")
+        self.line_label.setText(f" {len(store):,} 行 ")
+
+    def _scroll_main_viewer_to_end(self):
+        """主视图滚动到末尾"""
+        if self.is_large_file and self.virtual_viewer:
+            self.virtual_viewer.scroll_to_end()
+        else:
+            scrollbar = self.main_log_viewer.verticalScrollBar()
+            scrollbar.setValue(scrollbar.maximum())
 
     def toggle_word_wrap(self):
         """切换自动换行"""
@@ -2186,6 +2868,7 @@ class MainWindow(QMainWindow):
 
     def export_log(self):
         """导出日志"""
+        import os
         if not self.lines:
             return
 
@@ -2194,12 +2877,26 @@ class MainWindow(QMainWindow):
         )
 
         if file_path:
-            try:
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write("\n".join(self.lines))
-                QMessageBox.information(self, "Export Success", f"Exported to:\n{file_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Export Error", str(e))
+            lines = self.lines
+
+            def write_lines(token):
+                # 逐行写出，避免一次性拼接整个文件；取消时删除写了一半的文件
+                try:
+                    with open(file_path, "w", encoding="utf-8") as f:
+                        for i, line in enumerate(lines):
+                            if i % CANCEL_CHECK_LINES == 0:
+                                token.check()
+                            if i:
+                                f.write("\n")
+                            f.write(line)
+                except OperationCancelled:
+                    os.remove(file_path)
+                    raise
+
+            self._start_task(
+                "export", "Export", write_lines,
+                lambda _: QMessageBox.information(self, "Export Success", f"Exported to:\n{file_path}")
+            )
 
     def _apply_search_highlight(self, viewer, block, match_start: int, match_end: int):
         """使用 HighlightEngine 高亮当前匹配行和搜索词"""
@@ -246,8 +246,10 @@ class SearchDialog(QDialog):
         self.search_input.setText(text)
         self.search_input.selectAll()
 
-    def update_status(self, message: str):
+    def update_status(self, message: str, details: str = ""):
+        """更新状态文字，details 作为悬停提示（如计数的时间段分布）"""
         self.status_label.setText(message)
+        self.status_label.setToolTip(details)
 
     def show_dialog(self):
         self.show()
@@ -8,6 +8,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QTextCursor, QColor, QPalette
+from typing import Optional
 
 
 class VirtualLogViewer(QWidget):
@@ -19,10 +20,12 @@ class VirtualLogViewer(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.lines = []  # 原始行数据
+        self.lines = []  # 原始行数据（List[str] 或 LineStore）
         self.visible_lines = 50  # 可见行数
         self.line_height = 18  # 行高（像素）
         self.current_top_line = 0  # 当前顶部行号
+        self._rendered_end = 0  # 已渲染的最后一行（不含）
+        self._top_offset = None  # 滚动到尚未索引的位置时，顶部行的字节偏移（行号未知）
         self.show_line_numbers = True
 
         self.init_ui()
@@ -97,34 +100,149 @@ class VirtualLogViewer(QWidget):
         """设置日志行数据"""
         self.lines = lines
         self.current_top_line = 0
+        self._top_offset = None
 
-        # 更新滚动条范围
-        max_scroll = max(0, len(lines) - self.visible_lines)
+        # 更新滚动条范围（索引未完成时按估算行数）
+        max_scroll = max(0, self._total_lines() - self.visible_lines)
         self.scrollbar.setRange(0, max_scroll)
         self.scrollbar.setValue(0)
 
         # 渲染可见区域
         self.render_visible_lines()
 
+    def update_line_count(self, changed_from: Optional[int] = None):
+        """
+        行数增长后（渐进加载 / 跟随模式）扩展滚动范围，保持当前滚动位置
+
+        Args:
+            changed_from: 内容有变化的第一行（跟随模式下末行可能被补全）
+        """
+        # 估算行数变化时滚动条范围随之变化，不能让范围裁剪触发重新定位
+        max_scroll = max(0, self._total_lines() - self.visible_lines)
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setRange(0, max_scroll)
+        self.scrollbar.blockSignals(False)
+
+        if self._top_offset is not None:
+            if self._top_offset < self.lines.indexed_offset():
+                # 按字节位置显示的区域已被索引：换算成精确行号，内容不变，只校正滚动条
+                self.current_top_line = self.lines.line_at_offset(self._top_offset)
+                self._top_offset = None
+                self._set_scroll_value(self.current_top_line)
+                self.render_visible_lines()
+            else:
+                # 仍未索引：按顶部行的字节位置在新的范围内重新换算滚动条位置，内容不动
+                self.current_top_line = min(self._value_for_offset(self._top_offset), max_scroll)
+                self._set_scroll_value(self.current_top_line)
+            return
+
+        if self.current_top_line > max_scroll:
+            # 精确行数小于估算值，原位置已超出范围
+            self.current_top_line = max_scroll
+            self._set_scroll_value(max_scroll)
+            self.render_visible_lines()
+            return
+
+        # 可见区域之前没有填满、或已渲染的行内容有变化时重新渲染
+        needs_render = self._rendered_end < min(self.current_top_line + self.visible_lines + 10, len(self.lines))
+        if changed_from is not None and changed_from < self._rendered_end:
+            needs_render = True
+        if needs_render:
+            self.render_visible_lines()
+
+    def scroll_to_end(self):
+        """滚动到最后一行（索引未完成时从文件末尾向前扫描，直接显示最后一屏）"""
+        if self.lines and not getattr(self.lines, "complete", True):
+            self._show_offset(self.lines.tail_offset(self.visible_lines), self.scrollbar.maximum())
+            return
+        self.scrollbar.setValue(self.scrollbar.maximum())
+
+    def scroll_to_offset(self, offset: int):
+        """
+        滚动到字节偏移所在的行（对齐到行首），索引未覆盖时直接从该位置读取
+
+        Args:
+            offset: 字节偏移
+        """
+        store = self.lines
+        start = store.next_line_start(offset)
+        if start < 0:
+            self.scroll_to_end()
+            return
+        if store.complete or start < store.indexed_offset():
+            self.scrollbar.setValue(store.line_at_offset(start))
+            return
+        self._show_offset(start, self._value_for_offset(start))
+
+    def _show_offset(self, offset: int, value: int):
+        """按字节位置显示（行号未知），滚动条只移动到估算位置，不触发重新定位"""
+        self._top_offset = offset
+        self.current_top_line = min(value, self.scrollbar.maximum())
+        self._set_scroll_value(self.current_top_line)
+        self.render_visible_lines()
+
+    def _set_scroll_value(self, value: int):
+        """只移动滚动条，不触发 on_scroll"""
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setValue(value)
+        self.scrollbar.blockSignals(False)
+
+    def _value_for_offset(self, offset: int) -> int:
+        """字节偏移按比例换算成（估算行数下的）滚动位置"""
+        store = self.lines
+        fraction = (offset - store.data_start) / max(1, store.size - store.data_start)
+        return int(self._total_lines() * fraction)
+
+    def _total_lines(self) -> int:
+        """滚动范围使用的行数：行存储索引未完成时为采样估算值"""
+        estimate = getattr(self.lines, "estimated_total_lines", None)
+        return estimate() if estimate else len(self.lines)
+
+    def _offset_for_value(self, value: int) -> Optional[int]:
+        """
+        滚动位置超出已索引的行时，按比例换算成字节偏移并对齐到行首
+
+        Returns:
+            行首偏移；已索引的行覆盖该位置时返回 None
+        """
+        store = self.lines
+        if getattr(store, "complete", True) or value < len(store):
+            return None
+        start = store.offset_for_fraction(value / max(1, self._total_lines()))
+        return start if start >= 0 else None
+
     def render_visible_lines(self):
         """渲染可见区域的行"""
         if not self.lines:
+            self._rendered_end = 0
             self.text_view.setPlainText("")
             return
 
+        if self._top_offset is not None:
+            # 行号未知：直接从字节位置读取可见行
+            visible = self.lines.read_lines_at(self._top_offset, self.visible_lines + 10)
+            self._rendered_end = self.current_top_line + len(visible)
+            prefix = f"{'~':>6} │ " if self.show_line_numbers else ""
+            self._set_visible_text("\n".join(prefix + line for line in visible))
+            return
+
         start = self.current_top_line
         end = min(start + self.visible_lines + 10, len(self.lines))  # 多渲染几行做缓冲
+        self._rendered_end = end
 
-        # 构建可见文本
+        # 构建可见文本（一次切片取出可见行，行存储只解码这一段）
+        visible = self.lines[start:end]
         if self.show_line_numbers:
             visible_text = "\n".join(
-                f"{i+1:6d} │ {self.lines[i]}"
-                for i in range(start, end)
+                f"{i:6d} │ {line}"
+                for i, line in enumerate(visible, start + 1)
             )
         else:
-            visible_text = "\n".join(self.lines[start:end])
+            visible_text = "\n".join(visible)
+        self._set_visible_text(visible_text)
 
-        # 更新显示（保持水平滚动位置）
+    def _set_visible_text(self, visible_text: str):
+        """更新显示（保持水平滚动位置）"""
         h_scroll = self.text_view.horizontalScrollBar().value()
         self.text_view.setPlainText(visible_text)
         self.text_view.horizontalScrollBar().setValue(h_scroll)
@@ -132,6 +250,7 @@ class VirtualLogViewer(QWidget):
     def on_scroll(self, value):
         """滚动事件处理"""
         self.current_top_line = value
+        self._top_offset = self._offset_for_value(value)
         self.render_visible_lines()
 
     def scroll_to_line(self, line_num: int, highlight: bool = True):
@@ -196,6 +315,10 @@ class VirtualLogViewer(QWidget):
             )
         return "\n".join(self.lines)
 
+    def clear(self):
+        """兼容 QTextEdit 接口 - 清空内容"""
+        self.set_lines([])
+
     def textCursor(self):
         """兼容 QTextEdit 接口"""
         return self.text_view.textCursor()